@@ -4,4 +4,6 @@ from django.apps import AppConfig
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
-
+    
+    def ready(self):
+        import chat.signals  # noqa
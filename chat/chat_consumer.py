@@ -0,0 +1,81 @@
+"""
+Consumer WebSocket pour les messages du chat (remplace le polling de /new-messages/)
+"""
+import json
+from urllib.parse import parse_qs
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from .models import Conversation, Message
+from .serializers import serialize_message
+
+# Nombre maximal de messages renvoyés lors d'une reconnexion (la suite est lue par /new-messages/)
+RESUME_LIMIT = 100
+
+
+class ChatConsumer(AsyncWebsocketConsumer):
+    """Consumer qui pousse les nouveaux messages d'une conversation en temps réel"""
+    
+    async def connect(self):
+        self.conversation_id = self.scope['url_route']['kwargs']['conversation_id']
+        self.room_group_name = f'chat_{self.conversation_id}'
+        self.user = self.scope['user']
+        
+        # Vérifier que l'utilisateur est authentifié
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+        
+        # Vérifier l'accès à la conversation (seule requête de la connexion)
+        has_access = await self.check_conversation_access()
+        if not has_access:
+            await self.close()
+            return
+        
+        await self.channel_layer.group_add(
+            self.room_group_name,
+            self.channel_name
+        )
+        
+        await self.accept()
+        
+        # Reprise après reconnexion : renvoyer les messages manqués depuis last_message_id
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        last_message_id = query.get('last_message_id', [''])[0]
+        if last_message_id.isdigit():
+            missed, has_more = await self.get_missed_messages(int(last_message_id))
+            for message in missed:
+                await self.send(text_data=json.dumps({'type': 'message', 'message': message}))
+            # Fin de la reprise : au-delà de RESUME_LIMIT, le client lit la suite depuis next_cursor
+            await self.send(text_data=json.dumps({
+                'type': 'resume',
+                'has_more': has_more,
+                'next_cursor': missed[-1]['id'] if missed else int(last_message_id),
+            }))
+    
+    @database_sync_to_async
+    def check_conversation_access(self):
+        """Vérifier que l'utilisateur participe à la conversation"""
+        return Conversation.objects.filter(id=self.conversation_id, participants=self.user).exists()
+    
+    @database_sync_to_async
+    def get_missed_messages(self, last_message_id):
+        """(messages manqués sérialisés, RESUME_LIMIT messages au plus ; d'autres restent-ils ?)"""
+        messages = list(Message.objects.filter(
+            conversation_id=self.conversation_id,
+            id__gt=last_message_id
+        ).select_related('sender').order_by('id')[:RESUME_LIMIT + 1])
+        return [serialize_message(msg) for msg in messages[:RESUME_LIMIT]], len(messages) > RESUME_LIMIT
+    
+    async def disconnect(self, close_code):
+        if hasattr(self, 'room_group_name'):
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+    
+    async def chat_message(self, event):
+        """Pousser un message diffusé par chat.signals (aucune requête en base)"""
+        await self.send(text_data=json.dumps({
+            'type': 'message',
+            'message': event['message'],
+        }))
@@ -5,6 +5,8 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
+from mediafiles.models import VIDEO_STATUS_CHOICES
+
 
 class Conversation(models.Model):
     """Modèle pour les conversations privées"""
@@ -32,6 +34,7 @@ class Message(models.Model):
     content = models.TextField(blank=True)
     image = models.ImageField(upload_to='messages/', blank=True, null=True)
     video = models.FileField(upload_to='messages/videos/', blank=True, null=True, verbose_name="Vidéo")
+    video_status = models.CharField(max_length=20, choices=VIDEO_STATUS_CHOICES, default='', blank=True, verbose_name="Traitement de la vidéo")
     audio = models.FileField(upload_to='messages/audios/', blank=True, null=True, verbose_name="Audio")
     file = models.FileField(upload_to='messages/files/', blank=True, null=True)
     file_name = models.CharField(max_length=255, blank=True, null=True)
@@ -40,6 +43,10 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Dernier message et messages non lus d'une conversation (sidebar, polling)
+            models.Index(fields=['conversation', '-id'], name='chat_message_conv_idx'),
+        ]
         verbose_name = "Message"
         verbose_name_plural = "Messages"
     
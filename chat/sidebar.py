@@ -0,0 +1,152 @@
+"""
+Données de la sidebar du chat (conversations et groupes) pour Kongossa
+
+La sidebar est construite en un nombre constant de requêtes, quel que soit le
+nombre de conversations : le dernier message et le nombre de non lus (curseur
+de lecture GroupReadCursor pour les groupes) sont calculés par sous-requêtes,
+puis les participants et les derniers messages sont chargés en une requête
+chacun.
+
+Le résultat est mis en cache par utilisateur et invalidé par chat.signals et
+forum.signals à chaque nouveau message, lecture ou changement de participants.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Conversation, Message
+
+
+def _cache_key(user_id):
+    return f'chat:sidebar:{user_id}'
+
+
+def _count_subquery(queryset, field):
+    """Sous-requête COUNT(*) corrélée sur field (0 si aucune ligne)"""
+    counted = queryset.order_by().values(field).annotate(c=Count('id')).values('c')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _last_id_subquery(queryset):
+    return Subquery(queryset.order_by('-id').values('id')[:1])
+
+
+def _conversations_data(user):
+    """Conversations de l'utilisateur : 3 requêtes"""
+    conversations = list(Conversation.objects.filter(participants=user).annotate(
+        last_message_id=_last_id_subquery(Message.objects.filter(conversation=OuterRef('pk'))),
+        unread_count=_count_subquery(
+            Message.objects.filter(conversation=OuterRef('pk'), read_at__isnull=True).exclude(sender=user),
+            'conversation'
+        ),
+    ))
+
+    # Autre participant de chaque conversation
+    other_users = {}
+    participants = Conversation.participants.through.objects.filter(
+        conversation__in=conversations
+    ).exclude(user=user).select_related('user').order_by('id')
+    for participant in participants:
+        other_users.setdefault(participant.conversation_id, participant.user)
+
+    last_messages = Message.objects.select_related('sender').in_bulk(
+        [conv.last_message_id for conv in conversations if conv.last_message_id]
+    )
+
+    conversations_data = []
+    for conv in conversations:
+        other_user = other_users.get(conv.id)
+        conversations_data.append({
+            'conversation': conv,
+            'other_user': other_user,
+            'last_message': last_messages.get(conv.last_message_id),
+            'unread_count': conv.unread_count if other_user else 0,
+            'type': 'conversation',
+        })
+    return conversations_data
+
+
+def _groups_data(user):
+    """Groupes dont l'utilisateur est membre : 2 requêtes"""
+    from forum.models import Group, GroupMessage, GroupReadCursor
+
+    # Non lus : messages des autres au-delà du curseur de lecture (parcours de l'index (group, id))
+    last_read_id = Coalesce(Subquery(GroupReadCursor.objects.filter(
+        group=OuterRef(OuterRef('pk')), user=user
+    ).values('last_read_message_id')[:1]), Value(0))
+
+    groups = list(Group.objects.filter(members=user).annotate(
+        members_count=_count_subquery(Group.members.through.objects.filter(group=OuterRef('pk')), 'group'),
+        last_message_id=_last_id_subquery(GroupMessage.objects.filter(group=OuterRef('pk'))),
+        unread_count=_count_subquery(
+            GroupMessage.objects.filter(group=OuterRef('pk'), id__gt=last_read_id).exclude(sender=user),
+            'group'
+        ),
+    ))
+    last_messages = GroupMessage.objects.select_related('sender').in_bulk(
+        [group.last_message_id for group in groups if group.last_message_id]
+    )
+
+    return [{
+        'group': group,
+        'last_message': last_messages.get(group.last_message_id),
+        'unread_count': group.unread_count,
+        'type': 'group',
+    } for group in groups]
+
+
+def _last_activity(item):
+    """Date de dernière activité : dernier message, à défaut date de mise à jour"""
+    obj = item['conversation'] if item['type'] == 'conversation' else item['group']
+    if item['last_message']:
+        return max(obj.updated_at, item['last_message'].created_at)
+    return obj.updated_at
+
+
+def build_chat_sidebar(user):
+    """Construire la sidebar sans passer par le cache"""
+    conversations_data = _conversations_data(user)
+    try:
+        groups_data = _groups_data(user)
+    except ImportError:
+        groups_data = []
+
+    # Trier par date de dernière activité (plus récent en premier)
+    all_items = sorted(conversations_data + groups_data, key=_last_activity, reverse=True)
+    conversations_data.sort(key=_last_activity, reverse=True)
+    return {
+        'conversations': conversations_data,
+        'all_items': all_items,
+    }
+
+
+def get_chat_sidebar_data(user):
+    """Données de la sidebar (conversations et groupes), mises en cache par utilisateur"""
+    key = _cache_key(user.id)
+    data = cache.get(key)
+    if data is None:
+        data = build_chat_sidebar(user)
+        cache.set(key, data, getattr(settings, 'CHAT_SIDEBAR_CACHE_TTL', 300))
+    return data
+
+
+def invalidate_chat_sidebar(user_ids):
+    """Invalider la sidebar des utilisateurs concernés par un changement"""
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_conversation_sidebars(conversation_id):
+    """Invalider la sidebar des participants d'une conversation"""
+    invalidate_chat_sidebar(Conversation.participants.through.objects.filter(
+        conversation_id=conversation_id
+    ).values_list('user_id', flat=True))
+
+
+def invalidate_group_sidebars(group_id):
+    """Invalider la sidebar des membres d'un groupe"""
+    from forum.models import Group
+
+    invalidate_chat_sidebar(Group.members.through.objects.filter(
+        group_id=group_id
+    ).values_list('user_id', flat=True))
@@ -0,0 +1,52 @@
+"""
+Signaux du chat : diffusion temps réel des nouveaux messages, compteurs de non lus
+et invalidation de la sidebar
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from kongossa.realtime import broadcast
+from .models import Conversation, Message
+from .serializers import serialize_message
+from .sidebar import invalidate_chat_sidebar, invalidate_conversation_sidebars
+from .unread import incr_chat_unread
+
+
+@receiver(post_save, sender=Message)
+def broadcast_new_message(sender, instance, created, **kwargs):
+    """Pousser le message aux participants connectés (ChatConsumer)"""
+    if created:
+        broadcast(f'chat_{instance.conversation_id}', {
+            'type': 'chat_message',
+            'message': serialize_message(instance),
+        })
+
+
+@receiver(post_save, sender=Message)
+def count_unread_message(sender, instance, created, **kwargs):
+    """Incrémenter le compteur de non lus des destinataires (badge)"""
+    if created:
+        recipient_ids = list(Conversation.participants.through.objects.filter(
+            conversation_id=instance.conversation_id
+        ).exclude(user_id=instance.sender_id).values_list('user_id', flat=True))
+        incr_chat_unread(recipient_ids)
+
+
+@receiver(post_save, sender=Message)
+def invalidate_sidebar_on_message(sender, instance, **kwargs):
+    """Nouveau message ou message lu : dernier message et non lus à recalculer"""
+    conversation_id = instance.conversation_id
+    transaction.on_commit(lambda: invalidate_conversation_sidebars(conversation_id))
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def invalidate_sidebar_on_participants(sender, instance, action, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and pk_set:
+        user_ids = set(pk_set) if isinstance(instance, Conversation) else {instance.pk}
+        transaction.on_commit(lambda: invalidate_chat_sidebar(user_ids))
+
+
+@receiver(pre_delete, sender=Conversation)
+def invalidate_sidebar_on_conversation_delete(sender, instance, **kwargs):
+    user_ids = list(instance.participants.values_list('id', flat=True))
+    transaction.on_commit(lambda: invalidate_chat_sidebar(user_ids))
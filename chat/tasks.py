@@ -0,0 +1,17 @@
+"""
+Tâches de fond pour le chat Kongossa
+"""
+from django.utils import timezone
+from kongossa.counters import reconcile_counters
+from .models import Conversation
+from .unread import CHAT_UNREAD, real_unread_counts
+
+
+def touch_conversation(conversation_id):
+    """Mettre à jour la date de dernière activité d'une conversation (tri de la sidebar)"""
+    Conversation.objects.filter(id=conversation_id).update(updated_at=timezone.now())
+
+
+def reconcile_unread_counters():
+    """Recaler les compteurs de messages non lus sur la base (dérives, écritures perdues)"""
+    reconcile_counters(CHAT_UNREAD, real_unread_counts())
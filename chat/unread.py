@@ -0,0 +1,38 @@
+"""
+Compteur des messages non lus du chat (badge), servi par kongossa.counters
+"""
+from django.db.models import Count
+from kongossa.counters import get_counter, incr_counter
+from .models import Message
+
+CHAT_UNREAD = 'chat_unread'
+
+
+def unread_messages(user):
+    """Messages non lus reçus par l'utilisateur, toutes conversations confondues"""
+    return Message.objects.filter(
+        conversation__participants=user,
+        read_at__isnull=True
+    ).exclude(sender=user)
+
+
+def chat_unread_count(user):
+    """Nombre de messages non lus (sans requête tant que le compteur est en mémoire)"""
+    return get_counter(CHAT_UNREAD, user.id, lambda: unread_messages(user).count())
+
+
+def incr_chat_unread(user_ids, delta=1):
+    incr_counter(CHAT_UNREAD, user_ids, delta)
+
+
+def real_unread_counts():
+    """Nombre réel de messages non lus par utilisateur (réconciliation)"""
+    counts = {}
+    rows = Message.objects.filter(read_at__isnull=True).values(
+        'conversation__participants', 'sender_id'
+    ).annotate(n=Count('id')).order_by()
+    for row in rows:
+        user_id = row['conversation__participants']
+        if user_id is not None and user_id != row['sender_id']:
+            counts[user_id] = counts.get(user_id, 0) + row['n']
+    return counts
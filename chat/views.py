@@ -5,71 +5,22 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
 from django.utils import timezone
 from django.http import JsonResponse
 from .models import Conversation, Message
+from .serializers import serialize_message
+from .sidebar import get_chat_sidebar_data, invalidate_chat_sidebar
+from .unread import chat_unread_count, incr_chat_unread
+from jobs.queue import enqueue
+from mediafiles.uploads import uploaded_file
+from users.friendships import friend_users
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-
-def get_chat_sidebar_data(user):
-    """Helper function pour récupérer les données de la sidebar (conversations et groupes)"""
-    # Récupérer les conversations
-    conversations = Conversation.objects.filter(
-        participants=user
-    ).prefetch_related('participants', 'messages').order_by('-updated_at')
-    
-    # Ajouter le dernier message et l'autre participant pour chaque conversation
-    conversations_data = []
-    for conv in conversations:
-        other_user = conv.get_other_participant(user)
-        last_message = conv.messages.last()
-        conversations_data.append({
-            'conversation': conv,
-            'other_user': other_user,
-            'last_message': last_message,
-            'unread_count': conv.messages.filter(
-                sender__id=other_user.id if other_user else None,
-                read_at__isnull=True
-            ).count() if other_user else 0,
-            'type': 'conversation',
-        })
-    
-    # Récupérer les groupes où l'utilisateur est membre
-    try:
-        from forum.models import Group, GroupMessage
-        from django.db.models import Count
-        
-        groups = Group.objects.filter(members=user).annotate(
-            members_count=Count('members')
-        ).order_by('-updated_at')
-        
-        groups_data = []
-        for group in groups:
-            last_message = group.messages.last() if hasattr(group, 'messages') else None
-            groups_data.append({
-                'group': group,
-                'last_message': last_message,
-                'unread_count': 0,  # TODO: Implémenter le comptage des messages non lus pour les groupes
-                'type': 'group',
-            })
-        
-        # Combiner et trier par date de mise à jour
-        all_items = conversations_data + groups_data
-        # Trier par date de mise à jour (plus récent en premier)
-        all_items.sort(key=lambda x: (
-            x['conversation'].updated_at if x['type'] == 'conversation' and x.get('conversation') else 
-            x['group'].updated_at if x['type'] == 'group' and x.get('group') else timezone.now()
-        ), reverse=True)
-    except ImportError:
-        all_items = conversations_data
-    
-    return {
-        'conversations': conversations_data,
-        'all_items': all_items,
-    }
+# Fenêtre des endpoints de polling (nouveaux messages)
+NEW_MESSAGES_LIMIT = 100
+INITIAL_MESSAGES = 10
 
 
 @login_required
@@ -107,20 +58,25 @@ def chat_detail(request, conversation_id):
     )
     
     # Marquer les messages comme lus
-    unread_messages.update(read_at=timezone.now())
+    marked = unread_messages.update(read_at=timezone.now())
+    if marked:
+        invalidate_chat_sidebar([request.user.id])
+        incr_chat_unread(request.user.id, -marked)
     
     # Marquer les notifications correspondantes comme lues
     try:
         from notifications.models import Notification
+        from notifications.unread import incr_notifications_unread
         from django.urls import reverse
         related_url = reverse('chat:detail', kwargs={'conversation_id': conversation.id})
-        Notification.objects.filter(
+        marked = Notification.objects.filter(
             user=request.user,
             notification_type='message',
             related_user=other_user,
             related_url=related_url,
             is_read=False
         ).update(is_read=True)
+        incr_notifications_unread(request.user.id, -marked)
     except ImportError:
         pass
     
@@ -174,10 +130,10 @@ def send_message(request, conversation_id):
     )
     
     content = request.POST.get('content', '').strip()
-    image = request.FILES.get('image')
-    video = request.FILES.get('video')
-    audio = request.FILES.get('audio')
-    file = request.FILES.get('file')
+    image = uploaded_file(request, 'image')
+    video = uploaded_file(request, 'video')
+    audio = uploaded_file(request, 'audio')
+    file = uploaded_file(request, 'file')
     file_name = request.POST.get('file_name', '')
     
     if not content and not image and not video and not audio and not file:
@@ -219,25 +175,12 @@ def send_message(request, conversation_id):
         file_name=file_name
     )
     
-    # Mettre à jour la date de modification de la conversation
-    conversation.save()
+    # Mettre à jour la date de modification de la conversation (tâche de fond)
+    enqueue('chat.tasks.touch_conversation', conversation.id)
     
     return JsonResponse({
         'success': True,
-        'message': {
-            'id': message.id,
-            'content': message.content,
-            'sender': message.sender.username,
-            'sender_id': message.sender.id,
-            'sender_avatar': message.sender.avatar.url if message.sender.avatar else None,
-            'created_at': message.created_at.isoformat(),
-            'image': message.image.url if message.image else None,
-            'video': message.video.url if message.video else None,
-            'audio': message.audio.url if message.audio else None,
-            'file': message.file.url if message.file else None,
-            'file_name': message.file_name,
-            'read_at': message.read_at.isoformat() if message.read_at else None,
-        }
+        'message': serialize_message(message),
     })
 
 
@@ -257,6 +200,7 @@ def mark_message_read(request, message_id):
     if message.sender != request.user and not message.read_at:
         message.read_at = timezone.now()
         message.save()
+        incr_chat_unread(request.user.id, -1)
     
     return JsonResponse({'success': True})
 
@@ -280,24 +224,9 @@ def load_messages(request, conversation_id):
     if before_id:
         messages_query = messages_query.filter(id__lt=before_id)
     
-    messages = messages_query.order_by('-created_at')[:limit]
-    
-    messages_data = []
-    for msg in reversed(messages):  # Inverser pour avoir l'ordre chronologique
-        messages_data.append({
-            'id': msg.id,
-            'content': msg.content,
-            'sender': msg.sender.username,
-            'sender_id': msg.sender.id,
-            'sender_avatar': msg.sender.avatar.url if msg.sender.avatar else None,
-            'created_at': msg.created_at.isoformat(),
-            'image': msg.image.url if msg.image else None,
-            'video': msg.video.url if msg.video else None,
-            'audio': msg.audio.url if msg.audio else None,
-            'file': msg.file.url if msg.file else None,
-            'file_name': msg.file_name,
-            'read_at': msg.read_at.isoformat() if msg.read_at else None,
-        })
+    messages = list(messages_query.select_related('sender').order_by('-created_at')[:limit])
+    # Inverser pour avoir l'ordre chronologique
+    messages_data = [serialize_message(msg) for msg in reversed(messages)]
     
     return JsonResponse({
         'messages': messages_data,
@@ -314,86 +243,44 @@ def get_new_messages(request, conversation_id):
         participants=request.user
     )
     
-    last_message_id = request.GET.get('last_message_id')
+    last_message_id = request.GET.get('last_message_id', '')
+    messages_query = conversation.messages.select_related('sender')
     
-    if last_message_id:
-        try:
-            last_message_id = int(last_message_id)
-            messages_query = conversation.messages.filter(id__gt=last_message_id)
-        except ValueError:
-            messages_query = conversation.messages.all()
+    if last_message_id.isdigit():
+        # Fenêtre bornée : le client repart de next_cursor tant que has_more est vrai
+        last_message_id = int(last_message_id)
+        messages = list(messages_query.filter(id__gt=last_message_id).order_by('id')[:NEW_MESSAGES_LIMIT + 1])
+        has_more = len(messages) > NEW_MESSAGES_LIMIT
+        messages = messages[:NEW_MESSAGES_LIMIT]
     else:
-        # Si pas de last_message_id, retourner les 10 derniers messages
-        messages_query = conversation.messages.all()
-    
-    messages = messages_query.order_by('created_at')
-    
-    messages_data = []
-    for msg in messages:
-        messages_data.append({
-            'id': msg.id,
-            'content': msg.content,
-            'sender': msg.sender.username,
-            'sender_id': msg.sender.id,
-            'sender_avatar': msg.sender.avatar.url if msg.sender.avatar else None,
-            'created_at': msg.created_at.isoformat(),
-            'image': msg.image.url if msg.image else None,
-            'video': msg.video.url if msg.video else None,
-            'audio': msg.audio.url if msg.audio else None,
-            'file': msg.file.url if msg.file else None,
-            'file_name': msg.file_name,
-            'read_at': msg.read_at.isoformat() if msg.read_at else None,
-        })
+        # Si pas de last_message_id (ou invalide), retourner les 10 derniers messages
+        last_message_id = None
+        messages = list(messages_query.order_by('-id')[:INITIAL_MESSAGES])[::-1]
+        has_more = False
+    
+    messages_data = [serialize_message(msg) for msg in messages]
     
     return JsonResponse({
         'messages': messages_data,
-        'count': len(messages_data)
+        'count': len(messages_data),
+        'next_cursor': messages[-1].id if messages else last_message_id,
+        'has_more': has_more,
     })
 
 
 @login_required
 def get_unread_count(request):
-    """Récupérer le nombre total de messages non lus pour l'utilisateur"""
-    # Récupérer toutes les conversations de l'utilisateur
-    conversations = Conversation.objects.filter(participants=request.user)
-    
-    total_unread = 0
-    for conv in conversations:
-        other_user = conv.get_other_participant(request.user)
-        if other_user:
-            unread_count = conv.messages.filter(
-                sender=other_user,
-                read_at__isnull=True
-            ).count()
-            total_unread += unread_count
-    
+    """Récupérer le nombre total de messages non lus pour l'utilisateur (compteur en mémoire, sans requête)"""
     return JsonResponse({
-        'unread_count': total_unread
+        'unread_count': chat_unread_count(request.user)
     })
 
 
 @login_required
 def contacts_list(request):
     """Liste des contacts pour démarrer une conversation (uniquement les amis)"""
-    # Récupérer uniquement les amis de l'utilisateur
-    from users.models import Friendship
-    
-    # Récupérer toutes les amitiés où l'utilisateur est impliqué
-    friendships = Friendship.objects.filter(
-        Q(user1=request.user) | Q(user2=request.user),
-        status='accepted'
-    ).select_related('user1', 'user2')
-    
-    # Extraire les amis
-    friends = []
-    for friendship in friendships:
-        if friendship.user1 == request.user:
-            friends.append(friendship.user2)
-        else:
-            friends.append(friendship.user1)
-    
-    # Trier par username
-    friends = sorted(friends, key=lambda u: u.username)
+    # Amis de l'utilisateur (ensemble d'amis en cache), triés par username en base
+    friends = friend_users(request.user)
     
     # Récupérer les conversations existantes pour marquer les contacts
     existing_conversations = Conversation.objects.filter(
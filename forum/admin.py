@@ -4,16 +4,12 @@ from .models import Post, Like, Comment, Topic, Group, GroupRequest, GroupMessag
 
 @admin.register(Topic)
 class TopicAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'creator', 'is_active', 'post_count', 'subscribers_count', 'created_at']
+    list_display = ['name', 'slug', 'creator', 'is_active', 'posts_count', 'subscribers_count', 'created_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
     filter_horizontal = ['subscribers']
     
-    def post_count(self, obj):
-        return obj.posts.count()
-    post_count.short_description = 'Nombre de posts'
-    
     def subscribers_count(self, obj):
         return obj.subscribers.count()
     subscribers_count.short_description = 'Abonnés'
@@ -4,4 +4,6 @@ from django.apps import AppConfig
 class ForumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'forum'
-
+    
+    def ready(self):
+        import forum.signals  # noqa
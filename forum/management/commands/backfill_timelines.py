@@ -0,0 +1,33 @@
+"""
+Commande pour remplir les fils personnalisés (TimelineEntry) à partir des abonnements existants
+À exécuter une fois après la migration 0012 : seuls les posts publiés depuis sont recopiés à l'écriture
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from forum.timeline import backfill_user
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recopie dans chaque fil les derniers posts de l\'utilisateur, des auteurs suivis et des thèmes suivis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', help='Limiter à cet utilisateur (répétable)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Nombre d\'utilisateurs lus par requête')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True).order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        filled = 0
+        entries = 0
+        for user_id in users.values_list('id', flat=True).iterator(chunk_size=options['batch_size']):
+            entries += backfill_user(user_id)
+            filled += 1
+        limit = getattr(settings, 'TIMELINE_BACKFILL_POSTS', 50)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {filled} fil(s) rempli(s), {entries} entrée(s) proposée(s) ({limit} posts max. par source)'
+        ))
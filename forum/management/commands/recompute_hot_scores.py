@@ -0,0 +1,22 @@
+"""
+Commande pour recalculer les scores de tendance (forum.trending)
+Les scores sont tenus à jour par les signaux du forum : à lancer après un import en masse,
+une modification des poids ou pour corriger une dérive
+"""
+from django.core.management.base import BaseCommand
+from forum.trending import recompute_post_scores, recompute_velocity_scores
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les scores de tendance des posts, groupes et thèmes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Activité prise en compte pour les groupes et thèmes (jours)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Nombre de posts mis à jour par requête')
+
+    def handle(self, *args, **options):
+        posts = recompute_post_scores(options['batch_size'])
+        groups, topics = recompute_velocity_scores(options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {posts} post(s), {groups} groupe(s) et {topics} thème(s) actifs recalculés'
+        ))
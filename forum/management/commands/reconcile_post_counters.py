@@ -0,0 +1,72 @@
+"""
+Commande pour réconcilier les compteurs dénormalisés des posts (likes_count, comments_count, et hot_score)
+et des thèmes (posts_count)
+À exécuter périodiquement (cron) ou après une intervention manuelle en base
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from forum.models import Post, Like, Comment, Topic
+from forum.trending import post_hot_score
+
+
+class Command(BaseCommand):
+    help = 'Recalcule likes_count et comments_count des posts, posts_count des thèmes, quand ils ont dérivé'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Nombre de posts mis à jour par requête')
+        parser.add_argument('--dry-run', action='store_true', help='Afficher les écarts sans les corriger')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        likes = Like.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('id')).values('c')
+        comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('id')).values('c')
+
+        # Seuls les posts dont au moins un compteur diffère de la réalité sont chargés
+        drifted = Post.objects.annotate(
+            real_likes=Coalesce(Subquery(likes), 0),
+            real_comments=Coalesce(Subquery(comments), 0),
+        ).exclude(
+            likes_count=F('real_likes'),
+            comments_count=F('real_comments'),
+        ).only('id', 'created_at', 'likes_count', 'comments_count').order_by('id')
+
+        fixed = 0
+        batch = []
+        for post in drifted.iterator(chunk_size=batch_size):
+            if options['dry_run']:
+                self.stdout.write(
+                    f'Post {post.id}: likes {post.likes_count} -> {post.real_likes}, '
+                    f'commentaires {post.comments_count} -> {post.real_comments}'
+                )
+            post.likes_count = post.real_likes
+            post.comments_count = post.real_comments
+            post.hot_score = post_hot_score(post.created_at, post.likes_count, post.comments_count)
+            batch.append(post)
+            fixed += 1
+            if len(batch) >= batch_size:
+                self._flush(batch, options['dry_run'])
+                batch = []
+        self._flush(batch, options['dry_run'])
+
+        verb = 'à corriger' if options['dry_run'] else 'corrigé(s)'
+        self.stdout.write(self.style.SUCCESS(f'✅ {fixed} post(s) {verb}'))
+
+        # Thèmes : quelques centaines de lignes, corrigées en une requête
+        posts = Post.objects.filter(topic=OuterRef('pk')).order_by().values('topic').annotate(c=Count('id')).values('c')
+        drifted_topics = Topic.objects.annotate(real_posts=Coalesce(Subquery(posts), 0)).exclude(
+            posts_count=F('real_posts')
+        )
+        if options['dry_run']:
+            for topic in drifted_topics:
+                self.stdout.write(f'Thème {topic.slug}: posts {topic.posts_count} -> {topic.real_posts}')
+            fixed_topics = len(drifted_topics)
+        else:
+            fixed_topics = Topic.objects.filter(id__in=drifted_topics.values('id')).update(
+                posts_count=Coalesce(Subquery(posts), 0)
+            )
+        self.stdout.write(self.style.SUCCESS(f'✅ {fixed_topics} thème(s) {verb}'))
+
+    def _flush(self, batch, dry_run):
+        if batch and not dry_run:
+            Post.objects.bulk_update(batch, ['likes_count', 'comments_count', 'hot_score'])
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0009_group_subscribers_requires_approval'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['topic', '-created_at', '-id'], name='forum_post_feed_idx'),
+        ),
+    ]
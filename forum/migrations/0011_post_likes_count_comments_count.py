@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_post_counters(apps, schema_editor):
+    """Initialiser les compteurs à partir des likes et commentaires existants"""
+    Post = apps.get_model('forum', 'Post')
+    Like = apps.get_model('forum', 'Like')
+    Comment = apps.get_model('forum', 'Comment')
+    likes = Like.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('id')).values('c')
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('id')).values('c')
+    Post.objects.update(
+        likes_count=Coalesce(Subquery(likes), 0),
+        comments_count=Coalesce(Subquery(comments), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0010_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de commentaires'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de likes'),
+        ),
+        migrations.RunPython(backfill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0012_timelineentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='groupmessage',
+            index=models.Index(fields=['group', '-id'], name='forum_groupmsg_group_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_cursors_for_members(apps, schema_editor):
+    """Considérer l'historique existant comme lu : un curseur par membre, au dernier message du groupe"""
+    Group = apps.get_model('forum', 'Group')
+    GroupReadCursor = apps.get_model('forum', 'GroupReadCursor')
+    last_ids = dict(Group.objects.annotate(last_id=Max('messages__id')).values_list('id', 'last_id'))
+    GroupReadCursor.objects.bulk_create([
+        GroupReadCursor(user_id=membership.user_id, group_id=membership.group_id,
+                        last_read_message_id=last_ids.get(membership.group_id) or 0)
+        for membership in Group.members.through.objects.all()
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0013_groupmessage_sidebar_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_cursors', to='forum.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_read_cursors', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Curseur de lecture',
+                'verbose_name_plural': 'Curseurs de lecture',
+                'unique_together': {('user', 'group')},
+            },
+        ),
+        migrations.RunPython(create_cursors_for_members, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:24
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Formule de forum.trending.post_hot_score à la création de cette migration (figée ici :
+# une migration ne doit pas dépendre du code de l'application)
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+POST_GRAVITY = 45000
+COMMENT_WEIGHT = 2
+
+
+def backfill_post_scores(apps, schema_editor):
+    """Score initial des posts existants (les groupes et thèmes : recompute_hot_scores)"""
+    Post = apps.get_model('forum', 'Post')
+    batch = []
+    for post in Post.objects.only('id', 'created_at', 'likes_count', 'comments_count').iterator(chunk_size=1000):
+        engagement = max(post.likes_count + COMMENT_WEIGHT * post.comments_count, 1)
+        post.hot_score = math.log10(engagement) + (post.created_at - EPOCH).total_seconds() / POST_GRAVITY
+        batch.append(post)
+        if len(batch) >= 1000:
+            Post.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    Post.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0014_groupreadcursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='hot_score',
+            field=models.FloatField(default=0, verbose_name='Score de tendance'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, verbose_name='Score de tendance'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='hot_score',
+            field=models.FloatField(default=0, verbose_name='Score de tendance'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-hot_score'], name='forum_group_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['topic', '-hot_score', '-id'], name='forum_post_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['-hot_score'], name='forum_topic_hot_idx'),
+        ),
+        migrations.RunPython(backfill_post_scores, migrations.RunPython.noop),
+    ]
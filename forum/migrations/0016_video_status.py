@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0015_hot_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupmessage',
+            name='video_status',
+            field=models.CharField(blank=True, choices=[('', 'Aucune vidéo'), ('pending', 'En attente'), ('processing', 'En cours'), ('ready', 'Prête'), ('original', 'Originale'), ('failed', 'Échec')], default='', max_length=20, verbose_name='Traitement de la vidéo'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='video_status',
+            field=models.CharField(blank=True, choices=[('', 'Aucune vidéo'), ('pending', 'En attente'), ('processing', 'En cours'), ('ready', 'Prête'), ('original', 'Originale'), ('failed', 'Échec')], default='', max_length=20, verbose_name='Traitement de la vidéo'),
+        ),
+    ]
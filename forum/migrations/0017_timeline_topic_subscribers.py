@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models import Exists, F, OuterRef
+
+
+def purge_unsubscribed_topic_entries(apps, schema_editor):
+    """Retirer des fils les posts de thème recopiés aux abonnés de l'auteur non abonnés au thème"""
+    TimelineEntry = apps.get_model('forum', 'TimelineEntry')
+    Subscription = apps.get_model('forum', 'Topic').subscribers.through
+    subscribed = Subscription.objects.filter(topic_id=OuterRef('post__topic_id'), user_id=OuterRef('user_id'))
+    TimelineEntry.objects.filter(post__topic__isnull=False).exclude(
+        user_id=F('post__author_id')
+    ).filter(~Exists(subscribed)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0016_video_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(purge_unsubscribed_topic_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Options Meta de Group (tri, libellés) déjà déclarées par le modèle mais jamais enregistrées
+    dans une migration ; sans effet sur la base"""
+
+    dependencies = [
+        ('forum', '0017_timeline_topic_subscribers'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='group',
+            options={'ordering': ['-updated_at'], 'verbose_name': 'Groupe de discussion', 'verbose_name_plural': 'Groupes de discussion'},
+        ),
+    ]
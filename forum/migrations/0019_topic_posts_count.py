@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:58
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_topic_posts_count(apps, schema_editor):
+    """Initialiser le compteur à partir des posts existants"""
+    Topic = apps.get_model('forum', 'Topic')
+    Post = apps.get_model('forum', 'Post')
+    posts = Post.objects.filter(topic=OuterRef('pk')).order_by().values('topic').annotate(c=Count('id')).values('c')
+    Topic.objects.update(posts_count=Coalesce(Subquery(posts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0018_alter_group_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de posts'),
+        ),
+        migrations.RunPython(backfill_topic_posts_count, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,9 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.urls import reverse
+from mediafiles.models import VIDEO_STATUS_CHOICES
+
+from .trending import post_hot_score
 
 User = get_user_model()
 
@@ -21,11 +24,18 @@ class Topic(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True, verbose_name="Actif")
+    # Compteur dénormalisé (maintenu par forum.signals, réconcilié par reconcile_post_counters)
+    posts_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de posts")
+    # Score de tendance (forum.trending), mis à jour à chaque post, message ou abonnement
+    hot_score = models.FloatField(default=0, verbose_name="Score de tendance")
     
     class Meta:
         ordering = ['name']
         verbose_name = "Thème"
         verbose_name_plural = "Thèmes"
+        indexes = [
+            models.Index(fields=['-hot_score'], name='forum_topic_hot_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -35,7 +45,7 @@ class Topic(models.Model):
     
     @property
     def post_count(self):
-        return self.posts.count()
+        return self.posts_count
     
     def is_subscribed(self, user):
         """Vérifier si un utilisateur est abonné au topic"""
@@ -51,7 +61,13 @@ class Post(models.Model):
     content = models.TextField()
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
     video = models.FileField(upload_to='posts/videos/', blank=True, null=True, verbose_name="Vidéo")
+    video_status = models.CharField(max_length=20, choices=VIDEO_STATUS_CHOICES, default='', blank=True, verbose_name="Traitement de la vidéo")
     audio = models.FileField(upload_to='posts/audios/', blank=True, null=True, verbose_name="Audio")
+    # Compteurs dénormalisés (maintenus par forum.signals, réconciliés par reconcile_post_counters)
+    likes_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de likes")
+    comments_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de commentaires")
+    # Score de tendance (forum.trending), mis à jour avec les compteurs
+    hot_score = models.FloatField(default=0, verbose_name="Score de tendance")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -59,17 +75,47 @@ class Post(models.Model):
         ordering = ['-created_at']
         verbose_name = "Post"
         verbose_name_plural = "Posts"
+        indexes = [
+            # Pagination par curseur des fils (broadcast = topic NULL, ou par thème)
+            models.Index(fields=['topic', '-created_at', '-id'], name='forum_post_feed_idx'),
+            # Fils triés par tendance (?sort=hot)
+            models.Index(fields=['topic', '-hot_score', '-id'], name='forum_post_hot_idx'),
+        ]
     
     def __str__(self):
         return f"Post by {self.author.username} - {self.created_at}"
     
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.hot_score:
+            self.hot_score = post_hot_score(timezone.now(), self.likes_count, self.comments_count)
+        super().save(*args, **kwargs)
+    
     @property
     def like_count(self):
-        return self.likes.count()
+        return self.likes_count
     
     @property
     def comment_count(self):
-        return self.comments.count()
+        return self.comments_count
+
+
+class TimelineEntry(models.Model):
+    """Entrée du fil personnalisé d'un utilisateur (fan-out à l'écriture, voir forum.timeline)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copie de post.created_at pour parcourir le fil d'un utilisateur sans jointure
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['user', 'post']
+        verbose_name = "Entrée de fil"
+        verbose_name_plural = "Entrées de fil"
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='forum_timeline_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Post {self.post_id} in timeline of {self.user_id}"
 
 
 class Like(models.Model):
@@ -115,6 +161,8 @@ class Group(models.Model):
     image = models.ImageField(upload_to='groups/', blank=True, null=True, verbose_name="Image")
     is_public = models.BooleanField(default=True, verbose_name="Public")
     requires_approval = models.BooleanField(default=False, verbose_name="Nécessite une approbation")
+    # Score de tendance (forum.trending), mis à jour à chaque message ou nouveau membre/abonné
+    hot_score = models.FloatField(default=0, verbose_name="Score de tendance")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -122,6 +170,9 @@ class Group(models.Model):
         ordering = ['-updated_at']
         verbose_name = "Groupe de discussion"
         verbose_name_plural = "Groupes de discussion"
+        indexes = [
+            models.Index(fields=['-hot_score'], name='forum_group_hot_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.topic.name})"
@@ -192,6 +243,7 @@ class GroupMessage(models.Model):
     content = models.TextField(blank=True)
     image = models.ImageField(upload_to='group_messages/', blank=True, null=True)
     video = models.FileField(upload_to='group_messages/videos/', blank=True, null=True, verbose_name="Vidéo")
+    video_status = models.CharField(max_length=20, choices=VIDEO_STATUS_CHOICES, default='', blank=True, verbose_name="Traitement de la vidéo")
     audio = models.FileField(upload_to='group_messages/audios/', blank=True, null=True, verbose_name="Audio")
     file = models.FileField(upload_to='group_messages/files/', blank=True, null=True)
     file_name = models.CharField(max_length=255, blank=True, null=True)
@@ -199,8 +251,42 @@ class GroupMessage(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Dernier message d'un groupe (sidebar, polling)
+            models.Index(fields=['group', '-id'], name='forum_groupmsg_group_idx'),
+        ]
         verbose_name = "Message de groupe"
         verbose_name_plural = "Messages de groupe"
     
     def __str__(self):
-        return f"Message from {self.sender.username} in {self.group.name}"
\ No newline at end of file
+        return f"Message from {self.sender.username} in {self.group.name}"
+
+
+class GroupReadCursor(models.Model):
+    """Position de lecture d'un membre dans un groupe : les messages d'id supérieur sont non lus"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_read_cursors')
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='read_cursors')
+    last_read_message_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'group']
+        verbose_name = "Curseur de lecture"
+        verbose_name_plural = "Curseurs de lecture"
+    
+    def __str__(self):
+        return f"{self.user_id} read {self.group_id} up to {self.last_read_message_id}"
+    
+    @classmethod
+    def advance(cls, user, group_id, message_id):
+        """Avancer le curseur jusqu'à message_id (jamais en arrière) ; retourne True s'il a bougé"""
+        if not message_id:
+            return False
+        if cls.objects.filter(
+            user=user, group_id=group_id, last_read_message_id__lt=message_id
+        ).update(last_read_message_id=message_id, updated_at=timezone.now()):
+            return True
+        _, created = cls.objects.get_or_create(
+            user=user, group_id=group_id, defaults={'last_read_message_id': message_id}
+        )
+        return created
@@ -0,0 +1,102 @@
+"""
+Pagination par curseur (keyset) pour les fils d'actualité Kongossa
+
+Contrairement au Paginator Django (COUNT(*) + OFFSET), la position est
+encodée dans un curseur opaque basé sur (created_at, id) : chaque page
+est une simple recherche d'index, quelle que soit la profondeur du scroll.
+Les fils triés par tendance (?sort=hot) utilisent le même principe sur
+(hot_score, id), voir paginate_by_score.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class CursorPage:
+    """Page de résultats paginée par curseur"""
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(obj):
+    """Encoder la position (created_at, id) d'un objet en curseur opaque"""
+    raw = f'{obj.created_at.isoformat()}|{obj.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Décoder un curseur opaque, retourne (created_at, id) ou None si invalide"""
+    if not cursor:
+        return None
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def paginate_by_cursor(queryset, cursor=None, per_page=10):
+    """Retourner la page qui suit le curseur, triée par (created_at, id) décroissants"""
+    queryset = queryset.order_by('-created_at', '-id')
+
+    position = decode_cursor(cursor)
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    # Charger un élément de plus pour savoir s'il reste une page suivante
+    items = list(queryset[:per_page + 1])
+    next_cursor = encode_cursor(items[per_page - 1]) if len(items) > per_page else None
+    return CursorPage(items[:per_page], next_cursor)
+
+
+def encode_score_cursor(obj, field):
+    """Encoder la position (score, id) d'un objet ; repr() garantit un aller-retour exact du flottant"""
+    raw = f'{getattr(obj, field)!r}|{obj.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_score_cursor(cursor):
+    """Décoder un curseur de score, retourne (score, id) ou None si invalide"""
+    if not cursor:
+        return None
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        score, pk = raw.rsplit('|', 1)
+        return float(score), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def paginate_by_score(queryset, cursor=None, per_page=10, field='hot_score'):
+    """Retourner la page qui suit le curseur, triée par (field, id) décroissants"""
+    queryset = queryset.order_by(f'-{field}', '-id')
+
+    position = decode_score_cursor(cursor)
+    if position:
+        score, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': score}) | Q(**{field: score, 'id__lt': pk})
+        )
+
+    items = list(queryset[:per_page + 1])
+    next_cursor = encode_score_cursor(items[per_page - 1], field) if len(items) > per_page else None
+    return CursorPage(items[:per_page], next_cursor)
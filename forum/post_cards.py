@@ -0,0 +1,142 @@
+"""
+Cache des cartes de post rendues (fil, thèmes, groupes, infinite scroll)
+
+Chaque carte est rendue une fois pour tous les visiteurs puis servie depuis deux
+niveaux de cache :
+- un LRU local au processus (POST_CARD_LOCAL_CACHE_SIZE cartes), sans réseau ;
+- le cache Django partagé (POST_CARD_CACHE_TTL), lu en un seul get_many par page.
+
+La clé contient tout ce qui peut changer le rendu : identifiant et updated_at du
+post, compteurs de likes et de commentaires (mis à jour par UPDATE atomique, sans
+toucher updated_at : ils servent de version des compteurs), updated_at de
+l'auteur (avatar, nom) et CARD_VERSION, à incrémenter quand post_card.html
+change. Une carte obsolète n'est donc jamais relue : elle sort du LRU ou expire.
+Les commentaires avancent Post.updated_at (forum.signals) ; seul un changement
+d'avatar d'un commentateur attend l'expiration de la carte.
+
+Le HTML en cache ne contient rien de propre au visiteur ni à l'instant :
+- l'état « aimé » est un marqueur remplacé par visiteur (overlay_card) ;
+- les dates relatives (timesince) sont des marqueurs calculés à la sortie.
+
+    {% load post_cards %}
+    {% post_cards page_obj liked_posts as cards %}
+    {% for post, card in cards %}<div data-post-id="{{ post.id }}">{{ card }}</div>{% endfor %}
+"""
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.timesince import timesince
+
+CARD_VERSION = 3
+CARD_TEMPLATE = 'forum/post_card.html'
+
+# Marqueurs en zone d'usage privé Unicode : absents du contenu saisi et inchangés par l'échappement HTML
+LIKED_MARKER = '\ue000liked\ue001'
+TIMESINCE_MARKER = '\ue000ts:{}\ue001'
+TIMESINCE_PATTERN = re.compile('\ue000ts:(-?\\d+)\ue001')
+
+
+def _ttl():
+    return getattr(settings, 'POST_CARD_CACHE_TTL', 600)
+
+
+class LocalLRU:
+    """Cache LRU borné, local au processus et sûr entre threads"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._items:
+                    self._items.move_to_end(key)
+                    found[key] = self._items[key]
+        return found
+
+    def set_many(self, items):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._items[key] = value
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+local_cache = LocalLRU(getattr(settings, 'POST_CARD_LOCAL_CACHE_SIZE', 500))
+
+
+def _timestamp(value):
+    # À la microseconde : deux modifications dans la même seconde donnent deux clés
+    return int(value.timestamp() * 1000000) if value else 0
+
+
+def card_key(post):
+    """Clé de la carte : change dès que le post, ses compteurs, son auteur ou le traitement de sa vidéo changent"""
+    return 'forum:card:{}:{}:{}:{}:{}:{}:{}'.format(
+        CARD_VERSION, post.id, _timestamp(post.updated_at),
+        post.likes_count, post.comments_count, _timestamp(post.author.updated_at), post.video_status,
+    )
+
+
+def render_card(post):
+    """HTML de la carte, commun à tous les visiteurs (avec marqueurs)"""
+    return render_to_string(CARD_TEMPLATE, {'post': post, 'liked_fill': LIKED_MARKER})
+
+
+def _expand_timesince(match):
+    moment = datetime.fromtimestamp(int(match.group(1)), tz=dt_timezone.utc)
+    return timesince(moment)
+
+
+def overlay_card(html, liked):
+    """Appliquer l'état du visiteur et l'heure courante à une carte en cache"""
+    html = html.replace(LIKED_MARKER, 'currentColor' if liked else 'none')
+    return mark_safe(TIMESINCE_PATTERN.sub(_expand_timesince, html))
+
+
+def cached_cards(posts):
+    """{post.id: HTML commun} ; seules les cartes absentes des deux niveaux sont rendues"""
+    posts = list(posts)
+    keys = {post.id: card_key(post) for post in posts}
+    found = local_cache.get_many(keys.values())
+
+    missing_keys = [key for key in keys.values() if key not in found]
+    if missing_keys:
+        shared = cache.get_many(missing_keys)
+        local_cache.set_many(shared)
+        found.update(shared)
+
+    missing = [post for post in posts if keys[post.id] not in found]
+    if missing:
+        # Commentaires chargés uniquement pour les cartes à rendre
+        prefetch_related_objects(missing, 'comments__author')
+        rendered = {keys[post.id]: render_card(post) for post in missing}
+        cache.set_many(rendered, _ttl())
+        local_cache.set_many(rendered)
+        found.update(rendered)
+
+    return {post_id: found[key] for post_id, key in keys.items()}
+
+
+def render_post_cards(posts, liked_posts=()):
+    """[(post, HTML de la carte pour le visiteur)] dans l'ordre de posts"""
+    posts = list(posts)
+    cards = cached_cards(posts)
+    return [(post, overlay_card(cards[post.id], post.id in liked_posts)) for post in posts]
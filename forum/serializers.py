@@ -0,0 +1,25 @@
+"""
+Sérialisation JSON des messages de groupe (réponses AJAX et WebSocket)
+"""
+from mediafiles.images import image_url
+from mediafiles.videos import poster_url, video_url
+
+
+def serialize_group_message(msg):
+    """Représentation JSON d'un GroupMessage (charger sender avec select_related pour éviter le N+1)"""
+    return {
+        'id': msg.id,
+        'content': msg.content,
+        'sender': msg.sender.username,
+        'sender_id': msg.sender.id,
+        'sender_avatar': image_url(msg.sender.avatar, 'avatar', 128) or None,
+        'created_at': msg.created_at.isoformat(),
+        'image': image_url(msg.image, 'feed') or None,
+        'image_original': msg.image.url if msg.image else None,
+        'video': video_url(msg.video, msg.video_status) or None,
+        'video_original': msg.video.url if msg.video else None,
+        'video_poster': poster_url(msg.video, msg.video_status) or None,
+        'audio': msg.audio.url if msg.audio else None,
+        'file': msg.file.url if msg.file else None,
+        'file_name': msg.file_name,
+    }
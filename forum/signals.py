@@ -0,0 +1,209 @@
+"""
+Signaux du forum : compteurs dénormalisés et scores de tendance, diffusion temps réel des messages
+de groupe, invalidation de la sidebar du chat et suivi des abonnements par le fil personnalisé
+"""
+from django.db import transaction
+from django.db.models import F, Max
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from chat.sidebar import invalidate_chat_sidebar, invalidate_group_sidebars
+from kongossa.realtime import broadcast
+from users.models import Follow
+from .models import Post, Like, Comment, Group, GroupMessage, GroupReadCursor, Topic
+from .trending import (
+    MESSAGE_WEIGHT, POST_WEIGHT, SUBSCRIBER_WEIGHT, TOPIC_MESSAGE_WEIGHT, bump_velocity, post_counter_update,
+)
+from .serializers import serialize_group_message
+from .timeline import backfill_authors, backfill_topics, purge_authors, purge_topics
+
+
+def _bump_post_counter(post_id, field, delta, **extra):
+    """Incrémenter/décrémenter un compteur de post et son score de tendance de façon atomique (sans lecture préalable)"""
+    Post.objects.filter(id=post_id).update(**post_counter_update(field, delta), **extra)
+
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        _bump_post_counter(instance.post_id, 'likes_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance, **kwargs):
+    _bump_post_counter(instance.post_id, 'likes_count', -1)
+
+
+# Les commentaires font partie de la carte en cache (forum.post_cards) : toute modification
+# avance Post.updated_at, sans quoi un ajout suivi d'une suppression laisserait la même clé
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        _bump_post_counter(instance.post_id, 'comments_count', 1, updated_at=timezone.now())
+    else:
+        Post.objects.filter(id=instance.post_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    _bump_post_counter(instance.post_id, 'comments_count', -1, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=GroupMessage)
+def broadcast_new_group_message(sender, instance, created, **kwargs):
+    """Pousser le message aux membres connectés (GroupChatConsumer)"""
+    if created:
+        broadcast(f'group_chat_{instance.group_id}', {
+            'type': 'group_message',
+            'message': serialize_group_message(instance),
+        })
+
+
+@receiver(post_save, sender=GroupMessage)
+@receiver(post_save, sender=Group)
+def invalidate_sidebar_on_group_change(sender, instance, **kwargs):
+    """Nouveau message ou groupe modifié : sidebar des membres à recalculer"""
+    group_id = instance.group_id if sender is GroupMessage else instance.pk
+    transaction.on_commit(lambda: invalidate_group_sidebars(group_id))
+
+
+@receiver(m2m_changed, sender=Group.members.through)
+def invalidate_sidebar_on_members(sender, instance, action, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and pk_set:
+        user_ids = set(pk_set) if isinstance(instance, Group) else {instance.pk}
+        transaction.on_commit(lambda: invalidate_chat_sidebar(user_ids))
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_sidebar_on_group_delete(sender, instance, **kwargs):
+    user_ids = list(instance.members.values_list('id', flat=True))
+    transaction.on_commit(lambda: invalidate_chat_sidebar(user_ids))
+
+
+@receiver(m2m_changed, sender=Group.members.through)
+def sync_read_cursors_on_members(sender, instance, action, pk_set, **kwargs):
+    """Un nouveau membre commence sa lecture au dernier message (l'historique ne compte pas comme non lu)"""
+    if action == 'pre_clear':
+        # clear() ne fournit pas pk_set : les membres retirés sont relevés avant la suppression
+        if isinstance(instance, Group):
+            user_ids = sender.objects.filter(group_id=instance.pk).values_list('user_id', flat=True)
+            GroupReadCursor.objects.filter(group_id=instance.pk, user_id__in=list(user_ids)).delete()
+        else:
+            group_ids = sender.objects.filter(user_id=instance.pk).values_list('group_id', flat=True)
+            GroupReadCursor.objects.filter(user_id=instance.pk, group_id__in=list(group_ids)).delete()
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    
+    if action == 'post_remove':
+        if isinstance(instance, Group):
+            GroupReadCursor.objects.filter(group_id=instance.pk, user_id__in=pk_set).delete()
+        else:
+            GroupReadCursor.objects.filter(user_id=instance.pk, group_id__in=pk_set).delete()
+        return
+    
+    if isinstance(instance, Group):
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+    else:
+        pairs = [(group_id, instance.pk) for group_id in pk_set]
+    
+    last_ids = dict(GroupMessage.objects.filter(
+        group_id__in={group_id for group_id, _ in pairs}
+    ).values('group').annotate(last_id=Max('id')).values_list('group', 'last_id').order_by())
+    GroupReadCursor.objects.bulk_create([
+        GroupReadCursor(group_id=group_id, user_id=user_id, last_read_message_id=last_ids.get(group_id, 0))
+        for group_id, user_id in pairs
+    ], ignore_conflicts=True)
+
+
+@receiver(post_save, sender=GroupMessage)
+def bump_group_velocity(sender, instance, created, **kwargs):
+    """Message de groupe : tendance du groupe et de son thème"""
+    if created:
+        bump_velocity(Group.objects.filter(id=instance.group_id), MESSAGE_WEIGHT)
+        bump_velocity(Topic.objects.filter(groups=instance.group_id), TOPIC_MESSAGE_WEIGHT)
+
+
+def _bump_topic_posts_count(topic_id, delta):
+    if topic_id:
+        topics = Topic.objects.filter(id=topic_id)
+        if delta < 0:
+            topics = topics.filter(posts_count__gt=0)
+        topics.update(posts_count=F('posts_count') + delta)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_topic(sender, instance, **kwargs):
+    """Thème avant modification : un post déplacé change le compteur des deux thèmes"""
+    if instance.pk and not instance._state.adding:
+        instance._previous_topic_id = Post.objects.filter(pk=instance.pk).values_list('topic_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def bump_topic_velocity(sender, instance, created, **kwargs):
+    if created and instance.topic_id:
+        bump_velocity(Topic.objects.filter(id=instance.topic_id), POST_WEIGHT)
+        _bump_topic_posts_count(instance.topic_id, 1)
+
+
+@receiver(post_save, sender=Post)
+def move_topic_posts_count(sender, instance, created, **kwargs):
+    if created or '_previous_topic_id' not in instance.__dict__:
+        return
+    previous_topic_id = instance.__dict__.pop('_previous_topic_id')
+    if previous_topic_id != instance.topic_id:
+        _bump_topic_posts_count(previous_topic_id, -1)
+        _bump_topic_posts_count(instance.topic_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_topic_posts_count(sender, instance, **kwargs):
+    _bump_topic_posts_count(instance.topic_id, -1)
+
+
+@receiver(m2m_changed, sender=Group.members.through)
+@receiver(m2m_changed, sender=Group.subscribers.through)
+@receiver(m2m_changed, sender=Topic.subscribers.through)
+def bump_subscriber_velocity(sender, instance, action, pk_set, reverse, model, **kwargs):
+    """Nouveaux membres ou abonnés : croissance du groupe ou du thème"""
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        # user.forum_groups.add(...) : instance est l'utilisateur, pk_set les groupes/thèmes
+        bump_velocity(model.objects.filter(id__in=pk_set), SUBSCRIBER_WEIGHT)
+    else:
+        bump_velocity(type(instance).objects.filter(id=instance.pk), SUBSCRIBER_WEIGHT * len(pk_set))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    """Nouvel abonnement : les derniers posts de l'auteur apparaissent dans le fil"""
+    if created:
+        backfill_authors([instance.follower_id], [instance.following_id])
+
+
+@receiver(post_delete, sender=Follow)
+def purge_timeline_on_unfollow(sender, instance, **kwargs):
+    purge_authors([instance.follower_id], [instance.following_id])
+
+
+@receiver(m2m_changed, sender=Topic.subscribers.through)
+def sync_timeline_on_topic_subscribers(sender, instance, action, pk_set, reverse, **kwargs):
+    """Abonnement à un thème : ses derniers posts recopiés ; désabonnement : ses posts retirés du fil"""
+    if action == 'pre_clear':
+        # clear() ne fournit pas pk_set : les abonnements retirés sont relevés avant la suppression
+        if reverse:
+            topic_ids = list(sender.objects.filter(user_id=instance.pk).values_list('topic_id', flat=True))
+            purge_topics([instance.pk], topic_ids)
+        else:
+            user_ids = list(sender.objects.filter(topic_id=instance.pk).values_list('user_id', flat=True))
+            purge_topics(user_ids, [instance.pk])
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    # Une des deux listes n'a qu'un élément : le produit des deux correspond aux abonnements modifiés
+    user_ids, topic_ids = ([instance.pk], list(pk_set)) if reverse else (list(pk_set), [instance.pk])
+    if action == 'post_add':
+        backfill_topics(user_ids, topic_ids)
+    else:
+        purge_topics(user_ids, topic_ids)
@@ -0,0 +1,18 @@
+"""
+Tâches de fond pour le forum Kongossa
+"""
+from django.utils import timezone
+from .models import Post, Group
+from .timeline import fanout_post
+
+
+def fanout_post_to_timelines(post_id):
+    """Recopier un post dans les fils personnalisés de ses destinataires"""
+    post = Post.objects.filter(id=post_id).first()
+    if post:
+        fanout_post(post)
+
+
+def touch_group(group_id):
+    """Mettre à jour la date de dernière activité d'un groupe (tri de la sidebar)"""
+    Group.objects.filter(id=group_id).update(updated_at=timezone.now())
@@ -0,0 +1,19 @@
+from django import template
+
+from forum.post_cards import TIMESINCE_MARKER, render_post_cards
+
+register = template.Library()
+
+
+@register.filter
+def deferred_timesince(value):
+    """Date relative calculée à l'affichage de la carte, pas à sa mise en cache"""
+    if not value:
+        return ''
+    return TIMESINCE_MARKER.format(int(value.timestamp()))
+
+
+@register.simple_tag
+def post_cards(posts, liked_posts=None):
+    """[(post, HTML)] des cartes de la page, depuis le cache (voir forum.post_cards)"""
+    return render_post_cards(posts, liked_posts or ())
@@ -0,0 +1,190 @@
+"""
+Fil personnalisé (abonnements) pour Kongossa
+
+À la création d'un post, une entrée TimelineEntry est recopiée dans le fil de
+chaque abonné de l'auteur et de chaque abonné du thème (fan-out à l'écriture) :
+la lecture du fil d'un utilisateur est alors un simple parcours d'index.
+
+Un post publié dans un thème n'est montré qu'aux abonnés du thème (comme
+topic_detail) : les abonnés de l'auteur ne reçoivent que ses posts hors thème.
+
+Pour les auteurs et thèmes très suivis (plus de TIMELINE_FANOUT_MAX_FOLLOWERS
+abonnés), la recopie est évitée et leurs posts sont fusionnés à la lecture.
+
+Le fil suit les abonnements (forum.signals) : suivre un auteur ou s'abonner à un
+thème y recopie ses TIMELINE_BACKFILL_POSTS derniers posts, s'en désabonner les
+retire. `python manage.py backfill_timelines` remplit les fils des abonnements
+antérieurs au fan-out.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+
+from users.models import Follow
+from .models import Post, Topic, TimelineEntry
+from .pagination import CursorPage, decode_cursor, encode_cursor
+
+FANOUT_BATCH_SIZE = 1000
+POPULAR_CACHE_TTL = 600  # 10 minutes
+
+
+def _max_followers():
+    return getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+
+
+def popular_author_ids():
+    """Auteurs dont les posts sont lus à la demande plutôt que recopiés"""
+    author_ids = cache.get('timeline:popular_authors')
+    if author_ids is None:
+        author_ids = set(
+            Follow.objects.values('following').annotate(n=Count('id'))
+            .filter(n__gt=_max_followers()).values_list('following', flat=True)
+        )
+        cache.set('timeline:popular_authors', author_ids, POPULAR_CACHE_TTL)
+    return author_ids
+
+
+def popular_topic_ids():
+    """Thèmes dont les posts sont lus à la demande plutôt que recopiés"""
+    topic_ids = cache.get('timeline:popular_topics')
+    if topic_ids is None:
+        topic_ids = set(
+            Topic.subscribers.through.objects.values('topic').annotate(n=Count('id'))
+            .filter(n__gt=_max_followers()).values_list('topic', flat=True)
+        )
+        cache.set('timeline:popular_topics', topic_ids, POPULAR_CACHE_TTL)
+    return topic_ids
+
+
+def fanout_post(post):
+    """Recopier un post dans le fil de l'auteur, de ses abonnés (post hors thème) ou des abonnés du thème"""
+    recipient_ids = {post.author_id}
+
+    if not post.topic_id and post.author_id not in popular_author_ids():
+        recipient_ids.update(
+            Follow.objects.filter(following_id=post.author_id).values_list('follower_id', flat=True)
+        )
+
+    if post.topic_id and post.topic_id not in popular_topic_ids():
+        recipient_ids.update(
+            Topic.subscribers.through.objects.filter(topic_id=post.topic_id).values_list('user_id', flat=True)
+        )
+
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post=post, created_at=post.created_at) for user_id in recipient_ids],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(recipient_ids)
+
+
+def _backfill_limit():
+    return getattr(settings, 'TIMELINE_BACKFILL_POSTS', 50)
+
+
+def _copy_recent(user_ids, posts):
+    """Recopier dans le fil de chaque utilisateur les derniers posts de la requête posts"""
+    recent = list(posts.order_by('-created_at', '-id').values_list('id', 'created_at')[:_backfill_limit()])
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+            for user_id in user_ids for post_id, created_at in recent
+        ],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(user_ids) * len(recent)
+
+
+def backfill_authors(user_ids, author_ids):
+    """Nouveaux abonnés : derniers posts hors thème de chaque auteur suivi"""
+    return sum(
+        _copy_recent(user_ids, Post.objects.filter(author_id=author_id, topic__isnull=True))
+        for author_id in author_ids
+    )
+
+
+def backfill_topics(user_ids, topic_ids):
+    """Nouveaux abonnés : derniers posts de chaque thème"""
+    return sum(_copy_recent(user_ids, Post.objects.filter(topic_id=topic_id)) for topic_id in topic_ids)
+
+
+def backfill_user(user_id):
+    """Remplir le fil d'un utilisateur à partir de ses propres posts et de ses abonnements"""
+    return (
+        _copy_recent([user_id], Post.objects.filter(author_id=user_id))
+        + backfill_authors([user_id], Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True))
+        + backfill_topics([user_id], Topic.subscribers.through.objects.filter(
+            user_id=user_id
+        ).values_list('topic_id', flat=True))
+    )
+
+
+def purge_authors(user_ids, author_ids):
+    """Abonnement retiré : posts hors thème des auteurs ôtés des fils"""
+    return TimelineEntry.objects.filter(
+        user_id__in=user_ids, post__author_id__in=author_ids, post__topic__isnull=True
+    ).delete()[0]
+
+
+def purge_topics(user_ids, topic_ids):
+    """Abonnement retiré : posts des thèmes ôtés des fils (l'auteur garde les siens)"""
+    return TimelineEntry.objects.filter(
+        user_id__in=user_ids, post__topic_id__in=topic_ids
+    ).exclude(post__author_id=F('user_id')).delete()[0]
+
+
+def _keyset(queryset, position, id_field):
+    """Restreindre une requête aux éléments situés après la position du curseur"""
+    if not position:
+        return queryset
+    created_at, pk = position
+    return queryset.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, **{f'{id_field}__lt': pk})
+    )
+
+
+def home_timeline(user, cursor=None, per_page=10):
+    """Page du fil personnalisé d'un utilisateur, paginée par curseur comme les autres fils"""
+    position = decode_cursor(cursor)
+
+    # Posts recopiés à l'écriture : parcours d'index sur (user, created_at, post)
+    entries = _keyset(TimelineEntry.objects.filter(user=user), position, 'post_id')
+    candidates = list(
+        entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:per_page + 1]
+    )
+
+    # Posts des auteurs/thèmes très suivis : fusionnés à la lecture
+    popular_authors = popular_author_ids()
+    popular_topics = popular_topic_ids()
+    pulled_authors = set()
+    pulled_topics = set()
+    if popular_authors:
+        pulled_authors = set(Follow.objects.filter(
+            follower=user, following_id__in=popular_authors
+        ).values_list('following_id', flat=True))
+    if popular_topics:
+        pulled_topics = set(user.subscribed_topics.filter(
+            id__in=popular_topics
+        ).values_list('id', flat=True))
+
+    if pulled_authors or pulled_topics:
+        pulled = _keyset(
+            Post.objects.filter(
+                Q(author_id__in=pulled_authors, topic__isnull=True) | Q(topic_id__in=pulled_topics)
+            ),
+            position, 'id'
+        )
+        candidates += list(
+            pulled.order_by('-created_at', '-id').values_list('created_at', 'id')[:per_page + 1]
+        )
+        candidates = sorted(set(candidates), reverse=True)
+
+    page_ids = [post_id for _, post_id in candidates[:per_page]]
+    posts = Post.objects.select_related('author', 'topic').in_bulk(page_ids)
+    object_list = [posts[post_id] for post_id in page_ids if post_id in posts]
+
+    next_cursor = None
+    if len(candidates) > per_page and object_list:
+        next_cursor = encode_cursor(object_list[-1])
+    return CursorPage(object_list, next_cursor)
@@ -0,0 +1,144 @@
+"""
+Scores de tendance (« hot ») pour Kongossa
+
+Les scores sont stockés dans des colonnes indexées (Post.hot_score,
+Group.hot_score, Topic.hot_score) et mis à jour à chaque événement par une
+seule requête UPDATE atomique : la lecture (?sort=hot) est un simple parcours
+d'index, sans agrégat.
+
+Posts — formule « à la Reddit » :
+    hot = log10(max(likes + COMMENT_WEIGHT × commentaires, 1)) + âge / POST_GRAVITY
+Le terme de temps est figé à la création : un post plus récent l'emporte sur
+un post plus ancien qui a POST_GRAVITY secondes de retard pour chaque facteur 10
+d'engagement, sans recalcul périodique.
+
+Groupes et thèmes — vélocité avec décroissance exponentielle :
+    hot = ln(Σ poids × exp((t_événement - EPOCH) / TRENDING_DECAY_SECONDS))
+Chaque événement (message, post, nouvel abonné ou membre) ajoute son poids en
+espace logarithmique ; l'activité ancienne pèse de moins en moins face à
+l'activité récente, et la comparaison entre deux scores vaut à tout instant.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Exp, Greatest, Ln, Log
+from django.utils import timezone
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+POST_GRAVITY = 45000  # Secondes par facteur 10 d'engagement
+COMMENT_WEIGHT = 2
+
+# Poids des événements de vélocité (groupes et thèmes)
+MESSAGE_WEIGHT = 1.0
+POST_WEIGHT = 1.0
+SUBSCRIBER_WEIGHT = 3.0
+TOPIC_MESSAGE_WEIGHT = 0.5  # Message dans un groupe du thème
+
+# Borne de exp() : l'activité plus ancienne que 50 constantes de temps est négligeable
+MIN_EXPONENT = -50
+
+
+def _decay_seconds():
+    return getattr(settings, 'TRENDING_DECAY_SECONDS', 43200)
+
+
+def post_hot_score(created_at, likes_count=0, comments_count=0):
+    """Score d'un post (création et recalcul complet)"""
+    engagement = max(likes_count + COMMENT_WEIGHT * comments_count, 1)
+    return math.log10(engagement) + (created_at - EPOCH).total_seconds() / POST_GRAVITY
+
+
+def _engagement(likes, comments):
+    return Log(10, Greatest(likes + COMMENT_WEIGHT * comments, Value(1)))
+
+
+def post_counter_update(field, delta):
+    """Arguments de update() qui modifient un compteur de post et son score dans la même requête
+
+    Dans un UPDATE, F() désigne les valeurs d'avant la requête : le terme
+    d'engagement est retiré puis remplacé, le terme de temps est conservé.
+    """
+    new_value = Greatest(F(field) + delta, 0)
+    likes, comments = F('likes_count'), F('comments_count')
+    new_likes = new_value if field == 'likes_count' else likes
+    new_comments = new_value if field == 'comments_count' else comments
+    return {
+        field: new_value,
+        'hot_score': F('hot_score') - _engagement(likes, comments) + _engagement(new_likes, new_comments),
+    }
+
+
+def _velocity_now():
+    return (timezone.now() - EPOCH).total_seconds() / _decay_seconds()
+
+
+def velocity_score(events):
+    """Score de vélocité à partir d'événements [(date, poids)] (recalcul complet)"""
+    decay = _decay_seconds()
+    exponents = [(when - EPOCH).total_seconds() / decay + math.log(weight) for when, weight in events if weight > 0]
+    if not exponents:
+        return 0.0
+    top = max(exponents)
+    return top + math.log(sum(math.exp(exponent - top) for exponent in exponents))
+
+
+def velocity_update(weight):
+    """Expression qui ajoute un événement de poids weight, daté de maintenant, au score courant"""
+    now = _velocity_now()
+    return Value(now) + Ln(Exp(Greatest(F('hot_score') - now, Value(float(MIN_EXPONENT)))) + weight)
+
+
+def bump_velocity(queryset, weight):
+    """Ajouter un événement aux groupes ou thèmes du QuerySet (une requête)"""
+    if weight > 0:
+        queryset.update(hot_score=velocity_update(weight))
+
+
+def recompute_post_scores(batch_size=1000):
+    """Recalculer le score de tous les posts à partir de leurs compteurs ; retourne le nombre de posts"""
+    from .models import Post
+    count = 0
+    last_id = 0
+    while True:
+        batch = list(Post.objects.filter(id__gt=last_id).order_by('id').only(
+            'id', 'created_at', 'likes_count', 'comments_count'
+        )[:batch_size])
+        if not batch:
+            return count
+        for post in batch:
+            post.hot_score = post_hot_score(post.created_at, post.likes_count, post.comments_count)
+        Post.objects.bulk_update(batch, ['hot_score'])
+        count += len(batch)
+        last_id = batch[-1].id
+
+
+def recompute_velocity_scores(days=7):
+    """Recalculer les scores des groupes et thèmes à partir des messages et posts des derniers jours
+
+    Les arrivées de membres et d'abonnés ne sont pas datées en base : seul le
+    suivi incrémental (forum.signals) en tient compte.
+    """
+    from datetime import timedelta
+    from .models import Group, GroupMessage, Post, Topic
+
+    since = timezone.now() - timedelta(days=days)
+    group_events, topic_events = {}, {}
+    for group_id, topic_id, created_at in GroupMessage.objects.filter(
+        created_at__gte=since
+    ).values_list('group_id', 'group__topic_id', 'created_at').iterator(chunk_size=5000):
+        group_events.setdefault(group_id, []).append((created_at, MESSAGE_WEIGHT))
+        topic_events.setdefault(topic_id, []).append((created_at, TOPIC_MESSAGE_WEIGHT))
+    for topic_id, created_at in Post.objects.filter(
+        created_at__gte=since, topic__isnull=False
+    ).values_list('topic_id', 'created_at').iterator(chunk_size=5000):
+        topic_events.setdefault(topic_id, []).append((created_at, POST_WEIGHT))
+
+    for model, events in ((Group, group_events), (Topic, topic_events)):
+        model.objects.exclude(id__in=list(events)).exclude(hot_score=0).update(hot_score=0)
+        model.objects.bulk_update(
+            [model(id=object_id, hot_score=velocity_score(object_events)) for object_id, object_events in events.items()],
+            ['hot_score'], batch_size=500
+        )
+    return len(group_events), len(topic_events)
@@ -5,17 +5,35 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.core.paginator import Paginator
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Case, Count, Q, When
 from django.urls import reverse
-from .models import Post, Like, Comment, Topic, Group, GroupMessage, GroupRequest
-from stories.models import Story
+from .models import Post, Like, Comment, Topic, Group, GroupMessage, GroupReadCursor, GroupRequest
+from .pagination import paginate_by_cursor, paginate_by_score
+from .serializers import serialize_group_message
+from .timeline import home_timeline
+from jobs.queue import enqueue
+from mediafiles.images import image_url
+from mediafiles.uploads import uploaded_file
+from chat.sidebar import get_chat_sidebar_data, invalidate_chat_sidebar
+from stories.carousel import carousel_for_users, feed_carousel
+from search.backends import search
+from users.relationships import annotate_relationships
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Fenêtre des endpoints de polling (nouveaux messages)
+NEW_MESSAGES_LIMIT = 100
+INITIAL_MESSAGES = 10
+
+# Groupes retournés par la recherche de topics_list
+GROUP_SEARCH_LIMIT = 50
+# Groupes affichés par la découverte triée par tendance (?sort=hot)
+HOT_GROUPS_LIMIT = 50
+
 
 def create_group_notification(group_request, notification_type, title, message):
     """Créer une notification pour une demande d'accès au groupe"""
@@ -40,13 +58,24 @@ def feed(request):
     if not request.user.is_authenticated:
         return redirect('/auth/login/')
     
-    # Filtrer uniquement les posts sans topic (mode broadcast)
-    posts = Post.objects.filter(topic__isnull=True).select_related('author').prefetch_related('likes', 'comments').order_by('-created_at')
+    # Onglet du fil : 'all' (broadcast) ou 'following' (fil personnalisé des abonnements)
+    feed_tab = 'following' if request.GET.get('tab') == 'following' else 'all'
+    # Tri du fil broadcast : 'recent' (chronologique) ou 'hot' (score de tendance précalculé)
+    feed_sort = 'hot' if request.GET.get('sort') == 'hot' and feed_tab == 'all' else 'recent'
+    cursor = request.GET.get('cursor')
     
-    # Pagination
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    if feed_tab == 'following':
+        page_obj = home_timeline(request.user, cursor, per_page=10)
+    else:
+        # Filtrer uniquement les posts sans topic (mode broadcast) ; les commentaires ne sont
+        # chargés que pour les cartes absentes du cache (forum.post_cards)
+        posts = Post.objects.filter(topic__isnull=True).select_related('author').order_by('-created_at')
+        
+        # Pagination par curseur (keyset sur created_at, id, ou hot_score, id)
+        if feed_sort == 'hot':
+            page_obj = paginate_by_score(posts, cursor, per_page=10)
+        else:
+            page_obj = paginate_by_cursor(posts, cursor, per_page=10)
     
     # Vérifier les likes de l'utilisateur
     liked_posts = set()
@@ -57,22 +86,7 @@ def feed(request):
         ).values_list('post_id', flat=True))
     
     # Récupérer les stories actives pour le carrousel (uniquement première page)
-    users_with_stories = []
-    if page_number == 1 or not request.GET.get('page'):
-        active_stories = Story.objects.filter(
-            expires_at__gt=timezone.now()
-        ).select_related('user').order_by('-created_at')
-        
-        # Grouper par utilisateur
-        users_with_stories_dict = {}
-        for story in active_stories:
-            if story.user_id not in users_with_stories_dict:
-                users_with_stories_dict[story.user_id] = {
-                    'user': story.user,
-                    'stories': []
-                }
-            users_with_stories_dict[story.user_id]['stories'].append(story)
-        users_with_stories = list(users_with_stories_dict.values())
+    users_with_stories = feed_carousel(request.user) if not cursor else []
     
     # Si requête AJAX, retourner uniquement les posts
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.GET.get('ajax'):
@@ -83,6 +97,8 @@ def feed(request):
     
     return render(request, 'forum/feed.html', {
         'page_obj': page_obj,
+        'feed_tab': feed_tab,
+        'feed_sort': feed_sort,
         'liked_posts': liked_posts,
         'users_with_stories': users_with_stories,
     })
@@ -108,7 +124,6 @@ def topics_list(request):
         is_active=True,
         id__in=subscribed_topic_ids
     ).annotate(
-        posts_count=Count('posts'),
         subscribers_count=Count('subscribers')
     ).order_by('name')
     
@@ -116,6 +131,8 @@ def topics_list(request):
     groups = None
     search_query = request.GET.get('q', '').strip()
     topic_filter = request.GET.get('topic', '')
+    # Découverte des groupes : 'hot' = tri par score de tendance précalculé (sans agrégat pour le tri)
+    groups_sort = 'hot' if request.GET.get('sort') == 'hot' else 'popular'
     show_groups = request.GET.get('show', '') == 'groups' or search_query
     
     # Récupérer les groupes auxquels l'utilisateur est déjà abonné ou membre
@@ -146,19 +163,25 @@ def topics_list(request):
             subscribers_count=Count('subscribers')
         ).distinct()
         
-        # Filtrer par recherche
-        if search_query:
-            groups = groups.filter(
-                Q(name__icontains=search_query) | 
-                Q(description__icontains=search_query) |
-                Q(topic__name__icontains=search_query)
-            )
-        
         # Filtrer par topic
         if topic_filter:
             groups = groups.filter(topic__slug=topic_filter)
         
-        groups = groups.order_by('-subscribers_count', '-members_count', '-created_at')
+        # Filtrer par recherche : index plein texte (nom, description, thème), par pertinence
+        if search_query:
+            group_ids = [hit.object_id for hit in search(search_query, kinds=['group'], limit=GROUP_SEARCH_LIMIT)]
+            groups = groups.filter(id__in=group_ids).order_by(
+                Case(*[When(id=group_id, then=rank) for rank, group_id in enumerate(group_ids)], default=len(group_ids))
+            )
+        elif groups_sort == 'hot':
+            # Les premiers groupes sont lus sur l'index hot_score ; les compteurs ne sont calculés que pour eux
+            hot_ids = list(Group.objects.filter(
+                Q(is_public=True) | Q(id__in=user_subscribed_group_ids) | Q(creator=request.user),
+                *([Q(topic__slug=topic_filter)] if topic_filter else [])
+            ).order_by('-hot_score').values_list('id', flat=True)[:HOT_GROUPS_LIMIT])
+            groups = groups.filter(id__in=hot_ids).order_by('-hot_score', '-id')
+        else:
+            groups = groups.order_by('-subscribers_count', '-members_count', '-created_at')
     else:
         # Si pas de recherche, afficher uniquement les groupes auxquels l'utilisateur est abonné/membre/créateur
         # Toujours inclure les groupes créés par l'utilisateur même s'ils ne sont pas dans user_subscribed_group_ids
@@ -185,6 +208,7 @@ def topics_list(request):
         'selected_topic': topic_filter,
         'subscribed_group_ids': subscribed_group_ids,
         'show_groups': show_groups,
+        'groups_sort': groups_sort,
     })
 
 
@@ -331,12 +355,15 @@ def topic_detail(request, slug):
         messages.error(request, 'Vous devez être abonné à ce forum pour y accéder')
         return redirect('forum:topics_list')
     
-    posts = Post.objects.filter(topic=topic).select_related('author', 'topic').prefetch_related('likes', 'comments').order_by('-created_at')
+    posts = Post.objects.filter(topic=topic).select_related('author', 'topic').order_by('-created_at')
     
-    # Pagination
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur (keyset sur created_at, id, ou hot_score, id avec ?sort=hot)
+    cursor = request.GET.get('cursor')
+    posts_sort = 'hot' if request.GET.get('sort') == 'hot' else 'recent'
+    if posts_sort == 'hot':
+        page_obj = paginate_by_score(posts, cursor, per_page=10)
+    else:
+        page_obj = paginate_by_cursor(posts, cursor, per_page=10)
     
     # Vérifier les likes de l'utilisateur
     liked_posts = set()
@@ -348,29 +375,15 @@ def topic_detail(request, slug):
     
     # Récupérer les stories actives des membres du topic (uniquement première page)
     users_with_stories = []
-    if page_number == 1 or not request.GET.get('page'):
+    if not cursor:
         # Récupérer les utilisateurs qui ont posté dans ce topic
-        topic_authors = posts.values_list('author_id', flat=True).distinct()
-        active_stories = Story.objects.filter(
-            expires_at__gt=timezone.now(),
-            user_id__in=topic_authors
-        ).select_related('user').order_by('-created_at')
-        
-        # Grouper par utilisateur
-        users_with_stories_dict = {}
-        for story in active_stories:
-            if story.user_id not in users_with_stories_dict:
-                users_with_stories_dict[story.user_id] = {
-                    'user': story.user,
-                    'stories': []
-                }
-            users_with_stories_dict[story.user_id]['stories'].append(story)
-        users_with_stories = list(users_with_stories_dict.values())
+        topic_authors = posts.order_by().values_list('author_id', flat=True).distinct()
+        users_with_stories = carousel_for_users(topic_authors, viewer=request.user)
     
     # Récupérer les groupes du topic
     groups = Group.objects.filter(topic=topic).annotate(
         members_count=Count('members')
-    ).order_by('-updated_at')
+    ).order_by('-hot_score' if posts_sort == 'hot' else '-updated_at')
     
     # Récupérer le premier groupe (pour le bouton flottant)
     first_group = groups.first() if groups.exists() else None
@@ -414,6 +427,7 @@ def topic_detail(request, slug):
         'user_group_requests': user_group_requests,
         'users_with_stories': users_with_stories,
         'first_group': first_group,
+        'posts_sort': posts_sort,
     })
 
 
@@ -424,9 +438,9 @@ def create_post(request):
     import mimetypes
     
     content = request.POST.get('content', '').strip()
-    image = request.FILES.get('image')
-    video = request.FILES.get('video')
-    audio = request.FILES.get('audio')
+    image = uploaded_file(request, 'image')
+    video = uploaded_file(request, 'video')
+    audio = uploaded_file(request, 'audio')
     topic_id = request.POST.get('topic_id')
     group_id = request.POST.get('group_id')
     
@@ -449,6 +463,8 @@ def create_post(request):
         video=video,
         audio=audio
     )
+    # Recopier le post dans le fil des abonnés de l'auteur et du thème (tâche de fond)
+    enqueue('forum.tasks.fanout_post_to_timelines', post.id, idempotency_key=f'fanout_post:{post.id}')
     messages.success(request, 'Post créé avec succès!')
     
     # Si un group_id est fourni, rediriger vers le fil d'actualité du groupe
@@ -470,16 +486,20 @@ def create_post(request):
 def toggle_like(request, post_id):
     """Ajouter/retirer un like"""
     post = get_object_or_404(Post, id=post_id)
-    like, created = Like.objects.get_or_create(
-        user=request.user,
-        post=post
-    )
+    # Le like et la mise à jour du compteur (forum.signals) sont commités ensemble
+    with transaction.atomic():
+        like, created = Like.objects.get_or_create(
+            user=request.user,
+            post=post
+        )
+        
+        if not created:
+            like.delete()
+            liked = False
+        else:
+            liked = True
     
-    if not created:
-        like.delete()
-        liked = False
-    else:
-        liked = True
+    post.refresh_from_db(fields=['likes_count'])
     
     return JsonResponse({
         'liked': liked,
@@ -497,11 +517,14 @@ def add_comment(request, post_id):
     if not content:
         return JsonResponse({'error': 'Le commentaire ne peut pas être vide'}, status=400)
     
-    comment = Comment.objects.create(
-        post=post,
-        author=request.user,
-        content=content
-    )
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            post=post,
+            author=request.user,
+            content=content
+        )
+    
+    post.refresh_from_db(fields=['comments_count'])
     
     return JsonResponse({
         'success': True,
@@ -509,7 +532,7 @@ def add_comment(request, post_id):
             'id': comment.id,
             'content': comment.content,
             'author': comment.author.username,
-            'author_avatar': comment.author.avatar.url if comment.author.avatar else '',
+            'author_avatar': image_url(comment.author.avatar, 'avatar', 128) or '',
             'created_at': comment.created_at.strftime('%d/%m/%Y %H:%M'),
         },
         'comment_count': post.comment_count
@@ -562,12 +585,11 @@ def group_feed(request, group_id):
     topic = group.topic
     
     # Récupérer les posts du topic du groupe
-    posts = Post.objects.filter(topic=topic).select_related('author', 'topic').prefetch_related('likes', 'comments').order_by('-created_at')
+    posts = Post.objects.filter(topic=topic).select_related('author', 'topic').order_by('-created_at')
     
-    # Pagination
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur (keyset sur created_at, id)
+    cursor = request.GET.get('cursor')
+    page_obj = paginate_by_cursor(posts, cursor, per_page=10)
     
     # Vérifier les likes de l'utilisateur
     liked_posts = set()
@@ -579,24 +601,9 @@ def group_feed(request, group_id):
     
     # Récupérer les stories actives des membres du groupe (uniquement première page)
     users_with_stories = []
-    if page_number == 1 or not request.GET.get('page'):
+    if not cursor:
         # Récupérer les utilisateurs qui sont membres du groupe
-        group_member_ids = group.members.values_list('id', flat=True)
-        active_stories = Story.objects.filter(
-            expires_at__gt=timezone.now(),
-            user_id__in=group_member_ids
-        ).select_related('user').order_by('-created_at')
-        
-        # Grouper par utilisateur
-        users_with_stories_dict = {}
-        for story in active_stories:
-            if story.user_id not in users_with_stories_dict:
-                users_with_stories_dict[story.user_id] = {
-                    'user': story.user,
-                    'stories': []
-                }
-            users_with_stories_dict[story.user_id]['stories'].append(story)
-        users_with_stories = list(users_with_stories_dict.values())
+        users_with_stories = carousel_for_users(group.members.values_list('id', flat=True), viewer=request.user)
     
     # Si requête AJAX, retourner uniquement les posts
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.GET.get('ajax'):
@@ -628,35 +635,21 @@ def group_detail(request, group_id):
     
     messages_list = group.messages.all()[:50]  # Derniers 50 messages
     
+    # Le groupe est affiché : tous ses messages sont lus
+    if is_member:
+        last_message_id = group.messages.order_by('-id').values_list('id', flat=True).first()
+        if GroupReadCursor.advance(request.user, group.id, last_message_id):
+            invalidate_chat_sidebar([request.user.id])
+    
     # Récupérer les données de la sidebar (uniquement les groupes, pas les conversations personnelles)
-    try:
-        from forum.models import GroupMessage
-        from django.db.models import Count
-        
-        # Récupérer uniquement les groupes où l'utilisateur est membre
-        groups = Group.objects.filter(members=request.user).annotate(
-            members_count=Count('members')
-        ).order_by('-updated_at')
-        
-        groups_data = []
-        for g in groups:
-            last_message = g.messages.last() if hasattr(g, 'messages') else None
-            groups_data.append({
-                'group': g,
-                'last_message': last_message,
-                'unread_count': 0,  # TODO: Implémenter le comptage des messages non lus pour les groupes
-                'type': 'group',
-            })
-        
-        sidebar_data = {
-            'conversations': [],
-            'all_items': groups_data,  # Uniquement les groupes
-        }
-    except ImportError:
-        sidebar_data = {'conversations': [], 'all_items': []}
+    all_items = get_chat_sidebar_data(request.user)['all_items']
+    sidebar_data = {
+        'conversations': [],
+        'all_items': [item for item in all_items if item['type'] == 'group'],
+    }
     
-    # Récupérer les membres du groupe avec leurs avatars
-    group_members = group.members.all().order_by('username')
+    # Récupérer les membres du groupe avec leurs avatars et leur relation avec l'utilisateur
+    group_members = annotate_relationships(request.user, group.members.all().order_by('username'))
     
     return render(request, 'forum/group_detail.html', {
         'group': group,
@@ -850,10 +843,10 @@ def send_group_message(request, group_id):
         return JsonResponse({'error': 'Vous devez être membre pour envoyer des messages'}, status=403)
     
     content = request.POST.get('content', '').strip()
-    image = request.FILES.get('image')
-    video = request.FILES.get('video')
-    audio = request.FILES.get('audio')
-    file = request.FILES.get('file')
+    image = uploaded_file(request, 'image')
+    video = uploaded_file(request, 'video')
+    audio = uploaded_file(request, 'audio')
+    file = uploaded_file(request, 'file')
     file_name = request.POST.get('file_name', '')
     
     if not content and not image and not video and not audio and not file:
@@ -895,24 +888,12 @@ def send_group_message(request, group_id):
         file_name=file_name
     )
     
-    # Mettre à jour la date de modification du groupe
-    group.save()
+    # Mettre à jour la date de modification du groupe (tâche de fond)
+    enqueue('forum.tasks.touch_group', group.id)
     
     return JsonResponse({
         'success': True,
-        'message': {
-            'id': message.id,
-            'content': message.content,
-            'sender': message.sender.username,
-            'sender_id': message.sender.id,
-            'sender_avatar': message.sender.avatar.url if message.sender.avatar else None,
-            'created_at': message.created_at.isoformat(),
-            'image': message.image.url if message.image else None,
-            'video': message.video.url if message.video else None,
-            'audio': message.audio.url if message.audio else None,
-            'file': message.file.url if message.file else None,
-            'file_name': message.file_name,
-        }
+        'message': serialize_group_message(message),
     })
 
 
@@ -924,39 +905,32 @@ def get_new_group_messages(request, group_id):
     if not group.is_member(request.user):
         return JsonResponse({'error': 'Vous devez être membre pour voir les messages'}, status=403)
     
-    last_message_id = request.GET.get('last_message_id')
+    last_message_id = request.GET.get('last_message_id', '')
+    messages_query = group.messages.select_related('sender')
     
-    if last_message_id:
-        try:
-            last_message_id = int(last_message_id)
-            messages_query = group.messages.filter(id__gt=last_message_id)
-        except ValueError:
-            messages_query = group.messages.all()
+    if last_message_id.isdigit():
+        # Fenêtre bornée : le client repart de next_cursor tant que has_more est vrai
+        last_message_id = int(last_message_id)
+        messages = list(messages_query.filter(id__gt=last_message_id).order_by('id')[:NEW_MESSAGES_LIMIT + 1])
+        has_more = len(messages) > NEW_MESSAGES_LIMIT
+        messages = messages[:NEW_MESSAGES_LIMIT]
     else:
-        # Si pas de last_message_id, retourner les 10 derniers messages
-        messages_query = group.messages.all()
-    
-    messages = messages_query.order_by('created_at')
-    
-    messages_data = []
-    for msg in messages:
-        messages_data.append({
-            'id': msg.id,
-            'content': msg.content,
-            'sender': msg.sender.username,
-            'sender_id': msg.sender.id,
-            'sender_avatar': msg.sender.avatar.url if msg.sender.avatar else None,
-            'created_at': msg.created_at.isoformat(),
-            'image': msg.image.url if msg.image else None,
-            'video': msg.video.url if msg.video else None,
-            'audio': msg.audio.url if msg.audio else None,
-            'file': msg.file.url if msg.file else None,
-            'file_name': msg.file_name,
-        })
+        # Si pas de last_message_id (ou invalide), retourner les 10 derniers messages
+        last_message_id = None
+        messages = list(messages_query.order_by('-id')[:INITIAL_MESSAGES])[::-1]
+        has_more = False
+    
+    messages_data = [serialize_group_message(msg) for msg in messages]
+    
+    # Les messages servis sont lus : avancer le curseur de lecture
+    if messages and GroupReadCursor.advance(request.user, group.id, messages[-1].id):
+        invalidate_chat_sidebar([request.user.id])
     
     return JsonResponse({
         'messages': messages_data,
-        'count': len(messages_data)
+        'count': len(messages_data),
+        'next_cursor': messages[-1].id if messages else last_message_id,
+        'has_more': has_more,
     })
 
 
@@ -1040,7 +1014,7 @@ def manage_topic(request, slug):
         return redirect('forum:topic_detail', slug=slug)
     
     # Récupérer les statistiques
-    posts_count = topic.posts.count()
+    posts_count = topic.posts_count
     groups_count = topic.groups.count()
     
     return render(request, 'forum/manage_topic.html', {
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'updated_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'idempotency_key', 'last_error']
+    readonly_fields = ['created_at', 'updated_at', 'locked_at', 'locked_by']
+    actions = ['retry_jobs']
+    
+    @admin.action(description='Relancer les tâches sélectionnées')
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='pending', attempts=0, run_at=timezone.now(), last_error=''
+        )
+        self.message_user(request, f'{updated} tâche(s) relancée(s)')
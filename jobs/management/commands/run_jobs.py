@@ -0,0 +1,78 @@
+"""
+Commande pour exécuter les tâches de fond (file jobs.Job)
+À lancer comme service (systemd, supervisor) : python manage.py run_jobs --workers 4
+"""
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from jobs.queue import due_job_ids, release_stale_jobs, run_job, schedule_periodic_jobs, worker_name
+
+
+def work(poll_interval, batch_size, once=False):
+    """Boucle d'un worker : planifie les tâches périodiques, puis exécute les tâches dues"""
+    stopping = []
+    # Arrêt propre (SIGTERM du superviseur, Ctrl+C) : la tâche en cours est terminée
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stopping.append(True))
+    name = worker_name()
+
+    while not stopping:
+        close_old_connections()
+        release_stale_jobs()
+        schedule_periodic_jobs()
+
+        executed = 0
+        for job_id in due_job_ids(batch_size):
+            if stopping:
+                break
+            if run_job(job_id, worker=name):
+                executed += 1
+
+        if once and not executed:
+            return
+        if not executed:
+            time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Exécute les tâches de fond planifiées (notifications, nettoyage des stories, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Nombre de processus workers')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Attente (secondes) quand la file est vide')
+        parser.add_argument('--batch-size', type=int, default=50, help='Nombre de tâches réservées par itération')
+        parser.add_argument('--once', action='store_true', help='Vider la file puis s\'arrêter')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        worker_args = (options['poll_interval'], options['batch_size'], options['once'])
+
+        if workers == 1:
+            self.stdout.write(self.style.SUCCESS('Worker démarré'))
+            work(*worker_args)
+            return
+
+        # Ne pas partager les connexions à la base entre processus
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=work, args=worker_args, name=f'kongossa-worker-{i}')
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f'{workers} workers démarrés'))
+
+        def stop(signum, frame):
+            # Transmettre l'arrêt aux workers : chacun termine sa tâche en cours puis s'arrête
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for process in processes:
+            process.join()
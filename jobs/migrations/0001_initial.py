@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=200, verbose_name='Tâche')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='Arguments')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='Arguments nommés')),
+                ('idempotency_key', models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name="Clé d'idempotence")),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminée'), ('failed', 'Échouée')], default='pending', max_length=20, verbose_name='Statut')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Tentatives max')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Exécuter à partir de')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Verrouillée le')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Verrouillée par')),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tâche de fond',
+                'verbose_name_plural': 'Tâches de fond',
+                'ordering': ['run_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='jobs_job_status_f5c023_idx')],
+            },
+        ),
+    ]
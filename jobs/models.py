@@ -0,0 +1,42 @@
+"""
+Modèles pour les tâches de fond Kongossa
+"""
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Tâche de fond persistée en base (exécutée par run_jobs ou le thread local)"""
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminée'),
+        ('failed', 'Échouée'),
+    ]
+    
+    # Chemin pointé de la fonction à exécuter, ex: 'notifications.tasks.notify_group_members'
+    task = models.CharField(max_length=200, verbose_name="Tâche")
+    args = models.JSONField(default=list, blank=True, verbose_name="Arguments")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="Arguments nommés")
+    # Une même clé ne peut être planifiée qu'une seule fois (voir jobs.queue.enqueue)
+    idempotency_key = models.CharField(max_length=255, unique=True, blank=True, null=True, verbose_name="Clé d'idempotence")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentatives")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Tentatives max")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Exécuter à partir de")
+    locked_at = models.DateTimeField(blank=True, null=True, verbose_name="Verrouillée le")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Verrouillée par")
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['run_at', 'id']
+        verbose_name = "Tâche de fond"
+        verbose_name_plural = "Tâches de fond"
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} ({self.get_status_display()})"
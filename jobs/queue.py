@@ -0,0 +1,138 @@
+"""
+File de tâches persistante (base de données) pour Kongossa
+
+    from jobs.queue import enqueue
+    enqueue('notifications.tasks.notify_group_members', message.id,
+            idempotency_key=f'notify_group_members:{message.id}')
+
+La tâche est enregistrée dans la même transaction que l'écriture qui la déclenche :
+elle n'existe que si cette transaction est validée. Elle est ensuite exécutée :
+- par les workers `python manage.py run_jobs` (production) ;
+- et, si JOBS_DISPATCH_LOCAL vaut True, par le thread de fond du processus web
+  (kongossa.tasks) juste après le commit, pour fonctionner sans worker en local
+  (sauf les tâches longues de JOBS_LOCAL_EXCLUDED, laissées aux workers).
+
+Une tâche qui lève une exception est replanifiée avec un délai exponentiel
+jusqu'à max_attempts tentatives, puis marquée 'failed'.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def _task_path(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _create_job(task, args, kwargs, idempotency_key=None, run_at=None, max_attempts=None):
+    """Enregistrer une tâche ; retourne (job, created)"""
+    if idempotency_key:
+        existing = Job.objects.filter(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing, False
+
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                task=_task_path(task),
+                args=list(args),
+                kwargs=kwargs,
+                idempotency_key=idempotency_key,
+                run_at=run_at or timezone.now(),
+                max_attempts=max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', 5),
+            )
+    except IntegrityError:
+        # Un autre processus a planifié la même clé entre-temps
+        return Job.objects.get(idempotency_key=idempotency_key), False
+    return job, True
+
+
+def enqueue(task, *args, idempotency_key=None, run_at=None, max_attempts=None, **kwargs):
+    """Planifier une tâche (fonction ou chemin pointé) ; retourne le Job existant si la clé est déjà connue"""
+    job, created = _create_job(task, args, kwargs, idempotency_key, run_at, max_attempts)
+
+    if (
+        created
+        and getattr(settings, 'JOBS_DISPATCH_LOCAL', settings.DEBUG)
+        and job.task not in getattr(settings, 'JOBS_LOCAL_EXCLUDED', ())
+        and job.run_at <= timezone.now()
+    ):
+        from kongossa.tasks import enqueue as dispatch_local
+        dispatch_local(run_job, job.id)
+    return job
+
+
+def claim(job_id, worker=None):
+    """Réserver une tâche en attente (UPDATE conditionnel : un seul processus peut gagner)"""
+    now = timezone.now()
+    return Job.objects.filter(
+        id=job_id, status='pending', run_at__lte=now
+    ).update(status='running', locked_at=now, locked_by=worker or worker_name(), updated_at=now) == 1
+
+
+def run_job(job_id, worker=None):
+    """Exécuter une tâche si elle peut être réservée ; retourne True si elle a été exécutée"""
+    if not claim(job_id, worker):
+        return False
+
+    job = Job.objects.get(id=job_id)
+    job.attempts += 1
+    try:
+        func = import_string(job.task)
+        func(*job.args, **job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            base_delay = getattr(settings, 'JOBS_RETRY_BASE_DELAY', 10)
+            job.status = 'pending'
+            job.run_at = timezone.now() + timedelta(seconds=base_delay * 2 ** (job.attempts - 1))
+        else:
+            job.status = 'failed'
+        logger.warning('Tâche %s (%s) en échec, tentative %s/%s', job.id, job.task, job.attempts, job.max_attempts)
+    else:
+        job.status = 'done'
+        job.last_error = ''
+    job.locked_at = None
+    job.locked_by = ''
+    job.save(update_fields=['status', 'attempts', 'run_at', 'last_error', 'locked_at', 'locked_by', 'updated_at'])
+    return True
+
+
+def due_job_ids(limit=50):
+    """Identifiants des tâches prêtes à être exécutées, les plus anciennes d'abord"""
+    return list(Job.objects.filter(
+        status='pending', run_at__lte=timezone.now()
+    ).order_by('run_at', 'id').values_list('id', flat=True)[:limit])
+
+
+def release_stale_jobs():
+    """Remettre en attente les tâches verrouillées par un worker qui a disparu"""
+    timeout = getattr(settings, 'JOBS_LOCK_TIMEOUT', 600)
+    return Job.objects.filter(
+        status='running', locked_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status='pending', locked_at=None, locked_by='')
+
+
+def schedule_periodic_jobs():
+    """Planifier les tâches périodiques (JOBS_PERIODIC) ; la clé d'idempotence évite les doublons entre workers"""
+    now = timezone.now()
+    for task, interval in getattr(settings, 'JOBS_PERIODIC', {}).items():
+        slot = int(now.timestamp() // interval)
+        _create_job(task, (), {}, idempotency_key=f'periodic:{task}:{slot}')
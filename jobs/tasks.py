@@ -0,0 +1,18 @@
+"""
+Tâches de maintenance de la file de tâches
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+
+def purge_finished_jobs():
+    """Supprimer les tâches terminées depuis plus de JOBS_RETENTION_DAYS jours"""
+    days = getattr(settings, 'JOBS_RETENTION_DAYS', 7)
+    deleted, _ = Job.objects.filter(
+        status='done', updated_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
 
 import os
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
@@ -20,15 +21,24 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kongossa.settings')
 # Initialiser Django AVANT d'importer les modules qui utilisent les modèles
 django_asgi_app = get_asgi_application()
 
+# Purge des stories expirées dans ce processus (voir stories.sweeper)
+if settings.STORY_SWEEPER_IN_PROCESS:
+    from stories.sweeper import start_sweeper
+    start_sweeper()
+
 # Configuration du routage ASGI
 # - HTTP : Routé vers l'application Django standard
-# - WebSocket : Routé vers les consumers Django Channels avec authentification (pour les appels)
+# - WebSocket : Routé vers les consumers Django Channels avec authentification (appels et messages)
 try:
     from chat.call_consumer import CallConsumer
+    from chat.chat_consumer import ChatConsumer
+    from forum.group_chat_consumer import GroupChatConsumer
     from django.urls import re_path
     
     websocket_urlpatterns = [
         re_path(r'ws/call/(?P<conversation_id>\w+)/$', CallConsumer.as_asgi()),
+        re_path(r'ws/chat/(?P<conversation_id>\d+)/$', ChatConsumer.as_asgi()),
+        re_path(r'ws/group/(?P<group_id>\d+)/$', GroupChatConsumer.as_asgi()),
     ]
     
     application = ProtocolTypeRouter({
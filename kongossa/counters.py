@@ -0,0 +1,205 @@
+"""
+Compteurs par utilisateur (badges de non lus) pour Kongossa
+
+Les badges (messages non lus, notifications non lues) sont lus à chaque page
+et interrogés en boucle par le navigateur : ils sont servis depuis un magasin
+de compteurs, sans requête SQL, et tenus à jour par les chemins d'écriture.
+
+    from kongossa.counters import get_counter, incr_counter
+    count = get_counter('notifications_unread', user.id, compute=lambda: ...)
+    incr_counter('notifications_unread', user.id)
+
+Un compteur absent (premier accès, expiration, invalidation) est recalculé
+par `compute` puis mémorisé ; les incréments ne portent que sur les compteurs
+déjà présents. Les écritures sont appliquées après le commit de la transaction
+courante. Une tâche de réconciliation périodique corrige les dérives.
+
+Backends (UNREAD_COUNTERS_BACKEND) :
+- 'memory' : dictionnaire du processus (développement, un seul processus) ;
+- 'cache' : cache Django (défaut) ;
+- 'redis' : Redis (UNREAD_COUNTERS_REDIS_URL), incréments atomiques partagés entre serveurs.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'counter'
+
+
+def _key(name, user_id):
+    return f'{KEY_PREFIX}:{name}:{user_id}'
+
+
+def _ttl():
+    return getattr(settings, 'UNREAD_COUNTERS_TTL', 86400)
+
+
+class MemoryCounterBackend:
+    """Compteurs en mémoire du processus"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._values.get(key, (None, 0))
+            if value is not None and expires_at < time.monotonic():
+                del self._values[key]
+                return None
+            return value
+
+    def add(self, key, value):
+        with self._lock:
+            if self._values.get(key, (None, 0))[1] < time.monotonic():
+                self._values[key] = (value, time.monotonic() + _ttl())
+
+    def set_many(self, values):
+        expires_at = time.monotonic() + _ttl()
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = (value, expires_at)
+
+    def incr(self, key, delta):
+        with self._lock:
+            if key in self._values:
+                value, expires_at = self._values[key]
+                self._values[key] = (value + delta, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+
+class CacheCounterBackend:
+    """Compteurs dans le cache Django (incr/decr atomiques selon le backend de cache)"""
+
+    def get(self, key):
+        return cache.get(key)
+
+    def add(self, key, value):
+        cache.add(key, value, _ttl())
+
+    def set_many(self, values):
+        cache.set_many(values, _ttl())
+
+    def incr(self, key, delta):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Compteur absent : il sera recalculé à la prochaine lecture
+            pass
+
+    def delete(self, key):
+        cache.delete(key)
+
+
+class RedisCounterBackend:
+    """Compteurs dans Redis (INCRBY conditionnel par script Lua)"""
+
+    INCR_IF_EXISTS = (
+        "if redis.call('exists', KEYS[1]) == 1 then "
+        "return redis.call('incrby', KEYS[1], ARGV[1]) end"
+    )
+
+    def __init__(self):
+        import redis
+        self._client = redis.Redis.from_url(settings.UNREAD_COUNTERS_REDIS_URL)
+        self._incr_if_exists = self._client.register_script(self.INCR_IF_EXISTS)
+
+    def get(self, key):
+        value = self._client.get(key)
+        return int(value) if value is not None else None
+
+    def add(self, key, value):
+        self._client.set(key, value, ex=_ttl(), nx=True)
+
+    def set_many(self, values):
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(key, value, ex=_ttl())
+        pipeline.execute()
+
+    def incr(self, key, delta):
+        self._incr_if_exists(keys=[key], args=[delta])
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+BACKENDS = {
+    'memory': MemoryCounterBackend,
+    'cache': CacheCounterBackend,
+    'redis': RedisCounterBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Backend configuré (instancié au premier accès)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = BACKENDS[getattr(settings, 'UNREAD_COUNTERS_BACKEND', 'cache')]()
+    return _backend
+
+
+def get_counter(name, user_id, compute):
+    """Lire un compteur en O(1) ; compute() n'est appelé que si le compteur est absent"""
+    backend = get_backend()
+    key = _key(name, user_id)
+    value = backend.get(key)
+    if value is None:
+        value = compute()
+        backend.add(key, value)
+    return max(value, 0)
+
+
+def incr_counter(name, user_ids, delta=1):
+    """Ajouter delta au compteur d'un ou plusieurs utilisateurs, après le commit"""
+    if not delta:
+        return
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
+    keys = [_key(name, user_id) for user_id in user_ids]
+
+    def apply():
+        backend = get_backend()
+        for key in keys:
+            backend.incr(key, delta)
+
+    transaction.on_commit(apply)
+
+
+def reset_counter(name, user_id, value=None):
+    """Fixer un compteur (value) ou le supprimer pour qu'il soit recalculé, après le commit"""
+    key = _key(name, user_id)
+
+    def apply():
+        if value is None:
+            get_backend().delete(key)
+        else:
+            get_backend().set_many({key: value})
+
+    transaction.on_commit(apply)
+
+
+def reconcile_counters(name, counts, batch_size=1000):
+    """Réécrire le compteur de chaque utilisateur actif avec sa valeur réelle (counts : {user_id: valeur})"""
+    from django.contrib.auth import get_user_model
+
+    user_ids = get_user_model().objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+    backend = get_backend()
+    batch = {}
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        batch[_key(name, user_id)] = counts.get(user_id, 0)
+        if len(batch) >= batch_size:
+            backend.set_many(batch)
+            batch = {}
+    if batch:
+        backend.set_many(batch)
@@ -0,0 +1,28 @@
+"""
+Diffusion d'événements temps réel via le channel layer (Django Channels)
+
+Les vues et signaux étant synchrones, l'envoi est fait avec async_to_sync,
+après le commit de la transaction courante pour que les clients ne reçoivent
+jamais un objet qui n'existe pas encore en base.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def broadcast(group_name, event):
+    """Envoyer un événement à tous les consumers abonnés à group_name"""
+    def send():
+        try:
+            from channels.layers import get_channel_layer
+            channel_layer = get_channel_layer()
+            if channel_layer is not None:
+                async_to_sync(channel_layer.group_send)(group_name, event)
+        except Exception:
+            # Le temps réel ne doit jamais faire échouer l'écriture (les clients se rattrapent au polling)
+            logger.exception('Échec de la diffusion sur %s', group_name)
+
+    transaction.on_commit(send)
@@ -53,6 +53,9 @@ INSTALLED_APPS = [
     'chat',                            # Chat en temps réel
     'stories',                         # Stories éphémères
     'notifications.apps.NotificationsConfig',  # Système de notifications
+    'jobs.apps.JobsConfig',            # Tâches de fond (file persistante en base)
+    'search.apps.SearchConfig',        # Recherche plein texte
+    'mediafiles.apps.MediafilesConfig',  # Fichiers média (déclinaisons d'images)
 ]
 
 MIDDLEWARE = [
@@ -155,6 +158,12 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Fichiers envoyés stockés une seule fois sous leur empreinte SHA-256 (mediafiles.storage)
+STORAGES = {
+    'default': {'BACKEND': 'mediafiles.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -252,6 +261,153 @@ ALLOWED_FILE_EXTENSIONS = {
 # Durée de vie des stories en heures (24h par défaut)
 STORY_EXPIRY_HOURS = int(os.environ.get('STORY_EXPIRY_HOURS', 24))
 
+# Balayeur des stories expirées (stories.sweeper) : dans le processus ASGI si True,
+# sinon via les workers run_jobs ou `python manage.py cleanup_expired_stories --watch`
+STORY_SWEEPER_IN_PROCESS = os.environ.get('STORY_SWEEPER_IN_PROCESS', 'False').lower() == 'true'
+STORY_SWEEP_INTERVAL = 300  # Attente maximale (secondes) entre deux passages
+STORY_DELETE_BATCH_SIZE = 500
+
+# Durée maximale (secondes) du carrousel en cache ; une entrée expire au plus tard avec sa première story
+STORY_CAROUSEL_CACHE_TTL = 3600
+
+# Vues de stories écrites par lots (stories.tracking) : taille du tampon et délai maximal (secondes)
+STORY_VIEW_BUFFER_SIZE = 200
+STORY_VIEW_FLUSH_INTERVAL = 5
+
+# ============================================================================
+# CONFIGURATION DES TENDANCES
+# ============================================================================
+
+# Constante de temps (secondes) de la décroissance des scores de tendance des groupes et thèmes
+# (forum.trending) : une activité pèse e fois moins TRENDING_DECAY_SECONDS plus tard
+TRENDING_DECAY_SECONDS = 43200
+
+# ============================================================================
+# CONFIGURATION DU CACHE DES CARTES DE POST
+# ============================================================================
+
+# Durée de vie (secondes) des cartes de post rendues dans le cache partagé (forum.post_cards)
+POST_CARD_CACHE_TTL = 600
+# Nombre de cartes gardées dans le LRU local de chaque processus (0 = désactivé)
+POST_CARD_LOCAL_CACHE_SIZE = 500
+
+# ============================================================================
+# CONFIGURATION DES FICHIERS MÉDIA
+# ============================================================================
+
+# Qualité (1-100) des déclinaisons WebP et JPEG des images envoyées (mediafiles.images)
+IMAGE_VARIANT_QUALITY = 80
+# Durée en cache (secondes) de l'état des déclinaisons de chaque image : prêtes ou impossibles,
+# et absentes (vérifiées de nouveau sur le stockage à l'expiration, en attendant la tâche)
+IMAGE_VARIANTS_CACHE_TTL = 86400
+IMAGE_VARIANTS_PENDING_TTL = 60
+
+# Envois reprenables par morceaux (mediafiles.uploads) : taille des morceaux, taille maximale
+# d'un fichier, répertoire d'assemblage (hors MEDIA_ROOT, sur le même disque pour un simple
+# renommage en fin d'envoi) et délai avant purge d'un envoi inactif (secondes)
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_MAX_SIZE = 500 * 1024 * 1024
+UPLOAD_TEMP_DIR = os.environ.get('UPLOAD_TEMP_DIR', str(BASE_DIR / 'tmp' / 'uploads'))
+UPLOAD_SESSION_TTL = 86400
+
+# Délai (secondes) avant la suppression d'un fichier dédupliqué qui n'est plus référencé
+# (mediafiles.blobs) : couvre l'écart entre l'écriture du fichier et celle de l'objet
+MEDIA_GC_GRACE_SECONDS = 3600
+
+# Envoi des fichiers de MEDIA_URL (mediafiles.serving) : '' = par Django (développement),
+# 'x-accel-redirect' (nginx, location interne MEDIA_ACCEL_REDIRECT_PREFIX) ou 'x-sendfile'
+# (Apache mod_xsendfile, lighttpd) ; Django ne fait alors que le contrôle d'accès et les en-têtes
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Durée en cache (secondes) des décisions d'accès aux pièces jointes privées
+MEDIA_ACCESS_CACHE_TTL = 300
+
+# Rendus vidéo (mediafiles.videos) : binaire ffmpeg (nom dans le PATH ou chemin absolu ; absent,
+# les vidéos restent servies telles quelles), durée maximale d'un traitement (secondes, sous
+# JOBS_LOCK_TIMEOUT) et nombre de tentatives
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+VIDEO_TRANSCODE_TIMEOUT = 300
+VIDEO_TRANSCODE_MAX_ATTEMPTS = 3
+
+# ============================================================================
+# CONFIGURATION DE LA RECHERCHE
+# ============================================================================
+
+# Backend de recherche plein texte (search.backends) : 'postgresql' (tsvector + GIN, trigrammes),
+# 'sqlite' (FTS5) ou 'simple' (icontains) ; vide = déduit de la base utilisée
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', '')
+
+# Autocomplétion des utilisateurs (users.autocomplete) : durée en cache (secondes)
+# des correspondances d'un préfixe et des relations (amis, abonnements) de chaque utilisateur
+USER_SEARCH_CACHE_TTL = 60
+USER_CONNECTIONS_CACHE_TTL = 600
+
+# Ensemble des amis de chaque utilisateur (users.friendships), invalidé à chaque changement d'amitié
+FRIENDS_CACHE_TTL = 3600
+
+# Suggestions « Vous connaissez peut-être » (users.recommendations) conservées par utilisateur
+USER_SUGGESTIONS_TOP_K = 20
+
+# ============================================================================
+# CONFIGURATION DU FIL PERSONNALISÉ (abonnements)
+# ============================================================================
+
+# Au-delà de ce nombre d'abonnés, les posts d'un auteur (ou d'un thème) ne sont plus
+# recopiés dans le fil de chaque abonné : ils sont lus à la demande (fan-out à la lecture)
+TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.environ.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 5000))
+
+# Posts recopiés par auteur ou par thème à chaque nouvel abonnement (et par backfill_timelines)
+TIMELINE_BACKFILL_POSTS = 50
+
+# ============================================================================
+# CONFIGURATION DU CHAT
+# ============================================================================
+
+# Durée de vie (secondes) de la sidebar du chat en cache, invalidée à chaque nouveau message
+CHAT_SIDEBAR_CACHE_TTL = 300
+
+# Compteurs de non lus (badges) : 'memory', 'cache' (cache Django) ou 'redis'
+UNREAD_COUNTERS_BACKEND = os.environ.get('UNREAD_COUNTERS_BACKEND', 'redis' if USE_REDIS else 'cache')
+UNREAD_COUNTERS_REDIS_URL = os.environ.get(
+    'REDIS_URL',
+    f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:{os.environ.get('REDIS_PORT', 6379)}/0"
+)
+UNREAD_COUNTERS_TTL = 86400  # Recalcul au moins une fois par jour
+
+# ============================================================================
+# CONFIGURATION DES TÂCHES DE FOND
+# ============================================================================
+
+# Exécuter les effets de bord (notifications de masse...) dans un thread de fond
+# Mettre à False pour les exécuter de façon synchrone (tests, débogage)
+TASKS_RUN_ASYNC = os.environ.get('TASKS_RUN_ASYNC', 'True').lower() == 'true'
+
+# File de tâches persistante (app jobs), exécutée par : python manage.py run_jobs --workers N
+# Si JOBS_DISPATCH_LOCAL vaut True, le processus web exécute aussi les tâches juste après
+# le commit (fonctionne sans worker en développement) ; par défaut seulement avec DEBUG :
+# en production, les tâches ne retardent pas les requêtes et sont laissées aux workers
+JOBS_DISPATCH_LOCAL = os.environ.get('JOBS_DISPATCH_LOCAL', str(DEBUG)).lower() == 'true'
+# Tâches longues jamais exécutées par le processus web, même avec JOBS_DISPATCH_LOCAL :
+# elles occuperaient son unique thread de fond devant les notifications
+JOBS_LOCAL_EXCLUDED = [
+    'mediafiles.tasks.transcode_video',
+]
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+JOBS_RETRY_BASE_DELAY = 10  # secondes, doublé à chaque nouvelle tentative
+JOBS_LOCK_TIMEOUT = 600  # secondes avant qu'une tâche 'running' abandonnée soit relancée
+JOBS_RETENTION_DAYS = 7
+
+# Tâches périodiques planifiées par les workers : {chemin de la tâche: intervalle en secondes}
+JOBS_PERIODIC = {
+    'stories.tasks.delete_expired_stories': 3600,
+    'jobs.tasks.purge_finished_jobs': 86400,
+    'chat.tasks.reconcile_unread_counters': 3600,
+    'notifications.tasks.reconcile_unread_counters': 3600,
+    'users.tasks.refresh_suggestions': 86400,
+    'mediafiles.tasks.purge_upload_sessions': 3600,
+    'mediafiles.tasks.collect_media_garbage': 3600,
+}
+
 # ============================================================================
 # CONFIGURATION DE SÉCURITÉ (Production)
 # ============================================================================
@@ -0,0 +1,67 @@
+"""
+File de tâches locale (in-process) pour Kongossa
+
+Permet d'exécuter les effets de bord coûteux (notifications de masse, etc.)
+hors du cycle requête/réponse, sans Redis ni Celery : les tâches sont
+exécutées par un thread de fond du processus, après le commit de la
+transaction courante.
+
+Si TASKS_RUN_ASYNC vaut False (tests, commandes de gestion) ou si le thread
+ne peut pas être démarré, la tâche est exécutée de façon synchrone.
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _run(func, args, kwargs):
+    """Exécuter une tâche en journalisant les erreurs (une tâche ne doit jamais casser l'appelant)"""
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Échec de la tâche %s', getattr(func, '__name__', func))
+
+
+def _worker_loop():
+    while True:
+        func, args, kwargs = _queue.get()
+        close_old_connections()
+        try:
+            _run(func, args, kwargs)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def _ensure_worker():
+    """Démarrer le thread de fond à la première tâche, retourne False en cas d'échec"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            try:
+                _worker = threading.Thread(target=_worker_loop, name='kongossa-tasks', daemon=True)
+                _worker.start()
+            except RuntimeError:
+                _worker = None
+                return False
+    return True
+
+
+def enqueue(func, *args, **kwargs):
+    """Planifier func(*args, **kwargs) après le commit de la transaction courante"""
+    def dispatch():
+        if getattr(settings, 'TASKS_RUN_ASYNC', True) and _ensure_worker():
+            _queue.put((func, args, kwargs))
+        else:
+            _run(func, args, kwargs)
+
+    transaction.on_commit(dispatch)
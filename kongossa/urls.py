@@ -12,14 +12,17 @@ Structure des routes :
 - /chat/ : Application Chat (conversations, messages, appels)
 - /stories/ : Application Stories (stories éphémères)
 - /notifications/ : Application Notifications
+- /search/ : Recherche plein texte (API)
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from mediafiles.views import serve_media
+
 # ============================================================================
 # ROUTES PRINCIPALES
 # ============================================================================
@@ -45,15 +48,24 @@ urlpatterns = [
     
     # Application Notifications
     path('notifications/', include('notifications.urls')),
+    
+    # Recherche plein texte (posts, groupes, thèmes, utilisateurs)
+    path('search/', include('search.urls')),
+    
+    # Envois de fichiers reprenables, par morceaux (vidéos, audios)
+    path('uploads/', include('mediafiles.urls')),
+
+    # Fichiers média : contrôle d'accès (messages privés), ETag, Range ; envoi délégué
+    # au serveur web en production (MEDIA_SENDFILE)
+    re_path(r'^{}(?P<path>.+)$'.format(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
 ]
 
 # ============================================================================
-# CONFIGURATION DES FICHIERS MÉDIA ET STATIQUES (développement uniquement)
+# CONFIGURATION DES FICHIERS STATIQUES (développement uniquement)
 # ============================================================================
 
-# En développement, servir les fichiers média et statiques directement depuis Django
+# En développement, servir les fichiers statiques directement depuis Django
 # En production, utiliser Nginx ou un CDN pour servir ces fichiers
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
@@ -0,0 +1,25 @@
+from django.contrib import admin
+from .models import MediaBlob, MediaReference, UploadSession
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'filename', 'size', 'status', 'created_at', 'completed_at']
+    list_filter = ['status']
+    search_fields = ['filename', 'user__username', 'sha256']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at']
+
+
+class MediaReferenceInline(admin.TabularInline):
+    model = MediaReference
+    extra = 0
+    readonly_fields = ['model', 'object_id', 'field']
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'ref_count', 'released_at', 'created_at']
+    list_filter = ['ref_count']
+    search_fields = ['name', 'sha256']
+    readonly_fields = ['name', 'sha256', 'size', 'ref_count', 'released_at', 'created_at']
+    inlines = [MediaReferenceInline]
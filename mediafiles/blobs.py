@@ -0,0 +1,173 @@
+"""
+Références et ramasse-miettes des fichiers dédupliqués (voir mediafiles.storage)
+
+Chaque champ fichier d'un objet qui pointe vers un blob est une MediaReference ;
+MediaBlob.ref_count en est le nombre, tenu à jour dans la transaction qui
+enregistre ou supprime l'objet (mediafiles.signals). Un blob sans référence
+depuis MEDIA_GC_GRACE_SECONDS (story expirée, message supprimé, avatar remplacé)
+est supprimé avec ses déclinaisons et rendus vidéo par collect_garbage, planifiée
+chaque heure.
+
+Le délai de grâce couvre l'intervalle entre l'écriture du fichier et
+l'enregistrement de l'objet qui le référence.
+"""
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.core.files import File
+from django.db.models import F
+from django.utils import timezone
+
+from .images import delete_variants
+from .models import MediaBlob, MediaReference
+from .storage import is_blob
+from .videos import STATUS_FIELD, delete_renditions
+
+logger = logging.getLogger(__name__)
+
+# Modèles dont les champs FileField/ImageField sont suivis
+MEDIA_MODELS = ('users.User', 'forum.Post', 'forum.Group', 'forum.GroupMessage', 'chat.Message', 'stories.Story')
+
+
+def media_fields(model):
+    return [field.name for field in model._meta.get_fields() if isinstance(field, models.FileField)]
+
+
+def tracked_models():
+    """[(modèle, [champs fichier])]"""
+    return [(model, media_fields(model)) for model in map(apps.get_model, MEDIA_MODELS)]
+
+
+def _grace():
+    return getattr(settings, 'MEDIA_GC_GRACE_SECONDS', 3600)
+
+
+def register_blob(name, sha256, size):
+    """Créer la ligne du blob (sans référence) ; un blob déjà connu repousse sa collecte"""
+    blob, created = MediaBlob.objects.get_or_create(
+        name=name, defaults={'sha256': sha256, 'size': size, 'released_at': timezone.now()}
+    )
+    if not created and blob.ref_count <= 0:
+        MediaBlob.objects.filter(id=blob.id, ref_count__lte=0).update(released_at=timezone.now())
+    return blob
+
+
+def _acquire(blob_id):
+    MediaBlob.objects.filter(id=blob_id).update(ref_count=F('ref_count') + 1, released_at=None)
+
+
+def _release(blob_ids):
+    if blob_ids:
+        MediaBlob.objects.filter(id__in=blob_ids).update(ref_count=F('ref_count') - 1, released_at=timezone.now())
+
+
+def sync_references(instance, fields, created=False):
+    """Aligner les références de l'objet sur la valeur de ses champs fichier"""
+    label = instance._meta.label
+    names = {field: getattr(instance, field).name or '' for field in fields}
+    existing = {} if created else {
+        reference.field: reference
+        for reference in MediaReference.objects.filter(model=label, object_id=instance.pk, field__in=fields)
+    }
+    blob_names = [name for name in names.values() if is_blob(name)]
+    if not blob_names and not existing:
+        return
+    blob_ids = dict(MediaBlob.objects.filter(name__in=blob_names).values_list('name', 'id'))
+
+    released = []
+    for field, name in names.items():
+        blob_id = blob_ids.get(name)
+        reference = existing.get(field)
+        if reference and reference.blob_id == blob_id:
+            continue
+        if reference:
+            reference.delete()
+            released.append(reference.blob_id)
+        if blob_id:
+            try:
+                with transaction.atomic():
+                    MediaReference.objects.create(blob_id=blob_id, model=label, object_id=instance.pk, field=field)
+            except IntegrityError:
+                continue  # Déjà enregistrée par une sauvegarde concurrente
+            _acquire(blob_id)
+    _release(released)
+
+
+def release_references(instance):
+    """Objet supprimé : libérer tous ses fichiers"""
+    references = MediaReference.objects.filter(model=instance._meta.label, object_id=instance.pk)
+    blob_ids = list(references.values_list('blob_id', flat=True))
+    if blob_ids:
+        references.delete()
+        _release(blob_ids)
+
+
+def delete_media(storage, name):
+    """Fichier devenu inutile : les blobs sont laissés au ramasse-miettes, les autres supprimés"""
+    if not name or is_blob(name):
+        return
+    storage.delete(name)
+    delete_variants(storage, name)
+    delete_renditions(storage, name)
+
+
+def collect_garbage(storage, batch_size=500):
+    """Supprimer les blobs sans référence depuis le délai de grâce ; retourne le nombre de blobs supprimés"""
+    cutoff = timezone.now() - timedelta(seconds=_grace())
+    deleted = 0
+    last_id = 0
+    while True:
+        candidates = list(MediaBlob.objects.filter(
+            ref_count__lte=0, released_at__lt=cutoff, id__gt=last_id
+        ).order_by('id').values_list('id', 'name')[:batch_size])
+        if not candidates:
+            return deleted
+        last_id = candidates[-1][0]
+        for blob_id, name in candidates:
+            # Suppression conditionnelle : un blob référencé entre-temps est conservé
+            removed, _ = MediaBlob.objects.filter(
+                id=blob_id, ref_count__lte=0, released_at__lt=cutoff, references__isnull=True
+            ).delete()
+            if not removed:
+                continue
+            try:
+                storage.delete(name)
+                delete_variants(storage, name)
+                delete_renditions(storage, name)
+            except Exception:
+                logger.exception('Impossible de supprimer le blob %s', name)
+            deleted += 1
+
+
+def deduplicate_existing(storage, batch_size=200):
+    """Ranger les fichiers envoyés avant la déduplication sous leur empreinte ; retourne (fichiers, octets traités)"""
+    moved, processed = 0, 0
+    for model, fields in tracked_models():
+        for field in fields:
+            last_id = 0
+            while True:
+                rows = list(model.objects.filter(pk__gt=last_id).exclude(**{field: ''}).exclude(
+                    **{f'{field}__isnull': True}
+                ).exclude(**{f'{field}__startswith': 'blobs/'}).order_by('pk').values_list('pk', field)[:batch_size])
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for pk, name in rows:
+                    if not storage.exists(name):
+                        continue
+                    size = storage.size(name)
+                    with storage.open(name, 'rb') as source:
+                        new_name = storage.save(name, File(source, name=name))
+                    changes = {field: new_name}
+                    if field == 'video' and hasattr(model, STATUS_FIELD):
+                        changes[STATUS_FIELD] = ''  # Rendus à refaire sous le nouveau nom (transcode_videos)
+                    with transaction.atomic():
+                        model.objects.filter(pk=pk).update(**changes)
+                        sync_references(model(pk=pk, **{field: new_name}), [field])
+                    delete_media(storage, name)
+                    moved += 1
+                    processed += size
+    return moved, processed
@@ -0,0 +1,222 @@
+"""
+Déclinaisons d'images (miniatures WebP et JPEG) pour Kongossa
+
+Chaque image envoyée (avatar, bannière, post, story, message) est conservée telle
+quelle ; ses déclinaisons sont enregistrées à côté de l'original, dans le même
+stockage :
+
+    posts/photo.jpg  →  posts/variants/photo.jpg.640.webp, posts/variants/photo.jpg.640.jpg, ...
+
+Les largeurs dépendent de l'usage (VARIANTS). Les déclinaisons sont produites par
+la tâche mediafiles.tasks.generate_image_variants, planifiée à l'envoi
+(mediafiles.signals) ou au premier affichage d'une image qui n'en a pas encore.
+Tant qu'elles n'existent pas, les URL retombent sur l'original : l'affichage ne
+bloque jamais sur Pillow.
+
+    {% load media_tags %}
+    <img src="{% image_url user.avatar 'avatar' 128 %}">
+    {% picture post.image 'feed' sizes='(max-width: 640px) 100vw, 640px' class='w-full' %}
+
+    from mediafiles.images import image_url
+    payload['sender_avatar'] = image_url(msg.sender.avatar, 'avatar', 128)
+"""
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+# Largeurs (px) produites pour chaque usage ; les avatars sont recadrés en carré
+VARIANTS = {
+    'avatar': (64, 128),
+    'feed': (640, 1080),
+    'story': (720, 1080),
+    'banner': (640, 1280, 1920),
+}
+SQUARE_KINDS = {'avatar'}
+FORMATS = ('webp', 'jpeg')
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+# Champs image concernés : (modèle, champ) → usage
+IMAGE_FIELDS = {
+    ('users.User', 'avatar'): 'avatar',
+    ('users.User', 'banner'): 'banner',
+    ('forum.Post', 'image'): 'feed',
+    ('forum.GroupMessage', 'image'): 'feed',
+    ('chat.Message', 'image'): 'feed',
+    ('stories.Story', 'image'): 'story',
+}
+
+# Formats laissés tels quels (animations, vectoriel)
+SKIPPED_EXTENSIONS = {'.gif', '.svg'}
+
+READY = 'ready'
+ORIGINAL = 'original'  # Pas de déclinaison possible : servir l'original
+PENDING = 'pending'  # Déclinaisons absentes au dernier contrôle (mis en cache brièvement)
+
+
+def _quality():
+    return getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+
+
+def _state_ttl():
+    return getattr(settings, 'IMAGE_VARIANTS_CACHE_TTL', 86400)
+
+
+def _pending_ttl():
+    return getattr(settings, 'IMAGE_VARIANTS_PENDING_TTL', 60)
+
+
+def variant_name(name, width, fmt):
+    """Nom de stockage d'une déclinaison de l'original name"""
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'variants', f'{filename}.{width}.{EXTENSIONS[fmt]}')
+
+
+def _digest(name):
+    return hashlib.sha1(name.encode()).hexdigest()
+
+
+def _state_key(name):
+    return f'mediafiles:variants:{_digest(name)}'
+
+
+def _skipped(name):
+    return posixpath.splitext(name)[1].lower() in SKIPPED_EXTENSIONS
+
+
+def variants_state(field_file, kind):
+    """READY, ORIGINAL, ou None si les déclinaisons restent à produire (mis en cache)"""
+    name = field_file.name
+    if _skipped(name):
+        return ORIGINAL
+    key = _state_key(name)
+    state = cache.get(key)
+    if state is None:
+        # Une seule vérification sur le stockage, puis le cache répond ; l'absence n'est retenue
+        # que brièvement, le temps que la tâche produise les déclinaisons (ou échoue)
+        if field_file.storage.exists(variant_name(name, VARIANTS[kind][-1], 'jpeg')):
+            state = READY
+            cache.set(key, state, _state_ttl())
+        else:
+            state = PENDING
+            cache.set(key, state, _pending_ttl())
+    return None if state == PENDING else state
+
+
+def request_variants(field_file, kind):
+    """Planifier la production des déclinaisons (une seule fois par image)"""
+    from jobs.queue import enqueue
+    name = field_file.name
+    if not cache.add(_state_key(name) + ':queued', 1, 3600):
+        return
+    enqueue('mediafiles.tasks.generate_image_variants', name, kind,
+            idempotency_key=f'image_variants:{kind}:{_digest(name)}')
+
+
+def _ready(field_file, kind):
+    if not field_file:
+        return False
+    state = variants_state(field_file, kind)
+    if state is None:
+        request_variants(field_file, kind)
+    return state == READY
+
+
+def image_url(field_file, kind, width=None, fmt='webp'):
+    """URL de la déclinaison (la plus large de l'usage par défaut), ou de l'original si elle manque"""
+    if not field_file:
+        return ''
+    if not _ready(field_file, kind):
+        return field_file.url
+    width = width or VARIANTS[kind][-1]
+    return field_file.storage.url(variant_name(field_file.name, width, fmt))
+
+
+def image_srcset(field_file, kind, fmt='webp'):
+    """Attribut srcset (« url 640w, url 1080w ») ; vide si les déclinaisons manquent"""
+    if not _ready(field_file, kind):
+        return ''
+    storage = field_file.storage
+    return ', '.join(
+        f'{storage.url(variant_name(field_file.name, width, fmt))} {width}w' for width in VARIANTS[kind]
+    )
+
+
+def _resize(image, width, square):
+    from PIL import Image, ImageOps
+    if square:
+        size = min(width, image.width, image.height)
+        return ImageOps.fit(image, (size, size), Image.LANCZOS)
+    if image.width <= width:
+        return image  # Jamais d'agrandissement
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def _encode(image, fmt):
+    from PIL import Image
+    buffer = BytesIO()
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if fmt == 'jpeg':
+        if has_alpha:
+            # Transparence aplatie sur fond blanc
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=_quality(), optimize=True, progressive=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        image.save(buffer, 'WEBP', quality=_quality(), method=4)
+    return buffer.getvalue()
+
+
+def generate_variants(storage, name, kind):
+    """Produire toutes les déclinaisons de l'image name ; retourne l'état final (READY ou ORIGINAL)"""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    key = _state_key(name)
+    if _skipped(name) or not storage.exists(name):
+        cache.set(key, ORIGINAL, _state_ttl())
+        return ORIGINAL
+    try:
+        with storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        logger.warning('Image illisible, déclinaisons ignorées : %s', name)
+        cache.set(key, ORIGINAL, _state_ttl())
+        return ORIGINAL
+
+    # La plus grande largeur en dernier : son existence signale des déclinaisons complètes
+    for width in sorted(VARIANTS[kind]):
+        resized = _resize(image, width, kind in SQUARE_KINDS)
+        for fmt in FORMATS:
+            target = variant_name(name, width, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(_encode(resized, fmt)))
+    cache.set(key, READY, _state_ttl())
+    return READY
+
+
+def delete_variants(storage, name):
+    """Supprimer les déclinaisons d'un original supprimé"""
+    if not name or _skipped(name):
+        return
+    widths = {width for kind_widths in VARIANTS.values() for width in kind_widths}
+    for width in widths:
+        for fmt in FORMATS:
+            target = variant_name(name, width, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+    cache.delete(_state_key(name))
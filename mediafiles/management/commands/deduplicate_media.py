@@ -0,0 +1,19 @@
+"""
+Commande pour ranger les fichiers déjà envoyés dans le stockage dédupliqué (mediafiles.storage)
+À lancer une fois après la mise en place de ContentAddressedStorage : les nouveaux envois y vont
+directement, les anciens fichiers restent sinon servis sous leur chemin d'origine
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from mediafiles.blobs import deduplicate_existing
+
+
+class Command(BaseCommand):
+    help = 'Range les fichiers média existants sous leur empreinte SHA-256 (déduplication)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Nombre d\'objets lus par requête')
+
+    def handle(self, *args, **options):
+        moved, processed = deduplicate_existing(default_storage, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {moved} fichier(s) dédupliqué(s), {processed} octet(s) traités'))
@@ -0,0 +1,31 @@
+"""
+Commande pour planifier le traitement des vidéos sans rendu (mediafiles.videos)
+À lancer après l'installation de ffmpeg (vidéos restées 'original'), après deduplicate_media,
+ou pour les vidéos envoyées avant la mise en place des rendus
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from mediafiles.videos import FAILED, ORIGINAL, STATUS_FIELD, VIDEO_FIELDS, ffmpeg_binary, request_transcode
+
+
+class Command(BaseCommand):
+    help = 'Planifie les rendus H.264 et les affiches des vidéos qui n\'en ont pas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Reprendre aussi les vidéos en échec')
+
+    def handle(self, *args, **options):
+        if not ffmpeg_binary():
+            self.stdout.write(self.style.WARNING('⚠️ ffmpeg introuvable (FFMPEG_BINARY) : les vidéos resteront servies telles quelles'))
+        statuses = ['', ORIGINAL] + ([FAILED] if options['retry_failed'] else [])
+        total = 0
+        for model_label, field_name in VIDEO_FIELDS:
+            model = apps.get_model(model_label)
+            queryset = model.objects.filter(**{f'{STATUS_FIELD}__in': statuses}).exclude(
+                Q(**{field_name: ''}) | Q(**{f'{field_name}__isnull': True})
+            ).only('pk', field_name, STATUS_FIELD)
+            for instance in queryset.iterator():
+                request_transcode(instance, force=True)
+                total += 1
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} vidéo(s) planifiée(s)'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:35
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Type MIME')),
+                ('size', models.BigIntegerField(verbose_name='Taille (octets)')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='Taille des morceaux')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('status', models.CharField(choices=[('pending', 'En cours'), ('complete', 'Terminé'), ('attached', 'Rattaché'), ('failed', 'Échoué')], default='pending', max_length=20, verbose_name='Statut')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé le')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Envoi de fichier',
+                'verbose_name_plural': 'Envois de fichiers',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='mediafiles_upload_purge_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mediafiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Nom de stockage')),
+                ('sha256', models.CharField(db_index=True, max_length=64, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Taille (octets)')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='Références')),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Sans référence depuis')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Fichier dédupliqué',
+                'verbose_name_plural': 'Fichiers dédupliqués',
+                'indexes': [models.Index(fields=['ref_count', 'released_at'], name='mediafiles_blob_gc_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MediaReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Modèle')),
+                ('object_id', models.BigIntegerField(verbose_name='Objet')),
+                ('field', models.CharField(max_length=50, verbose_name='Champ')),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='references', to='mediafiles.mediablob')),
+            ],
+            options={
+                'verbose_name': 'Référence de fichier',
+                'verbose_name_plural': 'Références de fichiers',
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id', 'field'), name='mediafiles_reference_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,103 @@
+"""
+Modèles pour les fichiers média Kongossa
+"""
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+# État du traitement des vidéos (champ video_status de Post, Story, Message, GroupMessage ;
+# voir mediafiles.videos)
+VIDEO_STATUS_CHOICES = [
+    ('', 'Aucune vidéo'),
+    ('pending', 'En attente'),
+    ('processing', 'En cours'),
+    ('ready', 'Prête'),
+    ('original', 'Originale'),  # Pas de ffmpeg : la vidéo est servie telle quelle
+    ('failed', 'Échec'),
+]
+
+
+class UploadSession(models.Model):
+    """Envoi de fichier découpé en morceaux, reprenable (voir mediafiles.uploads)"""
+    STATUS_CHOICES = [
+        ('pending', 'En cours'),
+        ('complete', 'Terminé'),
+        ('attached', 'Rattaché'),
+        ('failed', 'Échoué'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Type MIME")
+    size = models.BigIntegerField(verbose_name="Taille (octets)")
+    chunk_size = models.PositiveIntegerField(verbose_name="Taille des morceaux")
+    # Empreinte annoncée par le client (optionnelle), remplacée par celle calculée à l'assemblage
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name="SHA-256")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True, verbose_name="Terminé le")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Envoi de fichier"
+        verbose_name_plural = "Envois de fichiers"
+        indexes = [
+            # Purge des envois abandonnés ou déjà rattachés
+            models.Index(fields=['status', 'updated_at'], name='mediafiles_upload_purge_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.get_status_display()})"
+
+    @property
+    def total_chunks(self):
+        return max((self.size + self.chunk_size - 1) // self.chunk_size, 1)
+
+    def chunk_length(self, index):
+        """Taille attendue du morceau index (le dernier peut être plus court)"""
+        if index < self.total_chunks - 1:
+            return self.chunk_size
+        return self.size - self.chunk_size * (self.total_chunks - 1)
+
+
+class MediaBlob(models.Model):
+    """Fichier stocké une seule fois sous son empreinte SHA-256 (voir mediafiles.storage)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Nom de stockage")
+    sha256 = models.CharField(max_length=64, db_index=True, verbose_name="SHA-256")
+    size = models.BigIntegerField(default=0, verbose_name="Taille (octets)")
+    # Nombre de MediaReference ; à zéro depuis released_at, le fichier est collecté (mediafiles.blobs)
+    ref_count = models.IntegerField(default=0, verbose_name="Références")
+    released_at = models.DateTimeField(blank=True, null=True, verbose_name="Sans référence depuis")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Fichier dédupliqué"
+        verbose_name_plural = "Fichiers dédupliqués"
+        indexes = [
+            # Ramasse-miettes : fichiers sans référence depuis le plus longtemps
+            models.Index(fields=['ref_count', 'released_at'], name='mediafiles_blob_gc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} réf.)"
+
+
+class MediaReference(models.Model):
+    """Champ fichier d'un objet (ex. chat.Message #12, video) qui pointe vers un MediaBlob"""
+    blob = models.ForeignKey(MediaBlob, on_delete=models.CASCADE, related_name='references')
+    model = models.CharField(max_length=100, verbose_name="Modèle")  # Label, ex: 'chat.Message'
+    object_id = models.BigIntegerField(verbose_name="Objet")
+    field = models.CharField(max_length=50, verbose_name="Champ")
+
+    class Meta:
+        verbose_name = "Référence de fichier"
+        verbose_name_plural = "Références de fichiers"
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id', 'field'], name='mediafiles_reference_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}.{self.field} → {self.blob.name}"
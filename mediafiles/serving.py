@@ -0,0 +1,184 @@
+"""
+Service des fichiers média (MEDIA_URL) : contrôle d'accès, cache HTTP, Range et délégation au serveur web
+
+- Accès : les pièces jointes des conversations et des groupes ne sont servies
+  qu'à leurs participants ; un blob dédupliqué est public dès qu'un objet public
+  (post, story, avatar...) le référence, privé sinon (voir can_read).
+- Cache : ETag (empreinte SHA-256 lue dans le nom des blobs ; taille et date de
+  modification pour les autres fichiers, sans relire leur contenu),
+  If-None-Match → 304. Les blobs ne changent jamais sous un même nom :
+  Cache-Control immutable d'un an.
+- Range : une plage par requête (206, Content-Range), lue par blocs sans charger
+  le fichier ; If-Range respecté ; 416 si la plage est hors du fichier.
+- MEDIA_SENDFILE = 'x-accel-redirect' (nginx) ou 'x-sendfile' (Apache, lighttpd) :
+  Django ne fait que le contrôle d'accès et les en-têtes, le serveur web envoie
+  le fichier (et gère lui-même les plages).
+"""
+import hashlib
+import mimetypes
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .storage import BLOB_DIR, DERIVED_DIR, is_blob
+
+PRIVATE_PREFIXES = {'messages/': 'chat.Message', 'group_messages/': 'forum.GroupMessage'}
+PRIVATE_MODELS = set(PRIVATE_PREFIXES.values())
+IMMUTABLE_MAX_AGE = 31536000
+DEFAULT_MAX_AGE = 86400
+INLINE_TYPES = ('image/', 'video/', 'audio/')
+READ_BLOCK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _access_ttl():
+    return getattr(settings, 'MEDIA_ACCESS_CACHE_TTL', 300)
+
+
+def original_name(name):
+    """Nom du fichier source d'un fichier dérivé (dir/variants/fichier.ext.640.webp → dir/fichier.ext)"""
+    parts = name.split('/')
+    if DERIVED_DIR not in parts[:-1]:
+        return name
+    index = len(parts) - 2 - parts[::-1][1:].index(DERIVED_DIR)
+    filename = parts[-1]
+    for _ in range(2):  # Largeur (ou nom du rendu) puis extension
+        filename = posixpath.splitext(filename)[0]
+    return '/'.join(parts[:index] + [filename])
+
+
+def _private_ids(name):
+    """{label: [ids]} des objets privés qui référencent le fichier ; None si un objet public le référence"""
+    from .models import MediaReference
+    if is_blob(name):
+        references = list(MediaReference.objects.filter(blob__name=name).values_list('model', 'object_id'))
+        if not references or any(label not in PRIVATE_MODELS for label, _ in references):
+            return None if references else {}
+        private = {}
+        for label, object_id in references:
+            private.setdefault(label, []).append(object_id)
+        return private
+
+    for prefix, label in PRIVATE_PREFIXES.items():
+        if name.startswith(prefix):
+            # Anciens fichiers (hors blobs/) : recherche sur les champs fichier du modèle
+            from django.apps import apps
+            from .blobs import media_fields
+            model = apps.get_model(label)
+            lookup = Q()
+            for field in media_fields(model):
+                lookup |= Q(**{field: name})
+            return {label: list(model.objects.filter(lookup).values_list('id', flat=True))}
+    return None
+
+
+def _user_can_read(user, private):
+    from chat.models import Message
+    from forum.models import GroupMessage
+    if private.get('chat.Message') and Message.objects.filter(
+        id__in=private['chat.Message'], conversation__participants=user
+    ).exists():
+        return True
+    if private.get('forum.GroupMessage') and GroupMessage.objects.filter(
+        Q(group__creator=user) | Q(group__members=user), id__in=private['forum.GroupMessage']
+    ).exists():
+        return True
+    return False
+
+
+def can_read(request, name):
+    """(lecture autorisée, fichier privé)
+
+    Le caractère public d'un fichier est mis en cache par fichier, sans toucher à la
+    session (pas de Vary: Cookie sur les fichiers publics) ; pour un fichier privé,
+    seules les autorisations sont mises en cache : un même blob transféré dans une
+    nouvelle conversation est aussitôt lisible par ses participants.
+    """
+    source = original_name(name)
+    if not is_blob(source) and not any(source.startswith(prefix) for prefix in PRIVATE_PREFIXES):
+        return True, False  # Avatars, posts, stories, groupes : publics
+
+    digest = hashlib.sha1(source.encode()).hexdigest()
+    public_key = f'mediafiles:public:{digest}'
+    if cache.get(public_key):
+        return True, False
+    private = _private_ids(source)
+    if private is None:
+        cache.set(public_key, True, _access_ttl())
+        return True, False
+
+    user = request.user
+    if not user.is_authenticated:
+        return False, True
+    access_key = f'mediafiles:access:{user.id}:{digest}'
+    if cache.get(access_key):
+        return True, True
+    allowed = _user_can_read(user, private)
+    if allowed:
+        cache.set(access_key, True, _access_ttl())
+    return allowed, True
+
+
+def etag_for(name, stat):
+    """ETag : empreinte SHA-256 des blobs (leur nom), taille et date de modification sinon
+
+    Aucun fichier n'est relu : un rendu vidéo de plusieurs centaines de Mo ne retarde
+    pas le premier octet.
+    """
+    if is_blob(name) and DERIVED_DIR not in name.split('/'):
+        return '"{}"'.format(posixpath.splitext(posixpath.basename(name))[0])
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def cache_control(name, private):
+    scope = 'private' if private else 'public'
+    if name.startswith(BLOB_DIR + '/'):
+        return f'{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'{scope}, max-age={DEFAULT_MAX_AGE}'
+
+
+def content_type_for(name):
+    content_type, encoding = mimetypes.guess_type(name)
+    return content_type or 'application/octet-stream'
+
+
+def is_inline(content_type):
+    """Images, vidéos et audios s'affichent ; le reste est téléchargé (pas de HTML ou SVG exécuté)"""
+    return content_type.startswith(INLINE_TYPES) and content_type != 'image/svg+xml'
+
+
+def parse_range(header, size):
+    """(début, fin incluse) de l'en-tête Range ; None s'il est absent ou non géré, ValueError si hors fichier"""
+    match = RANGE_PATTERN.match((header or '').strip())
+    if not match:
+        return None  # Absent, plusieurs plages ou unité inconnue : réponse complète
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-N : les N derniers octets
+        length = int(end)
+        if length == 0:
+            raise ValueError('Plage vide')
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError('Plage hors du fichier')
+    return start, end
+
+
+def iter_range(path, start, end):
+    """Lecture par blocs des octets start..end (inclus)"""
+    remaining = end - start + 1
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while remaining > 0:
+            block = source.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                return
+            remaining -= len(block)
+            yield block
@@ -0,0 +1,81 @@
+"""
+Signaux des fichiers média : déclinaisons d'images et rendus vidéo planifiés dès l'envoi,
+références des fichiers dédupliqués (mediafiles.blobs)
+"""
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .blobs import release_references, sync_references, tracked_models
+from .images import IMAGE_FIELDS, request_variants, variants_state
+from .videos import PENDING, PROCESSING, READY, STATUS_FIELD, VIDEO_FIELDS, renditions_exist, request_transcode, set_status
+
+
+def _image_saved_receiver(field_name, kind):
+    def receiver(sender, instance, update_fields=None, **kwargs):
+        if update_fields is not None and field_name not in update_fields:
+            return
+        field_file = getattr(instance, field_name)
+        if field_file and variants_state(field_file, kind) is None:
+            transaction.on_commit(lambda: request_variants(field_file, kind))
+    return receiver
+
+
+for (model_label, field_name), kind in IMAGE_FIELDS.items():
+    post_save.connect(
+        _image_saved_receiver(field_name, kind),
+        sender=apps.get_model(model_label),
+        weak=False,
+        dispatch_uid=f'mediafiles:variants:{model_label}.{field_name}',
+    )
+
+
+def _video_saved_receiver(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None and 'video' not in update_fields:
+        return  # Ex. post.save(update_fields=['content'])
+    status = getattr(instance, STATUS_FIELD)
+    if not instance.video:
+        if status:
+            set_status(instance._meta.label, instance.pk, '')
+        return
+    if renditions_exist(default_storage, instance.video.name):
+        # Même contenu déjà traité (blob dédupliqué, message transféré)
+        if status != READY:
+            set_status(instance._meta.label, instance.pk, READY, instance.video.name)
+            setattr(instance, STATUS_FIELD, READY)
+        return
+    if created or status not in (PENDING, PROCESSING):
+        transaction.on_commit(lambda: request_transcode(instance))
+
+
+for model_label, field_name in VIDEO_FIELDS:
+    post_save.connect(
+        _video_saved_receiver,
+        sender=apps.get_model(model_label),
+        weak=False,
+        dispatch_uid=f'mediafiles:transcode:{model_label}.{field_name}',
+    )
+
+
+def _references_receiver(fields):
+    def receiver(sender, instance, created=False, update_fields=None, **kwargs):
+        if update_fields is not None and not set(fields) & set(update_fields):
+            return  # Ex. User.save(update_fields=['last_login'])
+        sync_references(instance, fields, created=created)
+    return receiver
+
+
+def _release_receiver(sender, instance, **kwargs):
+    release_references(instance)
+
+
+for model, fields in tracked_models():
+    post_save.connect(
+        _references_receiver(fields), sender=model, weak=False,
+        dispatch_uid=f'mediafiles:references:{model._meta.label}',
+    )
+    post_delete.connect(
+        _release_receiver, sender=model, weak=False,
+        dispatch_uid=f'mediafiles:release:{model._meta.label}',
+    )
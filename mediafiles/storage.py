@@ -0,0 +1,85 @@
+"""
+Stockage adressé par le contenu (déduplication des fichiers envoyés)
+
+Chaque fichier enregistré par un champ FileField/ImageField est haché (SHA-256)
+et stocké une seule fois sous son empreinte, quel que soit le champ d'origine :
+
+    messages/videos/clip.mp4, posts/videos/clip.mp4  →  blobs/3f/a9/3fa9…c2.mp4
+
+Un mème transféré dans dix conversations n'occupe donc qu'un fichier et n'est
+écrit qu'une fois. Les fichiers dérivés (déclinaisons d'images, rendus vidéo),
+dont le chemin contient un répertoire « variants », gardent leur nom tel quel.
+Les références et la suppression des fichiers inutilisés sont gérées par
+mediafiles.blobs ; les anciens fichiers (hors blobs/) restent servis normalement.
+
+    STORAGES = {'default': {'BACKEND': 'mediafiles.storage.ContentAddressedStorage'}, ...}
+"""
+import hashlib
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = 'blobs'
+DERIVED_DIR = 'variants'
+MAX_EXTENSION_LENGTH = 10
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_DIR + '/')
+
+
+def is_derived(name):
+    return DERIVED_DIR in name.split('/')[:-1]
+
+
+def blob_name(sha256, original_name):
+    """blobs/<2>/<2>/<empreinte><extension d'origine> (l'extension sert au type MIME)"""
+    extension = posixpath.splitext(original_name)[1].lower()
+    if len(extension) > MAX_EXTENSION_LENGTH or not extension[1:].isalnum():
+        extension = ''
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+
+
+def content_sha256(content):
+    """Empreinte du contenu, lu par blocs ; réutilise celle déjà calculée (envois par morceaux)"""
+    known = getattr(content, 'sha256', None)
+    if known:
+        return known
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage qui range chaque fichier sous son empreinte SHA-256"""
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom proposé par upload_to est remplacé par l'empreinte dans _save : inutile de
+        # chercher un nom libre (sauf pour les fichiers dérivés, enregistrés sous leur nom)
+        if is_derived(name) or is_blob(name):
+            return super().get_available_name(name, max_length)
+        return name
+
+    def _save(self, name, content):
+        if is_derived(name):
+            return super()._save(name, content)
+
+        from .blobs import register_blob
+
+        sha256 = content_sha256(content)
+        target = blob_name(sha256, name)
+        if self.exists(target):
+            # Déjà stocké : aucune écriture (le fichier temporaire éventuel est purgé par ailleurs)
+            if hasattr(content, 'claim'):
+                content.claim()  # Envoi par morceaux (mediafiles.uploads.AssembledFile)
+            register_blob(target, sha256, content.size)
+            return target
+        # Deux envois simultanés du même contenu : le second reçoit un nom suffixé (non dédupliqué)
+        saved = super()._save(target, content)
+        register_blob(saved, sha256, content.size)
+        return saved
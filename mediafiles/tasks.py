@@ -0,0 +1,41 @@
+"""
+Tâches de fond des fichiers média
+"""
+from django.core.files.storage import default_storage
+
+from django.apps import apps
+
+from .blobs import collect_garbage
+from .images import generate_variants
+from .uploads import purge_stale_sessions
+from .videos import PENDING, PROCESSING, set_status, transcode
+
+
+def generate_image_variants(name, kind):
+    """Produire les déclinaisons WebP/JPEG d'une image (voir mediafiles.images)"""
+    return generate_variants(default_storage, name, kind)
+
+
+def transcode_video(model_label, pk):
+    """Produire les rendus H.264 et l'affiche d'une vidéo, puis mettre à jour video_status (voir mediafiles.videos)"""
+    name = apps.get_model(model_label).objects.filter(pk=pk).values_list('video', flat=True).first()
+    if not name:
+        return None  # Objet supprimé ou vidéo retirée entre-temps
+    set_status(model_label, pk, PROCESSING, name)
+    try:
+        status = transcode(default_storage, name)
+    except Exception:
+        set_status(model_label, pk, PENDING, name)  # Nouvelle tentative planifiée par la file
+        raise
+    set_status(model_label, pk, status, name)
+    return status
+
+
+def purge_upload_sessions():
+    """Supprimer les envois abandonnés et leurs morceaux (planifiée chaque heure)"""
+    return purge_stale_sessions()
+
+
+def collect_media_garbage():
+    """Supprimer les fichiers dédupliqués qui ne sont plus référencés (planifiée chaque heure)"""
+    return collect_garbage(default_storage)
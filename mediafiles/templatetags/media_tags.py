@@ -0,0 +1,68 @@
+from django import template
+from django.utils.html import format_html
+
+from mediafiles.images import image_srcset, image_url as _image_url
+from mediafiles.videos import poster_url, video_url as _video_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_url(field_file, kind, width=None, fmt='webp'):
+    """URL de la déclinaison d'une image (l'original tant qu'elle n'existe pas)"""
+    return _image_url(field_file, kind, width, fmt)
+
+
+@register.simple_tag
+def picture(field_file, kind, sizes='100vw', alt='', **attrs):
+    """<picture> WebP avec repli JPEG ; les autres arguments deviennent des attributs de l'<img>
+
+    {% picture post.image 'feed' sizes='(max-width: 640px) 100vw, 640px' class='w-full' loading='lazy' %}
+    """
+    if not field_file:
+        return ''
+    extra = format_html(''.join(f' {name}="{{}}"' for name in attrs), *attrs.values())
+    webp_srcset = image_srcset(field_file, kind, 'webp')
+    if not webp_srcset:
+        return format_html('<img src="{}" alt="{}"{}>', field_file.url, alt, extra)
+    return format_html(
+        '<picture style="display: contents"><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{}></picture>',
+        webp_srcset, sizes,
+        _image_url(field_file, kind, fmt='jpeg'), image_srcset(field_file, kind, 'jpeg'), sizes, alt, extra,
+    )
+
+
+@register.simple_tag
+def video_url(field_file, status, rendition='main'):
+    """URL du rendu H.264 ('main' ou 'preview') d'une vidéo (l'original tant qu'il n'existe pas)"""
+    return _video_url(field_file, status, rendition)
+
+
+@register.simple_tag
+def video_poster(field_file, status):
+    """URL de l'affiche JPEG d'une vidéo ('' tant qu'elle n'existe pas)"""
+    return poster_url(field_file, status)
+
+
+@register.simple_tag
+def video(field_file, status, rendition='main', **attrs):
+    """<video> sur le rendu léger, avec affiche ; True donne un attribut booléen (controls, muted...)
+
+    {% video post.video post.video_status controls=True class='w-full' %}
+
+    Avec une affiche, rien n'est téléchargé avant la lecture (preload="none").
+    """
+    if not field_file:
+        return ''
+    poster = poster_url(field_file, status)
+    attrs.setdefault('preload', 'none' if poster else 'metadata')
+    if poster:
+        attrs.setdefault('poster', poster)
+    flags = [name for name, value in attrs.items() if value is True]
+    values = {name: value for name, value in attrs.items() if value not in (True, False, None)}
+    extra = format_html(''.join(f' {name}="{{}}"' for name in values), *values.values())
+    return format_html(
+        '<video src="{}"{}{}>Votre navigateur ne supporte pas la lecture de vidéos.</video>',
+        _video_url(field_file, status, rendition), extra, ''.join(f' {name}' for name in flags),
+    )
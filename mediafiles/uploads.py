@@ -0,0 +1,281 @@
+"""
+Envois de fichiers reprenables, par morceaux (vidéos, audios, gros fichiers)
+
+Le client ouvre une session, envoie chaque morceau par un PUT indépendant, puis
+demande l'assemblage :
+
+    POST /uploads/                      {filename, size, content_type, sha256?} → {id, chunk_size, total_chunks}
+    PUT  /uploads/<id>/chunks/<index>/  corps brut du morceau (X-Chunk-SHA256 optionnel)
+    GET  /uploads/<id>/                 morceaux reçus et manquants (reprise après coupure)
+    POST /uploads/<id>/complete/        assemblage, vérification de la taille et du SHA-256
+
+Chaque requête ne porte que UPLOAD_CHUNK_SIZE octets : aucun worker n'est occupé
+pendant toute la durée d'un envoi de plusieurs centaines de Mo, et une reprise ne
+renvoie que les morceaux manquants. Les morceaux sont écrits dans
+UPLOAD_TEMP_DIR/<id>/ (hors MEDIA_ROOT) ; leur présence sur disque fait foi.
+
+Un envoi terminé est ensuite référencé par les formulaires de création (post,
+story, message) à la place du fichier, via un champ <champ>_upload :
+
+    video = uploaded_file(request, 'video')  # request.FILES['video'] ou envoi terminé
+
+Le fichier assemblé est alors déplacé (et non recopié) vers l'emplacement
+habituel du champ (upload_to) lors de l'enregistrement du modèle.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import UploadSession
+
+COPY_BUFFER_SIZE = 1024 * 1024
+ASSEMBLED_NAME = 'assembled'
+
+
+class UploadError(Exception):
+    """Requête d'envoi invalide (le message est renvoyé au client)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def chunk_size():
+    return getattr(settings, 'UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+
+
+def max_upload_size():
+    return getattr(settings, 'UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+
+
+def _temp_root():
+    return Path(getattr(settings, 'UPLOAD_TEMP_DIR', Path(settings.BASE_DIR) / 'tmp' / 'uploads'))
+
+
+def session_dir(session):
+    return _temp_root() / str(session.id)
+
+
+def _chunk_path(session, index):
+    return session_dir(session) / f'{index:06d}'
+
+
+def assembled_path(session):
+    return session_dir(session) / ASSEMBLED_NAME
+
+
+def create_session(user, filename, size, content_type='', sha256=''):
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError('Nom de fichier manquant')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('Taille invalide')
+    if size <= 0:
+        raise UploadError('Fichier vide')
+    if size > max_upload_size():
+        raise UploadError('Fichier trop volumineux', status=413)
+    session = UploadSession.objects.create(
+        user=user, filename=filename[:255], content_type=(content_type or '')[:100],
+        size=size, chunk_size=chunk_size(), sha256=(sha256 or '').lower()[:64],
+    )
+    session_dir(session).mkdir(parents=True, exist_ok=True)
+    return session
+
+
+def received_chunks(session):
+    """Index des morceaux présents sur disque, triés"""
+    directory = session_dir(session)
+    if not directory.is_dir():
+        return []
+    return sorted(int(entry.name) for entry in directory.iterdir() if entry.name.isdigit())
+
+
+def missing_chunks(session):
+    received = set(received_chunks(session))
+    return [index for index in range(session.total_chunks) if index not in received]
+
+
+def write_chunk(session, index, stream, expected_sha256=''):
+    """Écrire un morceau depuis le flux de la requête (sans le charger en mémoire)
+
+    Le morceau est écrit dans un fichier temporaire puis renommé : un morceau
+    interrompu n'est jamais compté comme reçu. Renvoyer un morceau déjà reçu
+    le remplace (reprise idempotente).
+    """
+    if session.status != 'pending':
+        raise UploadError('Envoi déjà terminé', status=409)
+    if not 0 <= index < session.total_chunks:
+        raise UploadError('Index de morceau invalide')
+    expected_length = session.chunk_length(index)
+
+    directory = session_dir(session)
+    directory.mkdir(parents=True, exist_ok=True)
+    final_path = _chunk_path(session, index)
+    # Nom unique : deux envois simultanés du même morceau n'écrivent pas dans le même fichier
+    partial_path = directory / f'{index:06d}.{uuid.uuid4().hex}.part'
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(partial_path, 'wb') as target:
+            while written <= expected_length:
+                block = stream.read(min(COPY_BUFFER_SIZE, expected_length + 1 - written))
+                if not block:
+                    break
+                digest.update(block)
+                target.write(block)
+                written += len(block)
+        if written != expected_length:
+            raise UploadError(f'Morceau {index} : {written} octets reçus, {expected_length} attendus')
+        if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+            raise UploadError(f'Morceau {index} corrompu (SHA-256)')
+        os.replace(partial_path, final_path)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+    # Envoi toujours actif : repousse la purge des sessions abandonnées
+    UploadSession.objects.filter(id=session.id).update(updated_at=timezone.now())
+    return written
+
+
+def complete_session(session):
+    """Assembler les morceaux dans l'ordre en calculant le SHA-256 du fichier complet"""
+    if session.status == 'complete':
+        return session
+    if session.status != 'pending':
+        raise UploadError('Envoi déjà terminé', status=409)
+    missing = missing_chunks(session)
+    if missing:
+        raise UploadError(f'{len(missing)} morceau(x) manquant(s)', status=409)
+
+    digest = hashlib.sha256()
+    target_path = assembled_path(session)
+    try:
+        target = open(target_path, 'xb')
+    except FileExistsError:
+        raise UploadError('Assemblage déjà en cours', status=409)
+    try:
+        with target:
+            for index in range(session.total_chunks):
+                with open(_chunk_path(session, index), 'rb') as chunk:
+                    while True:
+                        block = chunk.read(COPY_BUFFER_SIZE)
+                        if not block:
+                            break
+                        digest.update(block)
+                        target.write(block)
+    except BaseException:
+        # Disque plein, morceau disparu... : le prochain essai doit pouvoir réassembler
+        target_path.unlink(missing_ok=True)
+        raise
+    for index in range(session.total_chunks):
+        _chunk_path(session, index).unlink()
+
+    sha256 = digest.hexdigest()
+    if session.sha256 and session.sha256 != sha256:
+        session.status = 'failed'
+        session.save(update_fields=['status', 'updated_at'])
+        shutil.rmtree(session_dir(session), ignore_errors=True)
+        raise UploadError('Fichier corrompu : SHA-256 différent de celui annoncé', status=422)
+    session.sha256 = sha256
+    session.status = 'complete'
+    session.completed_at = timezone.now()
+    session.save(update_fields=['sha256', 'status', 'completed_at', 'updated_at'])
+    return session
+
+
+class AssembledFile(File):
+    """Fichier assemblé, déplacé (et non recopié) par FileSystemStorage à l'enregistrement du modèle
+
+    Le fichier n'est ouvert qu'à la première lecture (le déplacement n'en a pas besoin) et
+    l'envoi n'est rattaché (claim) qu'au moment où le stockage le prend : un formulaire
+    refusé ou une erreur avant l'enregistrement laissent l'envoi réutilisable.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.content_type = session.content_type
+        self.sha256 = session.sha256  # Réutilisée par le stockage adressé par le contenu
+        self._file = None
+        self._claimed = False
+        super().__init__(None, name=session.filename)
+
+    @property
+    def file(self):
+        if self._file is None:
+            self._file = open(assembled_path(self.session), 'rb')
+        return self._file
+
+    @file.setter
+    def file(self, value):
+        self._file = value
+
+    @property
+    def size(self):
+        return self.session.size
+
+    @property
+    def closed(self):
+        return self._file is None or self._file.closed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def claim(self):
+        """Rattacher l'envoi (une seule fois : mise à jour conditionnelle) ; UploadError s'il l'est déjà"""
+        if self._claimed:
+            return
+        claimed = UploadSession.objects.filter(id=self.session.id, status='complete').update(
+            status='attached', updated_at=timezone.now()
+        )
+        if not claimed:
+            raise UploadError('Envoi déjà rattaché', status=409)
+        self._claimed = True
+
+    def temporary_file_path(self):
+        # Appelé par FileSystemStorage juste avant de déplacer le fichier
+        self.claim()
+        return str(assembled_path(self.session))
+
+
+def claim_upload(user, upload_id):
+    """Envoi terminé de l'utilisateur, sous forme d'AssembledFile ; None s'il n'est pas disponible"""
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        return None
+    session = UploadSession.objects.filter(id=upload_id, user=user, status='complete').first()
+    if session is None or not assembled_path(session).exists():
+        return None
+    return AssembledFile(session)
+
+
+def uploaded_file(request, field_name):
+    """Fichier du formulaire : request.FILES[field_name] ou l'envoi reprenable <field_name>_upload"""
+    upload = request.FILES.get(field_name)
+    if upload:
+        return upload
+    upload_id = request.POST.get(f'{field_name}_upload')
+    if upload_id:
+        return claim_upload(request.user, upload_id)
+    return None
+
+
+def purge_stale_sessions(max_age=None):
+    """Supprimer les envois abandonnés et les répertoires des envois rattachés ; retourne le nombre de sessions"""
+    max_age = max_age or getattr(settings, 'UPLOAD_SESSION_TTL', 86400)
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    stale = list(UploadSession.objects.filter(updated_at__lt=cutoff).values_list('id', flat=True))
+    for upload_id in stale:
+        shutil.rmtree(_temp_root() / str(upload_id), ignore_errors=True)
+    UploadSession.objects.filter(id__in=stale).delete()
+    return len(stale)
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'mediafiles'
+
+urlpatterns = [
+    path('', views.create_upload, name='create_upload'),
+    path('<uuid:upload_id>/', views.upload_status, name='upload_status'),
+    path('<uuid:upload_id>/chunks/<int:index>/', views.upload_chunk, name='upload_chunk'),
+    path('<uuid:upload_id>/complete/', views.complete_upload, name='complete_upload'),
+]
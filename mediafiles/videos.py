@@ -0,0 +1,193 @@
+"""
+Rendus vidéo (H.264 plafonné, aperçu basse définition, affiche JPEG) pour Kongossa
+
+Les vidéos envoyées (posts, stories, messages) sont conservées telles quelles ;
+un worker (python manage.py run_jobs) les passe dans ffmpeg et enregistre les
+rendus à côté de l'original, comme les déclinaisons d'images :
+
+    posts/videos/clip.mov  →  posts/videos/variants/clip.mov.1280.mp4   (H.264, 2 Mbit/s max)
+                              posts/videos/variants/clip.mov.426.mp4    (aperçu muet)
+                              posts/videos/variants/clip.mov.poster.jpg (affiche)
+
+Le champ video_status de l'objet suit le traitement (pending → processing →
+ready). Sans binaire ffmpeg (FFMPEG_BINARY), la vidéo passe à 'original' et reste
+servie telle quelle ; `python manage.py transcode_videos` la reprend une fois
+ffmpeg installé. Les gabarits servent le rendu léger dès qu'il est prêt :
+
+    {% load media_tags %}
+    {% video post.video post.video_status controls=True class='w-full' %}
+"""
+import logging
+import os
+import posixpath
+import shutil
+import subprocess
+import tempfile
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+
+logger = logging.getLogger(__name__)
+
+# Rendus H.264 : plus grand côté (px), débit vidéo maximal, son conservé
+RENDITIONS = {
+    'main': (1280, '2M', True),
+    'preview': (426, '400k', False),
+}
+POSTER_MAX_SIDE = 1280
+
+# Champs vidéo concernés : (modèle, champ)
+VIDEO_FIELDS = (
+    ('forum.Post', 'video'),
+    ('forum.GroupMessage', 'video'),
+    ('chat.Message', 'video'),
+    ('stories.Story', 'video'),
+)
+STATUS_FIELD = 'video_status'
+
+PENDING = 'pending'
+PROCESSING = 'processing'
+READY = 'ready'
+ORIGINAL = 'original'
+FAILED = 'failed'
+
+
+def _timeout():
+    # Doit rester sous JOBS_LOCK_TIMEOUT : au-delà, la tâche serait reprise par un autre worker
+    return getattr(settings, 'VIDEO_TRANSCODE_TIMEOUT', 300)
+
+
+def ffmpeg_binary():
+    """Chemin du binaire ffmpeg, None s'il est introuvable"""
+    return shutil.which(getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'))
+
+
+def rendition_name(name, rendition):
+    """Nom de stockage d'un rendu ('main', 'preview' ou 'poster') de la vidéo name"""
+    directory, filename = posixpath.split(name)
+    if rendition == 'poster':
+        return posixpath.join(directory, 'variants', f'{filename}.poster.jpg')
+    return posixpath.join(directory, 'variants', f'{filename}.{RENDITIONS[rendition][0]}.mp4')
+
+
+def video_url(field_file, status, rendition='main'):
+    """URL du rendu s'il est prêt, sinon de l'original"""
+    if not field_file:
+        return ''
+    if status != READY:
+        return field_file.url
+    return field_file.storage.url(rendition_name(field_file.name, rendition))
+
+
+def poster_url(field_file, status):
+    if not field_file or status != READY:
+        return ''
+    return field_file.storage.url(rendition_name(field_file.name, 'poster'))
+
+
+def _scale(max_side):
+    """Plus grand côté ramené à max_side (sans agrandissement), dimensions paires pour H.264"""
+    return (
+        f"scale='if(gte(iw,ih),trunc(min({max_side},iw)/2)*2,-2)'"
+        f":'if(gte(iw,ih),-2,trunc(min({max_side},ih)/2)*2)'"
+    )
+
+
+def ffmpeg_command(binary, source, outputs):
+    """Une seule lecture de la source pour tous les rendus ; outputs : {rendu: chemin}"""
+    command = [binary, '-nostdin', '-y', '-loglevel', 'error', '-i', source]
+    for rendition, (max_side, bitrate, audio) in RENDITIONS.items():
+        command += [
+            '-map', '0:v:0', '-vf', _scale(max_side),
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main', '-pix_fmt', 'yuv420p',
+            '-crf', '23', '-maxrate', bitrate, '-bufsize', bitrate,
+        ]
+        command += ['-map', '0:a:0?', '-c:a', 'aac', '-b:a', '128k', '-ac', '2'] if audio else ['-an']
+        # moov en tête de fichier : la lecture commence avant la fin du téléchargement
+        command += ['-movflags', '+faststart', outputs[rendition]]
+    command += [
+        '-map', '0:v:0', '-vf', 'thumbnail,' + _scale(POSTER_MAX_SIDE),
+        '-frames:v', '1', '-q:v', '3', outputs['poster'],
+    ]
+    return command
+
+
+def renditions_exist(storage, name):
+    # Le rendu principal est enregistré en dernier : son existence signale des rendus complets
+    return storage.exists(rendition_name(name, 'main'))
+
+
+def transcode(storage, name):
+    """Produire les rendus de la vidéo name ; retourne READY, ORIGINAL (pas de ffmpeg) ou FAILED"""
+    if renditions_exist(storage, name):
+        return READY
+    binary = ffmpeg_binary()
+    if not binary or not storage.exists(name):
+        return ORIGINAL
+
+    with tempfile.TemporaryDirectory(prefix='kongossa-video-') as workdir:
+        try:
+            source = storage.path(name)
+        except NotImplementedError:
+            # Stockage distant : copie locale pour ffmpeg
+            source = os.path.join(workdir, 'source')
+            with storage.open(name, 'rb') as remote, open(source, 'wb') as local:
+                shutil.copyfileobj(remote, local)
+        outputs = {'poster': os.path.join(workdir, 'poster.jpg')}
+        outputs.update({rendition: os.path.join(workdir, f'{rendition}.mp4') for rendition in RENDITIONS})
+        try:
+            subprocess.run(
+                ffmpeg_command(binary, source, outputs),
+                check=True, capture_output=True, timeout=_timeout(),
+            )
+        except subprocess.CalledProcessError as error:
+            logger.warning('Vidéo illisible par ffmpeg (%s) : %s', name, error.stderr.decode(errors='replace')[-500:])
+            return FAILED
+        except subprocess.TimeoutExpired:
+            logger.warning('Traitement de la vidéo trop long (%ss), abandonné : %s', _timeout(), name)
+            return FAILED
+
+        for rendition in ['poster', *sorted(RENDITIONS, key=lambda key: key == 'main')]:
+            target = rendition_name(name, rendition)
+            if storage.exists(target):
+                storage.delete(target)
+            with open(outputs[rendition], 'rb') as output:
+                storage.save(target, File(output, name=target))
+    return READY
+
+
+def delete_renditions(storage, name):
+    """Supprimer les rendus d'une vidéo supprimée"""
+    if not name:
+        return
+    for rendition in [*RENDITIONS, 'poster']:
+        target = rendition_name(name, rendition)
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def set_status(model_label, pk, status, name=None):
+    """Mettre à jour video_status sans signal ; name : seulement si la vidéo n'a pas changé entre-temps"""
+    queryset = apps.get_model(model_label).objects.filter(pk=pk)
+    if name is not None:
+        queryset = queryset.filter(video=name)
+    return queryset.update(**{STATUS_FIELD: status})
+
+
+def request_transcode(instance, force=False):
+    """Planifier le traitement de la vidéo de l'objet (à appeler après le commit)
+
+    force : replanifier même si cette vidéo a déjà été traitée (ex. ffmpeg installé depuis)
+    """
+    from jobs.queue import enqueue
+
+    label = instance._meta.label
+    name = instance.video.name
+    set_status(label, instance.pk, PENDING, name)
+    setattr(instance, STATUS_FIELD, PENDING)
+    enqueue(
+        'mediafiles.tasks.transcode_video', label, instance.pk,
+        idempotency_key=None if force else f'transcode_video:{label}:{instance.pk}:{name}',
+        max_attempts=getattr(settings, 'VIDEO_TRANSCODE_MAX_ATTEMPTS', 3),
+    )
@@ -0,0 +1,170 @@
+"""
+Vues des fichiers média Kongossa : envois reprenables par morceaux (voir mediafiles.uploads)
+et service des fichiers de MEDIA_URL (voir mediafiles.serving)
+"""
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import http_date
+from django.views.decorators.http import require_http_methods
+
+from . import serving
+from .models import UploadSession
+from .uploads import UploadError, complete_session, create_session, missing_chunks, write_chunk
+
+
+def _session_data(session):
+    return {
+        'id': str(session.id),
+        'filename': session.filename,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'status': session.status,
+        'missing': missing_chunks(session) if session.status == 'pending' else [],
+        'sha256': session.sha256 if session.status != 'pending' else None,
+        'url': reverse('mediafiles:upload_status', args=[session.id]),
+    }
+
+
+def _error(error):
+    return JsonResponse({'error': str(error)}, status=error.status)
+
+
+@login_required
+@require_http_methods(["POST"])
+def create_upload(request):
+    """Ouvrir un envoi : filename, size, content_type et sha256 (optionnel)"""
+    try:
+        session = create_session(
+            request.user,
+            request.POST.get('filename'),
+            request.POST.get('size'),
+            content_type=request.POST.get('content_type', ''),
+            sha256=request.POST.get('sha256', ''),
+        )
+    except UploadError as error:
+        return _error(error)
+    return JsonResponse(_session_data(session), status=201)
+
+
+@login_required
+@require_http_methods(["GET"])
+def upload_status(request, upload_id):
+    """État d'un envoi : morceaux manquants à (r)envoyer"""
+    session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+    return JsonResponse(_session_data(session))
+
+
+@login_required
+@require_http_methods(["PUT"])
+def upload_chunk(request, upload_id, index):
+    """Recevoir un morceau (corps brut de la requête, lu en flux)"""
+    session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+    try:
+        written = write_chunk(session, index, request, request.headers.get('X-Chunk-SHA256', ''))
+    except UploadError as error:
+        return _error(error)
+    return JsonResponse({'index': index, 'size': written})
+
+
+@login_required
+@require_http_methods(["POST"])
+def complete_upload(request, upload_id):
+    """Assembler l'envoi ; son id peut ensuite être passé aux formulaires (<champ>_upload)"""
+    session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+    try:
+        session = complete_session(session)
+    except UploadError as error:
+        return _error(error)
+    return JsonResponse(_session_data(session))
+
+
+def _media_name(path):
+    """Nom de stockage normalisé ; Http404 pour tout chemin qui sortirait de MEDIA_ROOT"""
+    name = posixpath.normpath(path)
+    if not path or name != path.rstrip('/') or name.startswith(('/', '../')) or name in ('.', '..'):
+        raise Http404
+    return name
+
+
+def _etag_matches(header, etag):
+    return header.strip() == '*' or etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve_media(request, path):
+    """Fichier de MEDIA_URL : contrôle d'accès, ETag, Cache-Control et requêtes partielles (Range)"""
+    name = _media_name(path)
+    try:
+        full_path = default_storage.path(name)
+        stat = os.stat(full_path)
+    except (OSError, ValueError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    allowed, private = serving.can_read(request, name)
+    if not allowed:
+        raise Http404  # Même réponse qu'un fichier absent : rien n'est révélé
+
+    size = stat.st_size
+    etag = serving.etag_for(name, stat)
+    content_type = serving.content_type_for(name)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': serving.cache_control(name, private),
+        'Accept-Ranges': 'bytes',
+        'X-Content-Type-Options': 'nosniff',
+    }
+    if not serving.is_inline(content_type):
+        headers['Content-Disposition'] = 'attachment; filename="{}"'.format(posixpath.basename(name))
+
+    if _etag_matches(request.headers.get('If-None-Match', ''), etag):
+        return HttpResponse(status=304, headers=headers)
+
+    sendfile = getattr(settings, 'MEDIA_SENDFILE', '')
+    if sendfile:
+        # Le serveur web envoie le fichier (et traite lui-même l'en-tête Range)
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if sendfile == 'x-accel-redirect':
+            prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range', '').strip()
+    if request.headers.get('Range') and (not if_range or if_range == etag):
+        try:
+            byte_range = serving.parse_range(request.headers['Range'], size)
+        except ValueError:
+            headers['Content-Range'] = f'bytes */{size}'
+            return HttpResponse(status=416, headers=headers)
+
+    if byte_range:
+        start, end = byte_range
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        headers['Content-Length'] = str(end - start + 1)
+        if request.method == 'HEAD':
+            return HttpResponse(status=206, content_type=content_type, headers=headers)
+        return StreamingHttpResponse(
+            serving.iter_range(full_path, start, end), status=206, content_type=content_type, headers=headers
+        )
+
+    if request.method == 'HEAD':
+        headers['Content-Length'] = str(size)
+        return HttpResponse(content_type=content_type, headers=headers)
+    # FileResponse : envoi par wsgi.file_wrapper (sendfile) quand le serveur le permet
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    for header, value in headers.items():
+        response[header] = value
+    return response
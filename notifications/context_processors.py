@@ -1,13 +1,13 @@
 """
 Context processors pour les notifications
 """
-from .models import Notification
+from .unread import notifications_unread_count
 
 
 def notifications_count(request):
-    """Ajouter le nombre de notifications non lues au contexte"""
+    """Ajouter le nombre de notifications non lues au contexte (compteur en mémoire, sans COUNT)"""
     if request.user.is_authenticated:
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+        unread_count = notifications_unread_count(request.user)
         return {'unread_notifications_count': unread_count}
     return {'unread_notifications_count': 0}
 
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['related_url', 'notification_type', 'is_read'], name='notificatio_related_5b0d09_idx'),
+        ),
+    ]
@@ -48,6 +48,8 @@ class Notification(models.Model):
         verbose_name_plural = "Notifications"
         indexes = [
             models.Index(fields=['user', 'is_read', '-created_at']),
+            # Regroupement des notifications non lues d'une même conversation/groupe
+            models.Index(fields=['related_url', 'notification_type', 'is_read']),
         ]
     
     def __str__(self):
@@ -56,8 +58,10 @@ class Notification(models.Model):
     def mark_as_read(self):
         """Marquer la notification comme lue"""
         if not self.is_read:
+            from .unread import incr_notifications_unread
             self.is_read = True
             self.save()
+            incr_notifications_unread(self.user_id, -1)
     
     @classmethod
     def create_notification(cls, user, notification_type, title, message, related_user=None, related_url=None):
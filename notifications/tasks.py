@@ -0,0 +1,149 @@
+"""
+Tâches de fond pour les notifications Kongossa
+"""
+from django.urls import reverse
+from django.utils import timezone
+from chat.models import Message
+from forum.models import GroupRequest, GroupMessage
+from kongossa.counters import reconcile_counters
+from .models import Notification
+from .unread import NOTIFICATIONS_UNREAD, incr_notifications_unread, real_unread_counts
+
+BULK_BATCH_SIZE = 500
+
+
+def notify_message_recipient(message_id):
+    """Créer (ou rafraîchir) la notification du destinataire d'un message privé"""
+    try:
+        instance = Message.objects.select_related('conversation', 'sender').get(id=message_id)
+    except Message.DoesNotExist:
+        return
+    
+    conversation = instance.conversation
+    sender_user = instance.sender
+    other_user = conversation.get_other_participant(sender_user)
+    
+    if not other_user:
+        return
+    
+    related_url = reverse('chat:detail', kwargs={'conversation_id': conversation.id})
+    
+    # Vérifier s'il existe déjà une notification non lue pour cette conversation
+    existing_notification = Notification.objects.filter(
+        user=other_user,
+        notification_type='message',
+        related_user=sender_user,
+        is_read=False,
+        related_url=related_url
+    ).first()
+    
+    if existing_notification:
+        # Mettre à jour le message existant
+        existing_notification.message = f'{sender_user.username} vous a envoyé un message'
+        existing_notification.created_at = timezone.now()
+        existing_notification.save()
+    else:
+        # Créer une nouvelle notification
+        Notification.create_notification(
+            user=other_user,
+            notification_type='message',
+            title='Nouveau message',
+            message=f'{sender_user.username} vous a envoyé un message',
+            related_user=sender_user,
+            related_url=related_url
+        )
+
+
+def mark_message_notifications_read(message_id):
+    """Marquer comme lues les notifications d'une conversation dont un message a été lu"""
+    try:
+        instance = Message.objects.select_related('conversation', 'sender').get(id=message_id)
+    except Message.DoesNotExist:
+        return
+    
+    other_user = instance.conversation.get_other_participant(instance.sender)
+    if not other_user:
+        return
+    
+    related_url = reverse('chat:detail', kwargs={'conversation_id': instance.conversation_id})
+    marked = Notification.objects.filter(
+        user=other_user,
+        notification_type='message',
+        related_user=instance.sender,
+        related_url=related_url,
+        is_read=False
+    ).update(is_read=True)
+    incr_notifications_unread(other_user.id, -marked)
+
+
+def notify_group_request(group_request_id):
+    """Notifier le créateur du groupe d'une nouvelle demande d'accès"""
+    try:
+        instance = GroupRequest.objects.select_related('group__creator', 'user').get(id=group_request_id)
+    except GroupRequest.DoesNotExist:
+        return
+    
+    related_url = reverse('forum:manage_group', kwargs={'group_id': instance.group.id})
+    Notification.create_notification(
+        user=instance.group.creator,
+        notification_type='group_request',
+        title='Nouvelle demande d\'accès',
+        message=f'{instance.user.username} a demandé à rejoindre le groupe "{instance.group.name}"',
+        related_user=instance.user,
+        related_url=related_url
+    )
+
+
+def notify_group_members(group_message_id):
+    """Notifier tous les membres d'un groupe (sauf l'expéditeur) d'un nouveau message, en masse"""
+    try:
+        instance = GroupMessage.objects.select_related('group', 'sender').get(id=group_message_id)
+    except GroupMessage.DoesNotExist:
+        return
+    
+    group = instance.group
+    sender_user = instance.sender
+    related_url = reverse('forum:group_detail', kwargs={'group_id': group.id})
+    text = f'{sender_user.username} a envoyé un message dans "{group.name}"'
+    now = timezone.now()
+    
+    member_ids = set(group.members.exclude(id=sender_user.id).values_list('id', flat=True))
+    
+    # Une seule requête pour toutes les notifications non lues de ce groupe
+    existing = Notification.objects.filter(
+        notification_type='group_message',
+        related_url=related_url,
+        is_read=False
+    ).order_by('user_id', '-created_at')
+    
+    # Mettre à jour la notification non lue la plus récente de chaque membre
+    to_update = {}
+    for notification in existing:
+        if notification.user_id in member_ids and notification.user_id not in to_update:
+            notification.message = text
+            notification.related_user = sender_user
+            notification.created_at = now
+            to_update[notification.user_id] = notification
+    Notification.objects.bulk_update(
+        to_update.values(), ['message', 'related_user', 'created_at'], batch_size=BULK_BATCH_SIZE
+    )
+    
+    # Créer les notifications manquantes (bulk_create n'émet pas post_save : compteur mis à jour ici)
+    new_member_ids = member_ids - to_update.keys()
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            notification_type='group_message',
+            title='Nouveau message de groupe',
+            message=text,
+            related_user=sender_user,
+            related_url=related_url
+        )
+        for user_id in new_member_ids
+    ], batch_size=BULK_BATCH_SIZE)
+    incr_notifications_unread(new_member_ids)
+
+
+def reconcile_unread_counters():
+    """Recaler les compteurs de notifications non lues sur la base (dérives, écritures perdues)"""
+    reconcile_counters(NOTIFICATIONS_UNREAD, real_unread_counts())
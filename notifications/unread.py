@@ -0,0 +1,32 @@
+"""
+Compteur des notifications non lues (badge), servi par kongossa.counters
+"""
+from django.db.models import Count
+from kongossa.counters import get_counter, incr_counter, reset_counter
+from .models import Notification
+
+NOTIFICATIONS_UNREAD = 'notifications_unread'
+
+
+def notifications_unread_count(user):
+    """Nombre de notifications non lues (sans requête tant que le compteur est en mémoire)"""
+    return get_counter(
+        NOTIFICATIONS_UNREAD, user.id,
+        lambda: Notification.objects.filter(user=user, is_read=False).count()
+    )
+
+
+def incr_notifications_unread(user_ids, delta=1):
+    incr_counter(NOTIFICATIONS_UNREAD, user_ids, delta)
+
+
+def clear_notifications_unread(user_id):
+    reset_counter(NOTIFICATIONS_UNREAD, user_id, value=0)
+
+
+def real_unread_counts():
+    """Nombre réel de notifications non lues par utilisateur (réconciliation)"""
+    return dict(
+        Notification.objects.filter(is_read=False).values('user').annotate(n=Count('id'))
+        .order_by().values_list('user', 'n')
+    )
@@ -7,6 +7,7 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q
 from .models import Notification
+from .unread import clear_notifications_unread, notifications_unread_count
 
 
 @login_required
@@ -41,6 +42,7 @@ def mark_notification_read(request, notification_id):
 def mark_all_read(request):
     """Marquer toutes les notifications comme lues"""
     Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    clear_notifications_unread(request.user.id)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -50,7 +52,7 @@ def mark_all_read(request):
 @login_required
 def unread_count(request):
     """Retourner le nombre de notifications non lues (API)"""
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
+    count = notifications_unread_count(request.user)
     return JsonResponse({'count': count})
 
 
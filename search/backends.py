@@ -0,0 +1,178 @@
+"""
+Backends de recherche plein texte pour Kongossa
+
+    from search.backends import search
+    hits = search('concert douala', kinds=['post', 'group'], limit=20)
+
+Le backend est choisi selon la base (SEARCH_BACKEND pour forcer) :
+- 'postgresql' : colonne tsvector générée + index GIN, classement ts_rank_cd,
+  extraits ts_headline ; repli sur les trigrammes (pg_trgm) du titre quand la
+  recherche plein texte ne trouve rien (fautes de frappe) ;
+- 'sqlite' : table virtuelle FTS5 synchronisée par triggers, classement bm25,
+  extraits highlight/snippet ;
+- 'simple' : icontains sur les documents (autres bases, dépannage).
+
+Chaque résultat porte un titre et un extrait HTML, échappés, où les termes
+trouvés sont entourés de <mark>.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import SearchDocument
+
+# Marqueurs de surlignage posés par la base, remplacés par <mark> après échappement
+MARK_START = '\ue000'
+MARK_END = '\ue001'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKENS = 8
+
+
+class SearchHit:
+    """Résultat de recherche"""
+
+    def __init__(self, kind, object_id, score, title, snippet):
+        self.kind = kind
+        self.object_id = object_id
+        self.score = score
+        self.title = _render_marks(title)
+        self.snippet = _render_marks(snippet)
+
+    def __repr__(self):
+        return f'<SearchHit {self.kind} {self.object_id} {self.score:.3f}>'
+
+
+def _render_marks(text):
+    """Échapper le texte indexé (saisi par les utilisateurs) puis poser les <mark>"""
+    html = escape(text or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def tokenize(query):
+    """Termes de la requête (mots uniquement : aucune syntaxe de requête n'est transmise à la base)"""
+    return [token.lower() for token in TOKEN_RE.findall(query or '')][:MAX_TOKENS]
+
+
+def _kinds(kinds):
+    return list(kinds) if kinds else [kind for kind, _ in SearchDocument.KIND_CHOICES]
+
+
+class SimpleSearchBackend:
+    """Recherche par icontains (sans index plein texte)"""
+
+    def search(self, query, kinds=None, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        documents = SearchDocument.objects.filter(kind__in=_kinds(kinds))
+        for token in tokens:
+            documents = documents.filter(Q(title__icontains=token) | Q(body__icontains=token))
+        pattern = re.compile('|'.join(re.escape(token) for token in tokens), re.IGNORECASE)
+
+        def mark(text):
+            return pattern.sub(lambda m: f'{MARK_START}{m.group(0)}{MARK_END}', text)
+
+        return [
+            SearchHit(document.kind, document.object_id, 0.0, mark(document.title), mark(document.body[:300]))
+            for document in documents.order_by('-updated_at')[:limit]
+        ]
+
+
+class SQLiteSearchBackend:
+    """Recherche FTS5 (table virtuelle search_fts)"""
+
+    SQL = f"""
+        SELECT d.kind, d.object_id, bm25(search_fts, 5.0, 1.0) AS score,
+               highlight(search_fts, 0, '{MARK_START}', '{MARK_END}'),
+               snippet(search_fts, 1, '{MARK_START}', '{MARK_END}', '…', 24)
+        FROM search_fts
+        JOIN search_searchdocument d ON d.id = search_fts.rowid
+        WHERE search_fts MATCH %s AND d.kind IN ({{placeholders}})
+        ORDER BY score
+        LIMIT %s
+    """
+
+    def search(self, query, kinds=None, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Termes entre guillemets (ET implicite), le dernier en préfixe pour la saisie en cours
+        match = ' '.join(f'"{token}"' for token in tokens) + '*'
+        kinds = _kinds(kinds)
+        sql = self.SQL.format(placeholders=', '.join(['%s'] * len(kinds)))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [match, *kinds, limit])
+            rows = cursor.fetchall()
+        # bm25 est négatif : plus petit = plus pertinent
+        return [SearchHit(kind, object_id, -score, title, snippet) for kind, object_id, score, title, snippet in rows]
+
+
+class PostgresSearchBackend:
+    """Recherche tsvector/GIN, avec repli trigrammes sur le titre"""
+
+    HEADLINE_OPTIONS = f'StartSel={MARK_START}, StopSel={MARK_END}'
+
+    FULL_TEXT_SQL = f"""
+        SELECT kind, object_id, score,
+               ts_headline('simple', title, query, '{HEADLINE_OPTIONS}, HighlightAll=true'),
+               ts_headline('simple', body, query, '{HEADLINE_OPTIONS}, MaxWords=35, MinWords=15')
+        FROM (
+            SELECT kind, object_id, title, body, query, ts_rank_cd(search_vector, query) AS score
+            FROM search_searchdocument, to_tsquery('simple', %s) AS query
+            WHERE search_vector @@ query AND kind = ANY(%s)
+            ORDER BY score DESC
+            LIMIT %s
+        ) AS ranked
+        ORDER BY score DESC
+    """
+
+    TRIGRAM_SQL = """
+        SELECT kind, object_id, similarity(title, %s) AS score, title, left(body, 300)
+        FROM search_searchdocument
+        WHERE title %% %s AND kind = ANY(%s)
+        ORDER BY score DESC
+        LIMIT %s
+    """
+
+    def search(self, query, kinds=None, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        tsquery = ' & '.join(tokens) + ':*'
+        kinds = _kinds(kinds)
+        with connection.cursor() as cursor:
+            cursor.execute(self.FULL_TEXT_SQL, [tsquery, kinds, limit])
+            rows = cursor.fetchall()
+            if not rows:
+                text = ' '.join(tokens)
+                cursor.execute(self.TRIGRAM_SQL, [text, text, kinds, limit])
+                rows = cursor.fetchall()
+        return [SearchHit(*row) for row in rows]
+
+
+BACKENDS = {
+    'simple': SimpleSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    """Backend configuré (SEARCH_BACKEND) ou déduit de la base utilisée"""
+    global _backend
+    if _backend is None:
+        name = getattr(settings, 'SEARCH_BACKEND', None) or connection.vendor
+        _backend = BACKENDS.get(name, SimpleSearchBackend)()
+    return _backend
+
+
+def search(query, kinds=None, limit=20):
+    """Rechercher dans l'index : liste de SearchHit, les plus pertinents d'abord"""
+    return get_backend().search(query, kinds=kinds, limit=limit)
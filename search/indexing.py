@@ -0,0 +1,83 @@
+"""
+Alimentation de l'index de recherche Kongossa
+
+Chaque objet indexé (post, groupe, thème, utilisateur) a un SearchDocument :
+son texte est recopié à la sauvegarde (search.signals) et l'index propre à la
+base (tsvector, FTS5) est mis à jour par la base elle-même. L'index complet se
+reconstruit avec : python manage.py rebuild_search_index
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from forum.models import Group, Post, Topic
+from .models import SearchDocument
+
+User = get_user_model()
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def post_document(post):
+    return '', post.content
+
+
+def group_document(group):
+    # Le nom du thème est indexé avec le groupe (recherche de groupes par thème)
+    return group.name, f'{group.description}\n{group.topic.name}'
+
+
+def topic_document(topic):
+    return topic.name, topic.description
+
+
+def user_document(user):
+    return user.username, f'{user.get_full_name()}\n{user.bio}'
+
+
+DOCUMENTS = {
+    'post': (Post, post_document, 'content'),
+    'group': (Group, group_document, 'topic'),
+    'topic': (Topic, topic_document, None),
+    'user': (User, user_document, None),
+}
+
+
+def index_object(kind, obj):
+    """Créer ou mettre à jour le document d'un objet"""
+    _, build, _ = DOCUMENTS[kind]
+    title, body = build(obj)
+    SearchDocument.objects.update_or_create(
+        kind=kind, object_id=obj.pk,
+        defaults={'title': title[:255], 'body': body.strip()}
+    )
+
+
+def unindex_object(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_index(kinds=None, batch_size=REBUILD_BATCH_SIZE):
+    """Reconstruire les documents des types donnés (tous par défaut) ; retourne le nombre indexé"""
+    total = 0
+    for kind in kinds or DOCUMENTS:
+        model, build, related = DOCUMENTS[kind]
+        queryset = model.objects.order_by('pk')
+        if related == 'topic':
+            queryset = queryset.select_related('topic')
+        elif related:
+            queryset = queryset.only('pk', related)
+        with transaction.atomic():
+            SearchDocument.objects.filter(kind=kind).delete()
+            last_pk = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                documents = []
+                for obj in batch:
+                    title, body = build(obj)
+                    documents.append(SearchDocument(kind=kind, object_id=obj.pk, title=title[:255], body=body.strip()))
+                SearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+                total += len(documents)
+                last_pk = batch[-1].pk
+    return total
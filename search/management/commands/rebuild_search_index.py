@@ -0,0 +1,19 @@
+"""
+Commande Django pour reconstruire l'index de recherche plein texte
+L'index est tenu à jour par les signaux (search.signals) : à lancer après un import
+en masse, une restauration de base ou l'ajout d'un nouveau type de document
+"""
+from django.core.management.base import BaseCommand
+from search.indexing import DOCUMENTS, REBUILD_BATCH_SIZE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit l\'index de recherche (posts, groupes, thèmes, utilisateurs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=list(DOCUMENTS), help='Type de document à réindexer (répétable)')
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help='Nombre d\'objets indexés par lot')
+
+    def handle(self, *args, **options):
+        count = rebuild_index(options['kind'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{count} documents indexés'))
@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:40
+
+from django.db import migrations, models
+
+
+SQLITE_SQL = [
+    """CREATE VIRTUAL TABLE search_fts USING fts5(
+        title, body,
+        content='search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER search_fts_insert AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER search_fts_delete AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER search_fts_update AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS search_fts_update',
+    'DROP TRIGGER IF EXISTS search_fts_delete',
+    'DROP TRIGGER IF EXISTS search_fts_insert',
+    'DROP TABLE IF EXISTS search_fts',
+]
+
+POSTGRESQL_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """ALTER TABLE search_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+    ) STORED""",
+    'CREATE INDEX search_doc_vector_idx ON search_searchdocument USING GIN (search_vector)',
+    'CREATE INDEX search_doc_title_trgm_idx ON search_searchdocument USING GIN (title gin_trgm_ops)',
+]
+
+POSTGRESQL_REVERSE_SQL = [
+    'DROP INDEX IF EXISTS search_doc_title_trgm_idx',
+    'DROP INDEX IF EXISTS search_doc_vector_idx',
+    'ALTER TABLE search_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    """Structures d'index propres à la base (les autres bases utilisent le backend 'simple')"""
+    _run(schema_editor, {'sqlite': SQLITE_SQL, 'postgresql': POSTGRESQL_SQL})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_REVERSE_SQL, 'postgresql': POSTGRESQL_REVERSE_SQL})
+
+
+def index_existing_content(apps, schema_editor):
+    """Indexer le contenu existant (équivalent de rebuild_search_index)"""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    Post = apps.get_model('forum', 'Post')
+    Group = apps.get_model('forum', 'Group')
+    Topic = apps.get_model('forum', 'Topic')
+    User = apps.get_model('users', 'User')
+
+    def documents():
+        for post in Post.objects.only('pk', 'content').iterator(chunk_size=1000):
+            yield SearchDocument(kind='post', object_id=post.pk, body=post.content.strip())
+        for group in Group.objects.select_related('topic').iterator(chunk_size=1000):
+            yield SearchDocument(kind='group', object_id=group.pk, title=group.name[:255],
+                                 body=f'{group.description}\n{group.topic.name}'.strip())
+        for topic in Topic.objects.iterator(chunk_size=1000):
+            yield SearchDocument(kind='topic', object_id=topic.pk, title=topic.name[:255],
+                                 body=topic.description.strip())
+        for user in User.objects.iterator(chunk_size=1000):
+            full_name = f'{user.first_name} {user.last_name}'.strip()
+            yield SearchDocument(kind='user', object_id=user.pk, title=user.username[:255],
+                                 body=f'{full_name}\n{user.bio}'.strip())
+
+    batch = []
+    for document in documents():
+        batch.append(document)
+        if len(batch) >= 1000:
+            SearchDocument.objects.bulk_create(batch)
+            batch = []
+    SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('forum', '0014_groupreadcursor'),
+        ('users', '0006_user_banner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('group', 'Groupe'), ('topic', 'Thème'), ('user', 'Utilisateur')], max_length=10, verbose_name='Type')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Identifiant')),
+                ('title', models.CharField(blank=True, max_length=255, verbose_name='Titre')),
+                ('body', models.TextField(blank=True, verbose_name='Texte')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Document indexé',
+                'verbose_name_plural': 'Documents indexés',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_content, migrations.RunPython.noop),
+    ]
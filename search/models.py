@@ -0,0 +1,33 @@
+"""
+Modèles pour la recherche plein texte Kongossa
+"""
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """Document indexé : copie textuelle d'un post, groupe, thème ou utilisateur
+
+    Les structures d'index propres à chaque base (colonne tsvector + GIN et
+    trigrammes sous PostgreSQL, table virtuelle FTS5 sous SQLite) sont créées
+    par la migration initiale, voir search.backends.
+    """
+    KIND_CHOICES = [
+        ('post', 'Post'),
+        ('group', 'Groupe'),
+        ('topic', 'Thème'),
+        ('user', 'Utilisateur'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Type")
+    object_id = models.PositiveBigIntegerField(verbose_name="Identifiant")
+    title = models.CharField(max_length=255, blank=True, verbose_name="Titre")
+    body = models.TextField(blank=True, verbose_name="Texte")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        verbose_name = "Document indexé"
+        verbose_name_plural = "Documents indexés"
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
@@ -0,0 +1,49 @@
+"""
+Signaux de la recherche : mise à jour incrémentale de l'index à chaque sauvegarde
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from forum.models import Group, Post, Topic
+from .indexing import index_object, unindex_object
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    # Les mises à jour de compteurs (likes_count...) ne touchent pas au texte
+    if update_fields and 'content' not in update_fields:
+        return
+    index_object('post', instance)
+
+
+@receiver(post_save, sender=Group)
+def index_group(sender, instance, **kwargs):
+    index_object('group', instance)
+
+
+@receiver(post_save, sender=Topic)
+def index_topic(sender, instance, **kwargs):
+    index_object('topic', instance)
+    # Le nom du thème fait partie du document de ses groupes
+    for group in instance.groups.select_related('topic'):
+        index_object('group', group)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    # Ignorer les sauvegardes techniques (last_login, jetons de connexion...)
+    if update_fields and not {'username', 'first_name', 'last_name', 'bio'} & set(update_fields):
+        return
+    index_object('user', instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=User)
+def unindex(sender, instance, **kwargs):
+    kind = {Post: 'post', Group: 'group', Topic: 'topic'}.get(sender, 'user')
+    unindex_object(kind, instance.pk)
@@ -0,0 +1,76 @@
+"""
+Vues de la recherche Kongossa
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import JsonResponse
+from django.urls import reverse
+
+from forum.models import Group, Post, Topic
+from .backends import search
+from .models import SearchDocument
+
+User = get_user_model()
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+OVERFETCH = 3  # Marge pour les résultats écartés par le contrôle de visibilité
+
+
+def _visible_ids(user, kind, object_ids):
+    """Objets que l'utilisateur peut voir, en une requête par type : {id: url}"""
+    if kind == 'post':
+        # Posts d'un thème : réservés à ses abonnés, comme le fil et la page du thème
+        posts = Post.objects.filter(id__in=object_ids).filter(
+            Q(topic__isnull=True) | Q(topic__subscribers=user)
+        ).distinct()
+        return {pk: reverse('forum:post_detail', args=[pk]) for pk in posts.values_list('id', flat=True)}
+    if kind == 'group':
+        groups = Group.objects.filter(id__in=object_ids).filter(
+            Q(is_public=True) | Q(members=user) | Q(subscribers=user) | Q(creator=user)
+        ).distinct()
+        return {pk: reverse('forum:group_feed', args=[pk]) for pk in groups.values_list('id', flat=True)}
+    if kind == 'topic':
+        topics = Topic.objects.filter(id__in=object_ids, is_active=True)
+        return {pk: reverse('forum:topic_detail', args=[slug]) for pk, slug in topics.values_list('id', 'slug')}
+    users = User.objects.filter(id__in=object_ids, is_active=True)
+    return {pk: reverse('users:profile', args=[username]) for pk, username in users.values_list('id', 'username')}
+
+
+@login_required
+def search_view(request):
+    """Recherche plein texte (API) : ?q=...&kinds=post,group,topic,user&limit=20"""
+    query = request.GET.get('q', '').strip()
+    valid_kinds = {kind for kind, _ in SearchDocument.KIND_CHOICES}
+    kinds = [kind for kind in request.GET.get('kinds', '').split(',') if kind in valid_kinds] or None
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    if not query:
+        return JsonResponse({'query': query, 'results': []})
+
+    hits = search(query, kinds=kinds, limit=limit * OVERFETCH)
+    by_kind = {}
+    for hit in hits:
+        by_kind.setdefault(hit.kind, []).append(hit.object_id)
+    urls = {kind: _visible_ids(request.user, kind, object_ids) for kind, object_ids in by_kind.items()}
+
+    results = []
+    for hit in hits:
+        url = urls[hit.kind].get(hit.object_id)
+        if url is None:
+            continue
+        results.append({
+            'kind': hit.kind,
+            'id': hit.object_id,
+            'url': url,
+            'title': hit.title,
+            'snippet': hit.snippet,
+            'score': round(hit.score, 4),
+        })
+        if len(results) >= limit:
+            break
+    return JsonResponse({'query': query, 'results': results})
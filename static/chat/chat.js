@@ -1,6 +1,6 @@
 /**
  * Telegram-like Chat JavaScript
- * Gestion du chat en temps réel avec Polling (AJAX)
+ * Gestion du chat en temps réel par WebSocket, avec repli sur le Polling (AJAX)
  */
 
 class TelegramChat {
@@ -18,6 +18,8 @@ class TelegramChat {
         this.hasMoreMessages = true;
         this.messageGroups = new Map(); // Pour grouper les messages par auteur
         this.pollingIntervalMs = 2000; // Polling toutes les 2 secondes
+        this.socket = null;
+        this.socketRetryDelayMs = 1000; // Délai de reconnexion (doublé à chaque échec, max 30s)
         
         this.init();
     }
@@ -89,12 +91,14 @@ class TelegramChat {
     /**
      * Polling pour récupérer les nouveaux messages
      */
-    async pollNewMessages() {
+    async pollNewMessages(cursor = null) {
         if (!this.conversationId || this.isLoadingMessages) return;
         
         try {
             const url = `/chat/${this.conversationId}/new-messages/`;
-            const params = this.lastMessageId ? `?last_message_id=${this.lastMessageId}` : '';
+            // cursor : suite d'une réponse bornée, indépendante des messages reçus entre-temps
+            const since = cursor || this.lastMessageId;
+            const params = since ? `?last_message_id=${since}` : '';
             
             const response = await fetch(url + params, {
                 method: 'GET',
@@ -117,6 +121,12 @@ class TelegramChat {
                         }
                     });
                 }
+                
+                // Réponse bornée : continuer depuis next_cursor s'il reste des messages
+                if (data.has_more && data.next_cursor) {
+                    this.lastMessageId = Math.max(this.lastMessageId || 0, data.next_cursor);
+                    this.pollNewMessages(data.next_cursor);
+                }
             }
         } catch (error) {
             console.error('Erreur lors du polling:', error);
@@ -608,11 +618,54 @@ class TelegramChat {
     }
     
     /**
-     * Méthode de compatibilité pour l'ancien code qui appelait connectWebSocket
+     * Se connecter au WebSocket de la conversation (ChatConsumer)
+     * Le polling sert de repli tant que le socket n'est pas ouvert
      */
     connectWebSocket(conversationId) {
-        // Rediriger vers startPolling pour la compatibilité
-        this.startPolling(conversationId);
+        this.conversationId = conversationId;
+        this.updateLastMessageId();
+        
+        if (!('WebSocket' in window)) {
+            this.startPolling(conversationId);
+            return;
+        }
+        
+        const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        // last_message_id permet au serveur de renvoyer les messages manqués pendant une coupure
+        const params = this.lastMessageId ? `?last_message_id=${this.lastMessageId}` : '';
+        const socket = new WebSocket(`${wsProtocol}//${window.location.host}/ws/chat/${conversationId}/${params}`);
+        this.socket = socket;
+        
+        socket.onopen = () => {
+            this.socketRetryDelayMs = 1000;
+            this.stopPolling();
+        };
+        
+        socket.onmessage = (event) => {
+            const data = JSON.parse(event.data);
+            if (data.type === 'message' && data.message) {
+                const message = data.message;
+                if (!document.querySelector(`[data-message-id="${message.id}"]`)) {
+                    this.addMessageToDOM(message, true);
+                    this.markMessageAsRead(message.id);
+                }
+                this.lastMessageId = Math.max(this.lastMessageId || 0, message.id);
+            } else if (data.type === 'resume' && data.has_more) {
+                // Reprise tronquée : lire le reste des messages manqués par pages bornées
+                this.pollNewMessages(data.next_cursor);
+            }
+        };
+        
+        socket.onclose = () => {
+            if (this.socket !== socket) return;
+            this.socket = null;
+            // Repli sur le polling, puis nouvelle tentative de connexion
+            if (!this.pollingInterval) {
+                this.startPolling(conversationId);
+            }
+            setTimeout(() => this.connectWebSocket(conversationId), this.socketRetryDelayMs);
+            this.socketRetryDelayMs = Math.min(this.socketRetryDelayMs * 2, 30000);
+        };
     }
 }
 
@@ -0,0 +1,127 @@
+/**
+ * Envois reprenables par morceaux (voir mediafiles/uploads.py)
+ *
+ * Les fichiers plus gros qu'un morceau sont envoyés par PUT successifs ; après
+ * une coupure (ou un rechargement de la page), seuls les morceaux manquants
+ * sont renvoyés. Le formulaire reçoit alors <champ>_upload (identifiant de
+ * l'envoi) à la place du fichier.
+ *
+ *   await KongossaUploads.appendFile(formData, 'video', file);   // envoi AJAX
+ *   <form data-resumable-uploads ...>                            // formulaire classique
+ */
+(function () {
+    const BASE_URL = '/uploads/';
+    const CHUNKED_THRESHOLD = 5 * 1024 * 1024; // UPLOAD_CHUNK_SIZE
+    const MAX_RETRIES = 5;
+
+    function csrfToken() {
+        const input = document.querySelector('[name=csrfmiddlewaretoken]');
+        if (input) return input.value;
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    async function request(url, options = {}) {
+        const response = await fetch(url, {
+            credentials: 'same-origin',
+            ...options,
+            headers: { 'X-CSRFToken': csrfToken(), ...(options.headers || {}) },
+        });
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok) {
+            const error = new Error(data.error || `Erreur ${response.status}`);
+            error.status = response.status;
+            throw error;
+        }
+        return data;
+    }
+
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+    async function putChunk(session, file, index) {
+        const start = index * session.chunk_size;
+        const chunk = file.slice(start, Math.min(start + session.chunk_size, file.size));
+        for (let attempt = 0; ; attempt++) {
+            try {
+                return await request(`${BASE_URL}${session.id}/chunks/${index}/`, { method: 'PUT', body: chunk });
+            } catch (error) {
+                // Erreur réseau ou serveur : nouvel essai avec délai croissant ; erreur du client : abandon
+                if (attempt + 1 >= MAX_RETRIES || (error.status && error.status < 500)) throw error;
+                await sleep(1000 * 2 ** attempt);
+            }
+        }
+    }
+
+    async function openSession(file) {
+        // Reprise d'un envoi interrompu du même fichier
+        const key = `kongossa-upload:${file.name}:${file.size}:${file.lastModified}`;
+        const savedId = localStorage.getItem(key);
+        if (savedId) {
+            try {
+                const session = await request(`${BASE_URL}${savedId}/`);
+                if (session.status === 'pending' || session.status === 'complete') return [key, session];
+            } catch (error) { /* Session expirée : en ouvrir une nouvelle */ }
+        }
+        const body = new FormData();
+        body.append('filename', file.name);
+        body.append('size', file.size);
+        body.append('content_type', file.type || '');
+        const session = await request(BASE_URL, { method: 'POST', body });
+        localStorage.setItem(key, session.id);
+        return [key, session];
+    }
+
+    async function upload(file, onProgress) {
+        let [key, session] = await openSession(file);
+        if (session.status === 'pending') {
+            let done = session.total_chunks - session.missing.length;
+            for (const index of session.missing) {
+                await putChunk(session, file, index);
+                done += 1;
+                if (onProgress) onProgress(done / session.total_chunks);
+            }
+            session = await request(`${BASE_URL}${session.id}/complete/`, { method: 'POST' });
+        }
+        localStorage.removeItem(key);
+        return session.id;
+    }
+
+    async function appendFile(formData, field, file, onProgress) {
+        if (file.size <= CHUNKED_THRESHOLD) {
+            formData.append(field, file);
+            return;
+        }
+        formData.append(`${field}_upload`, await upload(file, onProgress));
+    }
+
+    // Formulaires classiques : les gros fichiers partent par morceaux avant l'envoi du formulaire
+    document.addEventListener('submit', async (event) => {
+        const form = event.target;
+        if (!form.matches('form[data-resumable-uploads]') || form.dataset.uploadsReady) return;
+        const inputs = [...form.querySelectorAll('input[type=file]')].filter(
+            (input) => input.files[0] && input.files[0].size > CHUNKED_THRESHOLD
+        );
+        if (!inputs.length) return;
+        event.preventDefault();
+        const submitButton = form.querySelector('[type=submit]');
+        if (submitButton) submitButton.disabled = true;
+        try {
+            for (const input of inputs) {
+                const hidden = document.createElement('input');
+                hidden.type = 'hidden';
+                hidden.name = `${input.name}_upload`;
+                hidden.value = await upload(input.files[0]);
+                form.appendChild(hidden);
+                input.value = '';
+            }
+            form.dataset.uploadsReady = '1';
+            form.submit();
+        } catch (error) {
+            console.error('Upload error:', error);
+            alert('Erreur lors de l\'envoi du fichier : ' + error.message);
+            if (submitButton) submitButton.disabled = false;
+        }
+    });
+
+    window.KongossaUploads = { upload, appendFile };
+})();
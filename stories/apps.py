@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class StoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stories'
+    
+    def ready(self):
+        import stories.signals  # noqa
 
@@ -0,0 +1,121 @@
+"""
+Carrousel des stories actives pour Kongossa (feed, thèmes, groupes, page stories)
+
+Les stories actives sont mises en cache par auteur : une entrée par utilisateur,
+valable jusqu'à l'expiration de sa plus ancienne story active, invalidée à la
+création (ou suppression) d'une story par stories.signals. Un carrousel n'est
+construit que pour une audience donnée (abonnements et amis pour le feed,
+auteurs d'un thème, membres d'un groupe) : son coût dépend de cette audience,
+pas du nombre total d'utilisateurs.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from users.friendships import friends_of
+from users.models import Follow
+from .models import Story
+from .tracking import seen_story_ids
+
+LOAD_BATCH_SIZE = 1000
+PUBLIC_CAROUSEL_SIZE = 50  # Auteurs affichés aux visiteurs non connectés
+
+
+def _author_key(user_id):
+    return f'stories:user:{user_id}'
+
+
+def _max_ttl():
+    return getattr(settings, 'STORY_CAROUSEL_CACHE_TTL', 3600)
+
+
+def _load_authors(user_ids, now):
+    """Stories actives des auteurs donnés, groupées par auteur (les plus récentes d'abord)"""
+    grouped = {user_id: [] for user_id in user_ids}
+    for start in range(0, len(user_ids), LOAD_BATCH_SIZE):
+        stories = Story.objects.filter(
+            user_id__in=user_ids[start:start + LOAD_BATCH_SIZE],
+            expires_at__gt=now
+        ).select_related('user').order_by('-created_at')
+        for story in stories:
+            grouped[story.user_id].append(story)
+    return grouped
+
+
+def _cache_authors(grouped, now):
+    """Mettre en cache chaque auteur jusqu'à l'expiration de sa prochaine story"""
+    empty = {}
+    for user_id, stories in grouped.items():
+        if not stories:
+            empty[_author_key(user_id)] = stories
+            continue
+        next_expiry = min(story.expires_at for story in stories)
+        ttl = min(max(int((next_expiry - now).total_seconds()), 1), _max_ttl())
+        cache.set(_author_key(user_id), stories, ttl)
+    if empty:
+        cache.set_many(empty, _max_ttl())
+
+
+def carousel_for_users(user_ids, viewer=None):
+    """Carrousel [{'user', 'stories', 'seen'}] des auteurs donnés
+
+    Les auteurs dont viewer n'a pas encore vu toutes les stories passent en premier,
+    puis le plus récent d'abord.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return []
+    now = timezone.now()
+
+    cached = cache.get_many([_author_key(user_id) for user_id in user_ids])
+    by_user = {}
+    missing = []
+    for user_id in user_ids:
+        key = _author_key(user_id)
+        if key in cached:
+            by_user[user_id] = cached[key]
+        else:
+            missing.append(user_id)
+
+    if missing:
+        loaded = _load_authors(missing, now)
+        _cache_authors(loaded, now)
+        by_user.update(loaded)
+
+    carousel = []
+    for stories in by_user.values():
+        # Une story peut avoir expiré depuis sa mise en cache (granularité d'une seconde)
+        live = [story for story in stories if story.expires_at > now]
+        if live:
+            carousel.append({'user': live[0].user, 'stories': live, 'seen': False})
+    carousel.sort(key=lambda item: item['stories'][0].created_at, reverse=True)
+
+    # Anneaux vu/non vu : une seule requête pour toutes les stories du carrousel
+    if viewer is not None and viewer.is_authenticated and carousel:
+        seen = seen_story_ids(viewer.id, [story.id for item in carousel for story in item['stories']])
+        for item in carousel:
+            item['seen'] = all(story.id in seen for story in item['stories'])
+        carousel.sort(key=lambda item: item['seen'])
+    return carousel
+
+
+def feed_audience(user):
+    """Auteurs dont les stories apparaissent dans le feed : soi-même, ses abonnements et ses amis"""
+    audience = {user.id}
+    audience.update(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+    audience.update(friends_of(user))
+    return audience
+
+
+def feed_carousel(user):
+    """Carrousel personnalisé du feed et de la page stories (auteurs les plus récents pour un visiteur)"""
+    if not user.is_authenticated:
+        recent_authors = Story.objects.filter(
+            expires_at__gt=timezone.now()
+        ).order_by('-created_at').values_list('user_id', flat=True)[:PUBLIC_CAROUSEL_SIZE * 5]
+        return carousel_for_users(list(dict.fromkeys(recent_authors))[:PUBLIC_CAROUSEL_SIZE])
+    return carousel_for_users(feed_audience(user), viewer=user)
+
+
+def invalidate_author(user_id):
+    cache.delete(_author_key(user_id))
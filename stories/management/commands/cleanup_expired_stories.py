@@ -1,21 +1,31 @@
 """
 Commande Django pour supprimer automatiquement les stories expirées
-À exécuter via un cron job toutes les heures
+Également planifiée toutes les heures par les workers run_jobs (JOBS_PERIODIC)
+Avec --watch, tourne en continu et purge chaque story dès son expiration (stories.sweeper)
 """
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from stories.models import Story
+from stories.sweeper import run_sweeper
+from stories.tasks import delete_expired_stories
 
 
 class Command(BaseCommand):
     help = 'Supprime les stories expirées (plus de 24h)'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Nombre de stories supprimées par lot')
+        parser.add_argument('--watch', action='store_true', help='Tourner en continu (worker de balayage)')
+
     def handle(self, *args, **options):
-        expired_stories = Story.objects.filter(expires_at__lt=timezone.now())
-        count = expired_stories.count()
-        expired_stories.delete()
-        
+        if options['watch']:
+            self.stdout.write(self.style.SUCCESS('Balayeur de stories démarré'))
+            try:
+                run_sweeper()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        count = delete_expired_stories(options['batch_size'])
+
         self.stdout.write(
             self.style.SUCCESS(f'Successfully deleted {count} expired stories')
         )
-
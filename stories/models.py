@@ -6,6 +6,8 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 
+from mediafiles.models import VIDEO_STATUS_CHOICES
+
 User = get_user_model()
 
 
@@ -15,11 +17,18 @@ class Story(models.Model):
     content = models.TextField(blank=True, verbose_name="Texte")
     image = models.ImageField(upload_to='stories/', blank=True, null=True)
     video = models.FileField(upload_to='stories/', blank=True, null=True)
+    video_status = models.CharField(max_length=20, choices=VIDEO_STATUS_CHOICES, default='', blank=True, verbose_name="Traitement de la vidéo")
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Stories actives (expires_at > maintenant) et purge des stories expirées
+            models.Index(fields=['expires_at'], name='stories_expires_idx'),
+            # Stories actives d'un utilisateur (profil, visionneuse)
+            models.Index(fields=['user', 'expires_at'], name='stories_user_expires_idx'),
+        ]
         verbose_name = "Story"
         verbose_name_plural = "Stories"
     
@@ -0,0 +1,16 @@
+"""
+Signaux des stories : invalidation du carrousel mis en cache
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .carousel import invalidate_author
+from .models import Story
+
+
+@receiver(post_save, sender=Story)
+@receiver(post_delete, sender=Story)
+def invalidate_carousel(sender, instance, **kwargs):
+    """Nouvelle story (ou story supprimée) : recharger les stories de son auteur"""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_author(user_id))
@@ -0,0 +1,68 @@
+"""
+Balayeur des stories expirées pour Kongossa
+
+Supprime les stories dès leur expiration, sans cron : la boucle se réveille
+à la prochaine expiration (au plus tard toutes les STORY_SWEEP_INTERVAL
+secondes), purge les stories expirées par lots, puis se rendort.
+
+Deux façons de la lancer :
+- dans le processus ASGI (STORY_SWEEPER_IN_PROCESS=True), via start_sweeper()
+  appelé par kongossa/asgi.py ;
+- comme worker dédié : python manage.py cleanup_expired_stories --watch
+
+Plusieurs balayeurs peuvent tourner en même temps : la purge est idempotente.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .tasks import delete_expired_stories, seconds_until_next_expiry
+
+logger = logging.getLogger(__name__)
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _interval():
+    return getattr(settings, 'STORY_SWEEP_INTERVAL', 300)
+
+
+def sweep_once():
+    """Purger les stories expirées ; retourne (nombre supprimé, attente avant le prochain passage)"""
+    close_old_connections()
+    try:
+        deleted = delete_expired_stories()
+        delay = seconds_until_next_expiry()
+    finally:
+        close_old_connections()
+    if delay is None:
+        return deleted, _interval()
+    # Une seconde de marge pour que la story soit bien expirée au réveil
+    return deleted, min(delay + 1, _interval())
+
+
+def run_sweeper(stop_event=None):
+    """Boucle du balayeur, jusqu'à ce que stop_event soit positionné"""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            deleted, delay = sweep_once()
+            if deleted:
+                logger.info('%s stories expirées supprimées', deleted)
+        except Exception:
+            logger.exception('Échec du balayage des stories expirées')
+            delay = _interval()
+        stop_event.wait(delay)
+
+
+def start_sweeper():
+    """Démarrer le balayeur dans un thread de fond du processus (une seule fois)"""
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=run_sweeper, name='kongossa-story-sweeper', daemon=True)
+            _thread.start()
+    return _thread
@@ -0,0 +1,57 @@
+"""
+Tâches de fond pour les stories Kongossa
+"""
+import logging
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from mediafiles.blobs import delete_media
+from .models import Story
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_media_files(names):
+    """Supprimer les fichiers média des stories supprimées (une erreur n'arrête pas la purge)
+
+    Les fichiers dédupliqués, peut-être partagés, sont laissés au ramasse-miettes de mediafiles.blobs.
+    """
+    for name in names:
+        try:
+            delete_media(default_storage, name)
+        except Exception:
+            logger.exception('Impossible de supprimer le fichier de story %s', name)
+
+
+def delete_expired_stories(batch_size=None):
+    """Supprimer les stories expirées par lots, retourne le nombre de stories supprimées"""
+    batch_size = batch_size or getattr(settings, 'STORY_DELETE_BATCH_SIZE', 500)
+    now = timezone.now()
+    total = 0
+
+    while True:
+        # Parcours de l'index sur expires_at, un lot à la fois (verrous et transactions courts)
+        batch = list(Story.objects.filter(expires_at__lt=now).order_by('expires_at').values_list(
+            'id', 'image', 'video'
+        )[:batch_size])
+        if not batch:
+            return total
+
+        with transaction.atomic():
+            _, deleted = Story.objects.filter(id__in=[story_id for story_id, _, _ in batch]).delete()
+            # Les fichiers ne sont supprimés qu'une fois la suppression en base validée
+            names = [name for _, image, video in batch for name in (image, video) if name]
+            transaction.on_commit(lambda names=names: _delete_media_files(names))
+        total += deleted.get('stories.Story', 0)
+
+
+def seconds_until_next_expiry():
+    """Délai avant l'expiration de la prochaine story active (None s'il n'y en a aucune)"""
+    next_expiry = Story.objects.filter(
+        expires_at__gt=timezone.now()
+    ).order_by('expires_at').values_list('expires_at', flat=True).first()
+    if next_expiry is None:
+        return None
+    return max((next_expiry - timezone.now()).total_seconds(), 0)
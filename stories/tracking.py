@@ -0,0 +1,102 @@
+"""
+Enregistrement groupé des vues de stories pour Kongossa
+
+Chaque ouverture de story ne fait qu'ajouter (story_id, user_id) à un tampon
+en mémoire du processus. Le tampon est écrit en base par lots, avec
+bulk_create(ignore_conflicts=True) :
+- dès qu'il atteint STORY_VIEW_BUFFER_SIZE vues ;
+- au plus tard STORY_VIEW_FLUSH_INTERVAL secondes après la première vue en attente ;
+- à l'arrêt du processus.
+
+Une rafale de vues sur une story virale coûte ainsi quelques INSERT groupés au
+lieu d'un SELECT + INSERT par vue. Les vues encore en attente sont prises en
+compte par seen_story_ids() dans le processus qui les a reçues.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import StoryView
+
+logger = logging.getLogger(__name__)
+
+_pending = set()
+_lock = threading.Lock()
+_timer = None
+
+
+def _buffer_size():
+    return getattr(settings, 'STORY_VIEW_BUFFER_SIZE', 200)
+
+
+def _write(views):
+    StoryView.objects.bulk_create(
+        [StoryView(story_id=story_id, user_id=user_id) for story_id, user_id in views],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def flush_views():
+    """Écrire en base les vues en attente ; retourne le nombre de vues écrites"""
+    global _timer
+    with _lock:
+        views = list(_pending)
+        _pending.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not views:
+        return 0
+    try:
+        _write(views)
+    except Exception:
+        # Les vues ne sont qu'une statistique : elles sont perdues plutôt que de bloquer le tampon
+        logger.exception('Échec de l\'écriture de %s vues de stories', len(views))
+        return 0
+    return len(views)
+
+
+def _flush_from_timer():
+    close_old_connections()
+    try:
+        flush_views()
+    finally:
+        close_old_connections()
+
+
+def record_view(story_id, user_id):
+    """Ajouter une vue au tampon (l'écriture en base est différée et groupée)"""
+    global _timer
+    if _buffer_size() <= 1:
+        _write([(story_id, user_id)])
+        return
+
+    with _lock:
+        _pending.add((story_id, user_id))
+        full = len(_pending) >= _buffer_size()
+        if not full and _timer is None:
+            _timer = threading.Timer(getattr(settings, 'STORY_VIEW_FLUSH_INTERVAL', 5), _flush_from_timer)
+            _timer.daemon = True
+            _timer.start()
+    if full:
+        flush_views()
+
+
+def seen_story_ids(user_id, story_ids):
+    """Stories déjà vues par l'utilisateur parmi story_ids (une requête, plus le tampon local)"""
+    story_ids = set(story_ids)
+    if not story_ids:
+        return set()
+    seen = set(StoryView.objects.filter(
+        user_id=user_id, story_id__in=story_ids
+    ).values_list('story_id', flat=True))
+    with _lock:
+        seen.update(story_id for story_id, viewer_id in _pending if viewer_id == user_id and story_id in story_ids)
+    return seen
+
+
+atexit.register(flush_views)
@@ -5,9 +5,11 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.utils import timezone
 from django.views.decorators.http import require_http_methods
-from .models import Story, StoryView
+from mediafiles.uploads import uploaded_file
+from .carousel import carousel_for_users, feed_carousel
+from .models import Story
+from .tracking import record_view
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -15,52 +17,34 @@ User = get_user_model()
 
 @login_required
 def stories_feed(request):
-    """Carrousel de stories en haut du feed"""
-    # Récupérer tous les utilisateurs avec des stories actives
-    active_stories = Story.objects.filter(
-        expires_at__gt=timezone.now()
-    ).select_related('user').order_by('-created_at')
-    
-    # Grouper par utilisateur
-    users_with_stories = {}
-    for story in active_stories:
-        if story.user_id not in users_with_stories:
-            users_with_stories[story.user_id] = {
-                'user': story.user,
-                'stories': []
-            }
-        users_with_stories[story.user_id]['stories'].append(story)
-    
+    """Carrousel de stories en haut du feed (abonnements et amis, voir stories.carousel)"""
     return render(request, 'stories/feed.html', {
-        'users_with_stories': list(users_with_stories.values()),
+        'users_with_stories': feed_carousel(request.user),
     })
 
 
 @login_required
 def story_viewer(request, story_id):
     """Visionneuse de story en plein écran"""
-    story = get_object_or_404(Story, id=story_id)
+    story = get_object_or_404(Story.objects.select_related('user'), id=story_id)
     
     if story.is_expired:
         messages.error(request, 'Cette story a expiré')
         return redirect('stories:feed')
     
-    # Marquer comme vue
-    StoryView.objects.get_or_create(
-        story=story,
-        user=request.user
-    )
+    # Marquer comme vue (écriture groupée, voir stories.tracking)
+    record_view(story.id, request.user.id)
     
-    # Récupérer toutes les stories de l'utilisateur pour navigation
-    user_stories = Story.objects.filter(
-        user=story.user,
-        expires_at__gt=timezone.now()
-    ).order_by('created_at')
+    # Stories de l'utilisateur pour navigation, de la plus ancienne à la plus récente,
+    # lues depuis le carrousel en cache (aucune requête tant que l'auteur est en cache)
+    carousel = carousel_for_users([story.user_id])
+    user_stories = list(reversed(carousel[0]['stories'])) if carousel else [story]
+    story_ids = [s.id for s in user_stories]
     
     return render(request, 'stories/viewer.html', {
         'story': story,
         'user_stories': user_stories,
-        'current_index': list(user_stories).index(story) if story in user_stories else 0,
+        'current_index': story_ids.index(story.id) if story.id in story_ids else 0,
     })
 
 
@@ -75,8 +59,8 @@ def create_story_form(request):
 def create_story(request):
     """Créer une nouvelle story"""
     content = request.POST.get('content', '').strip()
-    image = request.FILES.get('image')
-    video = request.FILES.get('video')
+    image = uploaded_file(request, 'image')
+    video = uploaded_file(request, 'video')
     
     if not content and not image and not video:
         messages.error(request, 'Vous devez ajouter du texte, une image ou une vidéo')
@@ -0,0 +1,120 @@
+"""
+Autocomplétion des utilisateurs pour Kongossa (recherche /auth/search/, mentions @)
+
+Deux sources, toutes deux en cache :
+- les correspondances globales d'un préfixe : une lecture d'intervalle sur
+  l'index LOWER(username) (users_username_lower_idx), partagée par tous les
+  utilisateurs et conservée USER_SEARCH_CACHE_TTL secondes ;
+- les relations de l'utilisateur (amis, puis abonnements) : une entrée par
+  utilisateur, filtrée par préfixe en mémoire, invalidée par users.signals.
+
+Les amis passent en premier, puis les abonnements, puis le reste par ordre
+alphabétique : une frappe ne coûte au plus qu'une requête indexée.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Lower
+from django.urls import reverse
+
+from mediafiles.images import image_url
+
+from .friendships import friends_of
+from .models import Follow, User
+
+PREFIX_RE = re.compile(r'^[\w.@+-]+$')
+MAX_PREFIX_LENGTH = 30
+DEFAULT_LIMIT = 10
+PREFIX_RESULTS = 20  # Correspondances globales conservées par préfixe
+
+RANK_FRIEND = 0
+RANK_FOLLOWING = 1
+RANK_OTHER = 2
+
+
+def _ttl():
+    return getattr(settings, 'USER_SEARCH_CACHE_TTL', 60)
+
+
+def _prefix_key(prefix):
+    return f'users:prefix:{prefix}'
+
+
+def _connections_key(user_id):
+    return f'users:connections:{user_id}'
+
+
+def _entry(user, rank=RANK_OTHER):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'full_name': user.get_full_name(),
+        'avatar': image_url(user.avatar, 'avatar', 128) or None,
+        'url': reverse('users:profile', args=[user.username]),
+        'rank': rank,
+    }
+
+
+def _prefix_range(queryset, prefix):
+    """Lecture d'intervalle [prefix, prefix + U+FFFF) sur LOWER(username), utilisable par l'index"""
+    return queryset.annotate(username_lower=Lower('username')).filter(
+        username_lower__gte=prefix,
+        username_lower__lt=prefix + '\uffff',
+        username_lower__startswith=prefix,
+    )
+
+
+def prefix_matches(prefix):
+    """Premiers utilisateurs actifs dont le nom commence par prefix (cache partagé)"""
+    key = _prefix_key(prefix)
+    entries = cache.get(key)
+    if entries is None:
+        users = _prefix_range(User.objects.filter(is_active=True), prefix).order_by('username_lower')
+        entries = [_entry(user) for user in users[:PREFIX_RESULTS]]
+        cache.set(key, entries, _ttl())
+    return entries
+
+
+def connections(user):
+    """Amis et abonnements de l'utilisateur, classés (cache par utilisateur)"""
+    key = _connections_key(user.id)
+    entries = cache.get(key)
+    if entries is None:
+        ranks = dict.fromkeys(friends_of(user), RANK_FRIEND)
+        for following_id in Follow.objects.filter(follower=user).values_list('following_id', flat=True):
+            ranks.setdefault(following_id, RANK_FOLLOWING)
+        users = User.objects.filter(id__in=ranks, is_active=True).order_by('username')
+        entries = [_entry(other, ranks[other.id]) for other in users]
+        cache.set(key, entries, getattr(settings, 'USER_CONNECTIONS_CACHE_TTL', 3600))
+    return entries
+
+
+def invalidate_connections(user_ids):
+    cache.delete_many([_connections_key(user_id) for user_id in user_ids])
+
+
+def normalize_prefix(query):
+    """Préfixe recherchable (minuscules, sans '@'), ou None si la saisie n'est pas un nom d'utilisateur"""
+    prefix = (query or '').strip().lstrip('@').lower()[:MAX_PREFIX_LENGTH]
+    if not prefix or not PREFIX_RE.match(prefix):
+        return None
+    return prefix
+
+
+def autocomplete(user, query, limit=DEFAULT_LIMIT):
+    """Utilisateurs correspondant à la saisie : amis, puis abonnements, puis les autres"""
+    prefix = normalize_prefix(query)
+    if prefix is None:
+        return []
+    results = [
+        entry for entry in connections(user)
+        if entry['username'].lower().startswith(prefix)
+    ]
+    results.sort(key=lambda entry: (entry['rank'], entry['username'].lower()))
+    seen = {entry['id'] for entry in results} | {user.id}
+    for entry in prefix_matches(prefix):
+        if entry['id'] not in seen:
+            results.append(entry)
+            seen.add(entry['id'])
+    return results[:limit]
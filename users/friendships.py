@@ -0,0 +1,80 @@
+"""
+Graphe d'amitié de Kongossa
+
+Une amitié est stockée une seule fois, sous forme canonique (user1_id < user2_id,
+garanti par Friendship.save et une contrainte en base). L'ensemble des amis de
+chaque utilisateur est mis en cache (FRIENDS_CACHE_TTL) et invalidé par
+users.signals à chaque création ou suppression d'amitié : les contrôles d'accès
+(chat, appels, profil) et les listes d'amis deviennent des lectures d'ensemble.
+
+    from users.friendships import are_friends, friends_of, is_friend
+    if is_friend(request.user, other_user.id): ...
+    statuses = are_friends(request.user, [member.id for member in members])
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Friendship, User
+
+
+def _user_id(user):
+    return user if isinstance(user, int) else user.id
+
+
+def _friends_key(user_id):
+    return f'users:friends:{user_id}'
+
+
+def canonical_pair(user_a, user_b):
+    """(user1_id, user2_id) dans l'ordre de stockage"""
+    a, b = _user_id(user_a), _user_id(user_b)
+    return (a, b) if a < b else (b, a)
+
+
+def _load_friend_ids(user_id):
+    # Deux lectures indexées (user1 puis user2) plutôt qu'un OR sur les deux colonnes
+    as_user1 = Friendship.objects.filter(user1_id=user_id, status='accepted').values_list('user2_id', flat=True)
+    as_user2 = Friendship.objects.filter(user2_id=user_id, status='accepted').values_list('user1_id', flat=True)
+    return frozenset(as_user1) | frozenset(as_user2)
+
+
+def friends_of(user):
+    """Identifiants des amis de l'utilisateur (frozenset, en cache)"""
+    if not getattr(user, 'is_authenticated', True):
+        return frozenset()
+    user_id = _user_id(user)
+    key = _friends_key(user_id)
+    friend_ids = cache.get(key)
+    if friend_ids is None:
+        friend_ids = _load_friend_ids(user_id)
+        cache.set(key, friend_ids, getattr(settings, 'FRIENDS_CACHE_TTL', 3600))
+    return friend_ids
+
+
+def is_friend(user, other):
+    return _user_id(other) in friends_of(user)
+
+
+def are_friends(user, user_ids):
+    """{id: bool} pour chaque identifiant de user_ids"""
+    friend_ids = friends_of(user)
+    return {user_id: user_id in friend_ids for user_id in user_ids}
+
+
+def friend_users(user):
+    """Amis de l'utilisateur (QuerySet trié par nom d'utilisateur)"""
+    return User.objects.filter(id__in=friends_of(user)).order_by('username')
+
+
+def add_friendship(user_a, user_b):
+    """Créer l'amitié (idempotent) ; retourne (friendship, created)"""
+    user1_id, user2_id = canonical_pair(user_a, user_b)
+    return Friendship.objects.get_or_create(
+        user1_id=user1_id, user2_id=user2_id,
+        defaults={'status': 'accepted'}
+    )
+
+
+def invalidate_friends(user_ids):
+    cache.delete_many([_friends_key(user_id) for user_id in user_ids])
+
@@ -0,0 +1,18 @@
+"""
+Commande Django pour recalculer les suggestions « Vous connaissez peut-être »
+Également planifiée chaque jour par les workers run_jobs (JOBS_PERIODIC)
+"""
+from django.core.management.base import BaseCommand
+from users.recommendations import BATCH_SIZE, refresh_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les suggestions d\'amis (amis d\'amis, groupes et thèmes en commun)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help='Nombre de suggestions conservées par utilisateur')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Nombre d\'utilisateurs traités par lot')
+
+    def handle(self, *args, **options):
+        count = refresh_suggestions(options['top_k'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{count} suggestions enregistrées'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:18
+
+from django.db import migrations, models
+
+
+def canonicalize_friendships(apps, schema_editor):
+    """Ramener chaque amitié à la forme user1_id < user2_id (en supprimant les doublons inversés)"""
+    Friendship = apps.get_model('users', 'Friendship')
+    existing = set(Friendship.objects.values_list('user1_id', 'user2_id'))
+    for friendship in Friendship.objects.filter(user1_id__gt=models.F('user2_id')):
+        pair = (friendship.user2_id, friendship.user1_id)
+        if pair in existing:
+            friendship.delete()
+        else:
+            Friendship.objects.filter(id=friendship.id).update(user1_id=pair[0], user2_id=pair[1])
+            existing.add(pair)
+    Friendship.objects.filter(user1_id=models.F('user2_id')).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_username_lower_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalize_friendships, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='friendship',
+            constraint=models.CheckConstraint(condition=models.Q(('user1__lt', models.F('user2'))), name='users_friendship_canonical'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_friendship_canonical'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('mutual_friends', models.PositiveIntegerField(default=0, verbose_name='Amis en commun')),
+                ('common_groups', models.PositiveIntegerField(default=0, verbose_name='Groupes en commun')),
+                ('common_topics', models.PositiveIntegerField(default=0, verbose_name='Thèmes en commun')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('suggested_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggested_to', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': "Suggestion d'ami",
+                'verbose_name_plural': "Suggestions d'amis",
+                'indexes': [models.Index(fields=['user', '-score'], name='users_suggestion_score_idx')],
+                'unique_together': {('user', 'suggested_user')},
+            },
+        ),
+    ]
@@ -3,6 +3,7 @@ Modèles utilisateurs pour Kongossa
 """
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 
@@ -23,6 +24,10 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
+        indexes = [
+            # Autocomplétion par préfixe, insensible à la casse (users.autocomplete)
+            models.Index(Lower('username'), name='users_username_lower_idx'),
+        ]
     
     def __str__(self):
         return self.username or self.email or self.phone
@@ -42,13 +47,11 @@ class User(AbstractUser):
         return Follow.objects.filter(follower=user, following=self).exists()
     
     def is_friend_with(self, user):
-        """Vérifier si un utilisateur est ami avec cet utilisateur"""
+        """Vérifier si un utilisateur est ami avec cet utilisateur (ensemble d'amis en cache)"""
         if not user.is_authenticated:
             return False
-        return Friendship.objects.filter(
-            (models.Q(user1=self, user2=user) | models.Q(user1=user, user2=self)),
-            status='accepted'
-        ).exists()
+        from .friendships import is_friend
+        return is_friend(self, user)
     
     def has_pending_friend_request_from(self, user):
         """Vérifier si cet utilisateur a une demande d'ami en attente de la part d'un utilisateur"""
@@ -114,7 +117,7 @@ class FriendRequest(models.Model):
 
 
 class Friendship(models.Model):
-    """Modèle pour les amitiés acceptées"""
+    """Modèle pour les amitiés acceptées (une ligne par paire, user1_id < user2_id, voir users.friendships)"""
     user1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friendships_as_user1')
     user2 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friendships_as_user2')
     status = models.CharField(
@@ -133,7 +136,38 @@ class Friendship(models.Model):
         verbose_name = "Amitié"
         verbose_name_plural = "Amitiés"
         ordering = ['-created_at']
+        constraints = [
+            models.CheckConstraint(condition=models.Q(user1__lt=models.F('user2')), name='users_friendship_canonical'),
+        ]
     
     def __str__(self):
         return f"Amitié entre {self.user1.username} et {self.user2.username}"
+    
+    def save(self, *args, **kwargs):
+        # Forme canonique : la paire n'est stockée que dans un sens
+        if self.user1_id and self.user2_id and self.user1_id > self.user2_id:
+            self.user1_id, self.user2_id = self.user2_id, self.user1_id
+        super().save(*args, **kwargs)
 
+
+class UserSuggestion(models.Model):
+    """Suggestion « Vous connaissez peut-être » précalculée (users.recommendations)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='suggestions')
+    suggested_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='suggested_to')
+    score = models.FloatField(default=0)
+    mutual_friends = models.PositiveIntegerField(default=0, verbose_name="Amis en commun")
+    common_groups = models.PositiveIntegerField(default=0, verbose_name="Groupes en commun")
+    common_topics = models.PositiveIntegerField(default=0, verbose_name="Thèmes en commun")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['user', 'suggested_user']
+        verbose_name = "Suggestion d'ami"
+        verbose_name_plural = "Suggestions d'amis"
+        indexes = [
+            # Lecture des suggestions d'un utilisateur, les meilleures d'abord
+            models.Index(fields=['user', '-score'], name='users_suggestion_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.suggested_user.username} suggéré à {self.user.username}"
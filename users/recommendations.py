@@ -0,0 +1,206 @@
+"""
+Suggestions « Vous connaissez peut-être » pour Kongossa
+
+Calcul en lot (python manage.py refresh_suggestions, planifié chaque jour par
+JOBS_PERIODIC) sur des matrices creuses d'identifiants, avec NumPy/SciPy :
+- A : amitiés (utilisateur × utilisateur, symétrique) ;
+- G : appartenance aux groupes (utilisateur × groupe) ;
+- T : abonnements aux thèmes (utilisateur × thème).
+
+Pour un bloc de lignes, le score d'un candidat est :
+    FRIEND_WEIGHT × amis en commun (A·A)
+  + GROUP_WEIGHT × groupes en commun (G·Gᵀ), pondérés par 1/log(2 + taille)
+  + TOPIC_WEIGHT × thèmes en commun (T·Tᵀ), pondérés de même
+L'utilisateur lui-même, ses amis et ses abonnements sont écartés ; les
+USER_SUGGESTIONS_TOP_K meilleurs candidats sont écrits dans UserSuggestion.
+Les groupes et thèmes de plus de MAX_COMMUNITY_SIZE membres sont ignorés :
+ils n'apportent presque aucun signal et rendraient le produit dense.
+
+La lecture (suggestions_for) est une seule requête sur l'index
+users_suggestion_score_idx.
+"""
+import itertools
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from forum.models import Group, Topic
+from .friendships import friends_of
+from .models import Follow, Friendship, User, UserSuggestion
+
+logger = logging.getLogger(__name__)
+
+FRIEND_WEIGHT = 1.0
+GROUP_WEIGHT = 0.5
+TOPIC_WEIGHT = 0.2
+MAX_COMMUNITY_SIZE = 5000
+BATCH_SIZE = 2000  # Lignes (utilisateurs) traitées par produit matriciel
+LOAD_CHUNK_SIZE = 10000
+
+
+def _top_k():
+    return getattr(settings, 'USER_SUGGESTIONS_TOP_K', 20)
+
+
+def _pairs(queryset, first, second):
+    """Colonnes (first, second) d'un QuerySet en deux tableaux int64, sans liste intermédiaire"""
+    import numpy as np
+    values = queryset.values_list(first, second).order_by().iterator(chunk_size=LOAD_CHUNK_SIZE)
+    flat = np.fromiter(itertools.chain.from_iterable(values), dtype=np.int64)
+    flat = flat.reshape(-1, 2)
+    return flat[:, 0], flat[:, 1]
+
+
+def _positions(user_ids, ids):
+    """Index de ids dans user_ids (trié) ; -1 pour les utilisateurs absents (inactifs)"""
+    import numpy as np
+    if not len(user_ids):
+        return np.full(len(ids), -1, dtype=np.int64)
+    positions = np.searchsorted(user_ids, ids)
+    positions[positions >= len(user_ids)] = 0
+    return np.where(user_ids[positions] == ids, positions, -1)
+
+
+def _user_matrix(user_ids, sources, targets):
+    """Matrice creuse utilisateur × utilisateur (1 par lien)"""
+    import numpy as np
+    from scipy import sparse
+    n = len(user_ids)
+    rows, cols = _positions(user_ids, sources), _positions(user_ids, targets)
+    keep = (rows >= 0) & (cols >= 0)
+    matrix = sparse.csr_matrix(
+        (np.ones(keep.sum(), dtype=np.float32), (rows[keep], cols[keep])), shape=(n, n)
+    )
+    matrix.data[:] = 1  # Doublons éventuels
+    return matrix
+
+
+def _membership_matrix(user_ids, members, communities, weight):
+    """(matrice binaire utilisateur × communauté, même matrice pondérée pour le score)"""
+    import numpy as np
+    from scipy import sparse
+    rows = _positions(user_ids, members)
+    keep = rows >= 0
+    rows = rows[keep]
+    community_ids, cols = np.unique(communities[keep], return_inverse=True)
+    sizes = np.bincount(cols, minlength=len(community_ids))
+    binary = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(user_ids), len(community_ids))
+    )
+    binary.data[:] = 1
+    # Poids par communauté : 1/log(2 + taille), nul au-delà de MAX_COMMUNITY_SIZE ; la racine
+    # est appliquée des deux côtés pour que le produit W·Wᵀ somme les poids des communautés partagées
+    column_weights = np.where(sizes <= MAX_COMMUNITY_SIZE, weight / np.log(2 + sizes), 0).astype(np.float32)
+    weighted = (binary @ sparse.diags(np.sqrt(column_weights))).tocsr()
+    weighted.eliminate_zeros()
+    return binary, weighted
+
+
+def _shared(matrix, rows, cols):
+    """Nombre de colonnes non nulles communes aux lignes rows[i] et cols[i] (vectorisé)"""
+    import numpy as np
+    if not len(rows):
+        return np.zeros(0, dtype=np.int64)
+    return np.asarray(matrix[rows].multiply(matrix[cols]).sum(axis=1)).ravel().astype(np.int64)
+
+
+def _top_candidates(scores, top_k):
+    """(lignes, colonnes, scores) des top_k meilleurs candidats de chaque ligne d'une matrice CSR"""
+    import numpy as np
+    rows, cols, values = [], [], []
+    indptr, indices, data = scores.indptr, scores.indices, scores.data
+    for row in range(scores.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        row_data = data[start:end]
+        if end - start > top_k:
+            best = np.argpartition(row_data, -top_k)[-top_k:]
+        else:
+            best = np.arange(end - start)
+        rows.append(np.full(len(best), row, dtype=np.int64))
+        cols.append(indices[start:end][best])
+        values.append(row_data[best])
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+
+def refresh_suggestions(top_k=None, batch_size=BATCH_SIZE):
+    """Recalculer toutes les suggestions ; retourne le nombre de suggestions écrites"""
+    import numpy as np
+    from scipy import sparse
+
+    top_k = top_k or _top_k()
+    user_ids = np.fromiter(
+        User.objects.filter(is_active=True).order_by('id').values_list('id', flat=True).iterator(chunk_size=LOAD_CHUNK_SIZE),
+        dtype=np.int64,
+    )
+    n = len(user_ids)
+
+    user1, user2 = _pairs(Friendship.objects.filter(status='accepted'), 'user1_id', 'user2_id')
+    friends = _user_matrix(user_ids, np.concatenate([user1, user2]), np.concatenate([user2, user1]))
+    follows = _user_matrix(user_ids, *_pairs(Follow.objects.all(), 'follower_id', 'following_id'))
+    groups, weighted_groups = _membership_matrix(
+        user_ids, *_pairs(Group.members.through.objects.all(), 'user_id', 'group_id'), GROUP_WEIGHT
+    )
+    topics, weighted_topics = _membership_matrix(
+        user_ids, *_pairs(Topic.subscribers.through.objects.all(), 'user_id', 'topic_id'), TOPIC_WEIGHT
+    )
+    weighted_friends = (friends * FRIEND_WEIGHT).tocsr()
+    weighted_groups_t = weighted_groups.T.tocsr()
+    weighted_topics_t = weighted_topics.T.tocsr()
+    logger.info('Suggestions : %s utilisateurs, %s amitiés', n, len(user1))
+
+    written = 0
+    for start in range(0, n, batch_size):
+        stop = min(start + batch_size, n)
+        scores = (
+            friends[start:stop] @ weighted_friends
+            + weighted_groups[start:stop] @ weighted_groups_t
+            + weighted_topics[start:stop] @ weighted_topics_t
+        ).tocsr()
+        # Écarter soi-même, les amis et les abonnements
+        excluded = (friends[start:stop] + follows[start:stop] + sparse.eye(stop - start, n, k=start, format='csr')) > 0
+        scores = (scores - scores.multiply(excluded)).tocsr()
+        scores.eliminate_zeros()
+
+        rows, cols, values = _top_candidates(scores, top_k)
+        rows += start
+        mutual_friends = _shared(friends, rows, cols)
+        common_groups = _shared(groups, rows, cols)
+        common_topics = _shared(topics, rows, cols)
+
+        suggestions = [
+            UserSuggestion(
+                user_id=int(user_ids[row]), suggested_user_id=int(user_ids[col]), score=float(score),
+                mutual_friends=int(friends_count), common_groups=int(groups_count), common_topics=int(topics_count),
+            )
+            for row, col, score, friends_count, groups_count, topics_count
+            in zip(rows, cols, values, mutual_friends, common_groups, common_topics)
+        ]
+        with transaction.atomic():
+            UserSuggestion.objects.filter(user_id__in=user_ids[start:stop].tolist()).delete()
+            UserSuggestion.objects.bulk_create(suggestions, batch_size=1000)
+        written += len(suggestions)
+
+    # Utilisateurs désactivés depuis le dernier calcul
+    UserSuggestion.objects.filter(suggested_user__is_active=False).delete()
+    UserSuggestion.objects.filter(user__is_active=False).delete()
+    return written
+
+
+def suggestions_for(user, limit=10):
+    """Suggestions précalculées de l'utilisateur, les meilleures d'abord (une requête indexée)
+
+    Les personnes devenues amies depuis le dernier calcul sont écartées via l'ensemble d'amis en cache.
+    """
+    friend_ids = friends_of(user)
+    # Au plus top_k lignes par utilisateur : tout lire laisse de la marge pour le filtrage
+    suggestions = UserSuggestion.objects.filter(user=user).select_related('suggested_user').order_by('-score')
+    return [
+        suggestion for suggestion in suggestions[:max(limit, _top_k())]
+        if suggestion.suggested_user_id not in friend_ids
+    ][:limit]
@@ -0,0 +1,80 @@
+"""
+Relations entre un utilisateur et une liste d'utilisateurs (profil, membres, résultats de recherche)
+
+    from users.relationships import annotate_relationships
+    members = annotate_relationships(request.user, group.members.order_by('username'))
+    for member in members:
+        member.relationship.is_friend, member.relationship.request_status ...
+
+Le coût est fixe quel que soit le nombre d'utilisateurs : une requête pour les
+abonnements, une pour les demandes d'ami en attente (dans les deux sens),
+l'ensemble des amis venant du cache de users.friendships.
+"""
+from django.db.models import Q
+
+from .friendships import friends_of
+from .models import Follow, FriendRequest
+
+
+class Relationship:
+    """Relation du point de vue de l'utilisateur connecté"""
+    __slots__ = ('is_following', 'is_friend', 'request_sent', 'request_received', 'request_status', 'friend_request')
+
+    def __init__(self, is_following=False, is_friend=False, request_sent=False, request_received=False,
+                 request_status=None, friend_request=None):
+        self.is_following = is_following
+        self.is_friend = is_friend
+        # Demandes d'ami en attente, envoyée à l'utilisateur / reçue de sa part
+        self.request_sent = request_sent
+        self.request_received = request_received
+        # 'sent' (demande envoyée), 'received' (demande reçue), 'friends' ou None
+        self.request_status = request_status
+        self.friend_request = friend_request
+
+
+def resolve_relationships(viewer, user_ids):
+    """{id: Relationship} de viewer vers chacun des utilisateurs user_ids"""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not viewer.is_authenticated or not user_ids:
+        return {user_id: Relationship() for user_id in user_ids}
+
+    following = set(Follow.objects.filter(
+        follower=viewer, following_id__in=user_ids
+    ).values_list('following_id', flat=True))
+    friend_ids = friends_of(viewer)
+
+    sent, received = {}, {}
+    for friend_request in FriendRequest.objects.filter(
+        Q(from_user=viewer, to_user_id__in=user_ids) | Q(from_user_id__in=user_ids, to_user=viewer),
+        status='pending'
+    ):
+        if friend_request.from_user_id == viewer.id:
+            sent[friend_request.to_user_id] = friend_request
+        else:
+            received[friend_request.from_user_id] = friend_request
+
+    relationships = {}
+    for user_id in user_ids:
+        relationship = Relationship(
+            is_following=user_id in following,
+            is_friend=user_id in friend_ids,
+            request_sent=user_id in sent,
+            request_received=user_id in received,
+        )
+        if user_id in sent:
+            relationship.request_status, relationship.friend_request = 'sent', sent[user_id]
+        elif user_id in received:
+            relationship.request_status, relationship.friend_request = 'received', received[user_id]
+        elif relationship.is_friend:
+            relationship.request_status = 'friends'
+        relationships[user_id] = relationship
+    return relationships
+
+
+def annotate_relationships(viewer, users):
+    """Poser user.relationship sur chaque utilisateur ; retourne la liste"""
+    users = list(users)
+    relationships = resolve_relationships(viewer, [user.id for user in users])
+    for user in users:
+        user.relationship = relationships[user.id]
+    return users
@@ -0,0 +1,24 @@
+"""
+Signaux des utilisateurs : invalidation des caches de relations (ensembles d'amis, autocomplétion)
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .autocomplete import invalidate_connections
+from .friendships import invalidate_friends
+from .models import Follow, Friendship
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follower_connections(sender, instance, **kwargs):
+    follower_id = instance.follower_id
+    transaction.on_commit(lambda: invalidate_connections([follower_id]))
+
+
+@receiver(post_save, sender=Friendship)
+@receiver(post_delete, sender=Friendship)
+def invalidate_friend_connections(sender, instance, **kwargs):
+    user_ids = [instance.user1_id, instance.user2_id]
+    transaction.on_commit(lambda: invalidate_friends(user_ids))
+    transaction.on_commit(lambda: invalidate_connections(user_ids))
@@ -0,0 +1,9 @@
+"""
+Tâches de fond pour les utilisateurs Kongossa
+"""
+from .recommendations import refresh_suggestions as _refresh_suggestions
+
+
+def refresh_suggestions():
+    """Recalculer les suggestions « Vous connaissez peut-être » (planifiée chaque jour)"""
+    return _refresh_suggestions()
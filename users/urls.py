@@ -12,6 +12,8 @@ urlpatterns = [
     # IMPORTANT: profile/edit/ doit être AVANT profile/<str:username>/ pour éviter que 'edit' soit interprété comme un username
     path('profile/edit/', views.edit_profile, name='edit_profile'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('search/', views.search_users, name='search'),
+    path('suggestions/', views.suggestions, name='suggestions'),
     path('follow/<str:username>/', views.toggle_follow, name='toggle_follow'),
     path('friend-request/<str:username>/send/', views.send_friend_request, name='send_friend_request'),
     path('friend-request/<int:request_id>/accept/', views.accept_friend_request, name='accept_friend_request'),
@@ -11,7 +11,13 @@ from django.utils.crypto import get_random_string
 from django.core.mail import send_mail
 from django.conf import settings
 from django.http import JsonResponse
-from .models import User, Follow, FriendRequest, Friendship
+from django.urls import reverse
+from mediafiles.images import image_url
+from .autocomplete import DEFAULT_LIMIT as SEARCH_DEFAULT_LIMIT, autocomplete
+from .friendships import add_friendship
+from .recommendations import suggestions_for
+from .relationships import resolve_relationships
+from .models import User, Follow, FriendRequest
 
 
 def signup_view(request):
@@ -177,58 +183,57 @@ def profile(request, username):
             user=profile_user,
             expires_at__gt=timezone.now()
         )
-        is_following = False
-        is_friend = False
-        friend_request_status = None
-        pending_request_from_me = False
-        pending_request_to_me = False
-        friend_request = None
-        
-        if request.user.is_authenticated:
-            is_following = profile_user.is_followed_by(request.user)
-            is_friend = profile_user.is_friend_with(request.user)
-            # Vérifier si request.user a envoyé une demande à profile_user
-            pending_request_from_me = request.user.has_pending_friend_request_to(profile_user)
-            # Vérifier si profile_user a envoyé une demande à request.user
-            pending_request_to_me = profile_user.has_pending_friend_request_to(request.user)
-            
-            if pending_request_from_me:
-                friend_request_status = 'sent'
-                # Récupérer l'objet FriendRequest pour pouvoir l'annuler
-                friend_request = FriendRequest.objects.filter(
-                    from_user=request.user,
-                    to_user=profile_user,
-                    status='pending'
-                ).first()
-            elif pending_request_to_me:
-                friend_request_status = 'received'
-                # Récupérer la demande d'ami reçue
-                friend_request = FriendRequest.objects.filter(
-                    from_user=profile_user,
-                    to_user=request.user,
-                    status='pending'
-                ).first()
-            elif is_friend:
-                friend_request_status = 'friends'
-                friend_request = None
+        # Abonnement, amitié et demandes en attente (dans les deux sens) en deux requêtes
+        relationship = resolve_relationships(request.user, [profile_user.id])[profile_user.id]
         
         return render(request, 'users/profile.html', {
             'profile_user': profile_user,
             'user': request.user,  # S'assurer que user est dans le contexte
             'posts': posts,
             'active_stories': active_stories,
-            'is_following': is_following,
-            'is_friend': is_friend,
-            'friend_request_status': friend_request_status,
-            'pending_request_from_me': pending_request_from_me,
-            'pending_request_to_me': pending_request_to_me,
-            'friend_request': friend_request,
+            'is_following': relationship.is_following,
+            'is_friend': relationship.is_friend,
+            # Demande envoyée (pour l'annuler) ou reçue (pour l'accepter), sinon 'friends' si déjà amis
+            'friend_request_status': relationship.request_status,
+            'pending_request_from_me': relationship.request_sent,
+            'pending_request_to_me': relationship.request_received,
+            'friend_request': relationship.friend_request,
         })
     except User.DoesNotExist:
         messages.error(request, 'Utilisateur non trouvé')
         return redirect('forum:feed')
 
 
+@login_required
+def search_users(request):
+    """Autocomplétion des utilisateurs par préfixe (API) : ?q=ma&limit=10, amis en premier"""
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_DEFAULT_LIMIT)), 1), 20)
+    except ValueError:
+        limit = SEARCH_DEFAULT_LIMIT
+    results = autocomplete(request.user, request.GET.get('q', ''), limit)
+    return JsonResponse({'results': results})
+
+
+@login_required
+def suggestions(request):
+    """Suggestions « Vous connaissez peut-être » (API), précalculées par refresh_suggestions"""
+    results = []
+    for suggestion in suggestions_for(request.user):
+        suggested = suggestion.suggested_user
+        results.append({
+            'id': suggested.id,
+            'username': suggested.username,
+            'full_name': suggested.get_full_name(),
+            'avatar': image_url(suggested.avatar, 'avatar', 128) or None,
+            'url': reverse('users:profile', args=[suggested.username]),
+            'mutual_friends': suggestion.mutual_friends,
+            'common_groups': suggestion.common_groups,
+            'common_topics': suggestion.common_topics,
+        })
+    return JsonResponse({'results': results})
+
+
 @login_required
 def edit_profile(request):
     """Modifier le profil"""
@@ -492,13 +497,8 @@ def accept_friend_request(request, request_id):
         friend_request.status = 'accepted'
         friend_request.save()
         
-        # Créer l'amitié (dans les deux sens pour faciliter les requêtes)
-        user1, user2 = sorted([friend_request.from_user, friend_request.to_user], key=lambda u: u.id)
-        Friendship.objects.get_or_create(
-            user1=user1,
-            user2=user2,
-            defaults={'status': 'accepted'}
-        )
+        # Créer l'amitié (une ligne par paire, sous forme canonique)
+        add_friendship(friend_request.from_user_id, friend_request.to_user_id)
         
         # Créer une notification pour l'expéditeur
         try: